@@ -0,0 +1,124 @@
+"""读接口响应缓存与 ETag
+
+响应体按 (接口名, 规范化后的查询参数, 数据版本号) 缓存为 JSON 字节串。
+ETag 只由数据版本号和缓存键决定，因此客户端带 If-None-Match 重新验证时，
+只要数据没有变化就直接返回 304，不需要查询或序列化任何数据。
+"""
+import hashlib
+import json
+from collections.abc import Callable
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import run_read
+from app.models.state import get_data_version
+from app.services import cache as cache_module
+from app.services.profiling import profile_call, timed_serialize
+
+
+def make_cache_key(name: str, params: dict) -> str:
+    """生成缓存键：接口名 + 按名称排序的参数"""
+    normalized = json.dumps(
+        {k: v for k, v in params.items() if v is not None},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return f"{name}:{normalized}"
+
+
+def _etag(version: int, key: str) -> str:
+    digest = hashlib.sha1(f"{settings.app_version}:{version}:{key}".encode()).hexdigest()
+    return f'W/"{version}-{digest[:16]}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {value.strip() for value in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _validators(request: Request, version: int, name: str, params: dict):
+    """返回 (带版本号的缓存键, 响应头, 是否可返回 304)"""
+    key = make_cache_key(name, params)
+    etag = _etag(version, key)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    return f"{version}:{key}", headers, _etag_matches(request, etag)
+
+
+def _cache_get(key: str) -> bytes | None:
+    backend = cache_module.cache
+    return backend.get(key) if backend is not None else None
+
+
+def _encode_and_cache(key: str, data: Any) -> bytes:
+    """序列化响应数据并写入缓存（超过 cache_max_body_bytes 的不缓存）"""
+    with timed_serialize():
+        body = json.dumps(
+            jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+    backend = cache_module.cache
+    if backend is not None and len(body) <= settings.cache_max_body_bytes:
+        backend.set(key, body)
+    return body
+
+
+def cached_response(
+    request: Request,
+    db: Session | None,
+    name: str,
+    params: dict,
+    build: Callable[[], Any],
+) -> Response:
+    """返回带缓存和 ETag 的 JSON 响应
+
+    db 为 None 时表示响应与法规数据无关（如分类列表），版本号固定为 0。
+    build 抛出的 HTTPException 原样向上传递，不会被缓存。
+    """
+    version = get_data_version(db) if db is not None else 0
+    key, headers, not_modified = _validators(request, version, name, params)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    body = _cache_get(key)
+    if body is None:
+        body = _encode_and_cache(key, build())
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def cached_read(
+    request: Request,
+    db,
+    name: str,
+    params: dict,
+    build: Callable[[Session], Any],
+) -> Response:
+    """cached_response 的异步版本，build(session) 须返回已加载完毕的数据（如 Pydantic 模型）
+
+    同步会话时整个过程经 run_read 在线程池中执行；AsyncSession 时只有查版本号和
+    build(session) 经 run_sync 执行，缓存读写（Redis 为网络 I/O）和序列化放到线程池，
+    不占用事件循环。
+    """
+    if not hasattr(db, "run_sync"):
+        return await run_read(
+            db,
+            lambda session: cached_response(request, session, name, params, lambda: build(session)),
+        )
+
+    version = await run_read(db, get_data_version)
+    key, headers, not_modified = _validators(request, version, name, params)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    body = await run_in_threadpool(_cache_get, key)
+    if body is None:
+        data = await run_read(db, build)
+        body = await run_in_threadpool(profile_call, _encode_and_cache, key, data)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,99 @@
+"""附件下载响应
+
+- 支持 Range / If-Range（206 分段传输），浏览器内置 PDF 阅读器可以按需加载页面
+- ETag / Last-Modified 条件请求，未变化时返回 304
+- 按文件实际格式返回 Content-Type，PDF 和图片可 inline 打开；其他类型（如旧目录中的
+  HTML、SVG）一律作为附件下载，避免在 API 同源下被浏览器渲染
+- 文件由 Starlette FileResponse 发送：ASGI 服务器支持 http.response.pathsend 扩展时
+  走零拷贝发送；配置 download_accel_redirect_prefix 后改为返回 X-Accel-Redirect，
+  由前置的 Nginx 直接发送文件（sendfile）
+"""
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import quote
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from app.config import settings
+from app.services.filetype import mime_type
+
+# 内容寻址存储中的文件名就是 SHA-256
+_DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+
+# 允许 inline 打开的类型（浏览器不会执行其中的脚本）
+INLINE_MEDIA_TYPES = frozenset({
+    "application/pdf",
+    "image/png",
+    "image/jpeg",
+    "image/gif",
+    "image/webp",
+    "image/bmp",
+})
+
+
+def _file_etag(path: Path, mtime: float, size: int) -> str:
+    """内容寻址的文件直接用摘要作强 ETag，旧文件按修改时间和大小生成"""
+    if _DIGEST_RE.fullmatch(path.stem):
+        return f'"{path.stem}"'
+    return f'"{int(mtime):x}-{size:x}"'
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """条件请求判断：If-None-Match 优先，没有时才看 If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _content_disposition(disposition_type: str, filename: str) -> str:
+    return f"{disposition_type}; filename*=UTF-8''{quote(filename)}"
+
+
+def attachment_response(
+    request: Request, path: Path, filename: str, inline: bool = False
+) -> Response:
+    """返回附件文件（调用方需确认文件存在），inline 只对 INLINE_MEDIA_TYPES 生效"""
+    stat_result = path.stat()
+    etag = _file_etag(path, stat_result.st_mtime, stat_result.st_size)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": "no-cache",
+        "X-Content-Type-Options": "nosniff",
+    }
+    if _not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mime_type(path.suffix) or "application/octet-stream"
+    disposition_type = "inline" if inline and media_type in INLINE_MEDIA_TYPES else "attachment"
+
+    prefix = settings.download_accel_redirect_prefix
+    if prefix:
+        try:
+            relative = path.resolve().relative_to(Path(settings.attachment_dir).resolve())
+        except ValueError:
+            relative = None
+        if relative is not None:
+            headers["X-Accel-Redirect"] = f"{prefix.rstrip('/')}/{quote(relative.as_posix())}"
+            headers["Content-Disposition"] = _content_disposition(disposition_type, filename)
+            return Response(media_type=media_type, headers=headers)
+
+    return FileResponse(
+        path,
+        headers=headers,
+        media_type=media_type,
+        filename=filename,
+        stat_result=stat_result,
+        content_disposition_type=disposition_type,
+    )
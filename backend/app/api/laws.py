@@ -1,40 +1,87 @@
 """法规相关 API 路由"""
 import math
-import os
-from datetime import datetime
+from datetime import date
 from pathlib import Path
 from typing import Optional
-from urllib.parse import quote
+from urllib.parse import urlparse
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
-from sqlalchemy import desc, or_
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import desc, extract, func
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from app.api.caching import cached_read, cached_response
+from app.api.downloads import attachment_response
+from app.api.pagination import encode_cursor, keyset_page
 from app.config import settings
-from app.database import get_db
-from app.models.law import Law, CrawlLog, create_crawl_log
+from app.database import get_db, get_read_db, run_read
+from app.models.job import get_active_crawl_job, get_crawl_job
+from app.models.law import CrawlLog, Law, LawBody, decode_body
 from app.schemas.law import (
+    CategoryResponse,
+    CrawlJobResponse,
+    CrawlStartResponse,
+    CrawlStatusResponse,
     LawListResponse,
     LawResponse,
-    CrawlLogResponse,
-    CrawlStatusResponse,
-    CrawlStartResponse,
-    CategoryResponse,
+    LawSearchItem,
+    LawSearchResponse,
+    LawSummary,
+    TimelineBucket,
+    TimelineResponse,
+)
+from app.services.search import (
+    build_query,
+    has_terms,
+    highlight,
+    html_to_text,
+    index_source,
+    make_snippet,
+    post_filter_column,
+    rank_order,
+    search_backend,
+    search_filter,
 )
 
 router = APIRouter(prefix="/api/laws", tags=["laws"])
 
 
 @router.get("", response_model=LawListResponse)
-def get_laws(
+async def get_laws(
+    request: Request,
     category: Optional[str] = Query(None, description="分类筛选"),
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
     sort: str = Query("-publish_date", description="排序字段，-表示降序"),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(
+        None, description="游标分页：传空字符串取第一页，之后传上一页返回的 next_cursor"
+    ),
+    with_total: bool = Query(False, description="游标分页时是否返回总数"),
+    db=Depends(get_read_db),
 ):
     """获取法规列表"""
+    params = {
+        "category": category,
+        "page": page,
+        "page_size": page_size,
+        "sort": sort,
+        "cursor": cursor,
+        "with_total": with_total,
+    }
+    return await cached_read(
+        request, db, "laws", params, lambda session: _list_laws(session, **params)
+    )
+
+
+def _list_laws(
+    db: Session,
+    category: str | None,
+    page: int,
+    page_size: int,
+    sort: str,
+    cursor: str | None,
+    with_total: bool,
+) -> LawListResponse:
+    """查询法规列表"""
     query = db.query(Law)
 
     # 分类筛选
@@ -52,6 +99,18 @@ def get_laws(
     else:
         order_col = Law.publish_date
 
+    # 游标分页
+    if cursor is not None:
+        if order_col is not Law.publish_date:
+            raise HTTPException(status_code=400, detail="游标分页仅支持按发布日期排序")
+        items, next_cursor = keyset_page(query, page_size, cursor, descending=sort.startswith("-"))
+        return LawListResponse(
+            items=[LawSummary.model_validate(item) for item in items],
+            total=query.count() if with_total else None,
+            page_size=page_size,
+            next_cursor=next_cursor,
+        )
+
     if sort.startswith("-"):
         query = query.order_by(desc(order_col))
     else:
@@ -66,7 +125,7 @@ def get_laws(
     items = query.offset(offset).limit(page_size).all()
 
     return LawListResponse(
-        items=[LawResponse.model_validate(item) for item in items],
+        items=[LawSummary.model_validate(item) for item in items],
         total=total,
         page=page,
         page_size=page_size,
@@ -74,44 +133,161 @@ def get_laws(
     )
 
 
-@router.get("/search", response_model=LawListResponse)
-def search_laws(
+@router.get("/search", response_model=LawSearchResponse)
+async def search_laws(
     keyword: str = Query(..., min_length=1, description="搜索关键词"),
     category: Optional[str] = Query(None, description="分类筛选"),
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(
+        None, description="游标分页（按发布日期降序）：传空字符串取第一页，之后传 next_cursor"
+    ),
+    with_total: bool = Query(False, description="游标分页时是否返回总数"),
+    db=Depends(get_read_db),
 ):
-    """关键词搜索法规"""
-    query = db.query(Law)
+    """关键词搜索法规（全文索引，按相关度排序；游标分页时按发布日期排序）"""
+    return await run_read(
+        db,
+        lambda session: _search_laws(
+            session, keyword, category, page, page_size, cursor, with_total
+        ),
+    )
 
-    # 关键词搜索（标题、正文、附件内容）
-    search_pattern = f"%{keyword}%"
-    query = query.filter(
-        or_(
-            Law.title.ilike(search_pattern),
-            Law.content.ilike(search_pattern),
-            Law.file_content.ilike(search_pattern),
-        )
+
+def _search_laws(
+    db: Session,
+    keyword: str,
+    category: str | None,
+    page: int,
+    page_size: int,
+    cursor: str | None,
+    with_total: bool,
+) -> LawSearchResponse:
+    """全文索引搜索，数据库不支持全文索引时退化为 LIKE；关键词切不出词元时直接返回空结果"""
+    if not has_terms(keyword):
+        if cursor is not None:
+            return LawSearchResponse(items=[], total=0 if with_total else None, page_size=page_size)
+        return LawSearchResponse(items=[], total=0, page=page, page_size=page_size, total_pages=1)
+
+    backend = search_backend(db.get_bind())
+    match_query = build_query(backend, keyword) if backend else None
+    if not match_query:
+        return _search_laws_like(db, keyword, category, page, page_size, cursor, with_total)
+
+    index_table, law_id = index_source(backend)
+    count_query = (
+        db.query(func.count())
+        .select_from(index_table)
+        .join(Law, Law.id == law_id)
+        .filter(search_filter(backend, match_query))
+    )
+    query = (
+        db.query(Law)
+        .join(index_table, law_id == Law.id)
+        .filter(search_filter(backend, match_query))
     )
 
     # 分类筛选
     if category:
-        query = query.filter(Law.category == category)
+        category_column = post_filter_column(backend, Law.category)
+        count_query = count_query.filter(category_column == category)
+        query = query.filter(category_column == category)
+
+    # 游标分页
+    if cursor is not None:
+        laws, next_cursor = keyset_page(query.options(selectinload(Law.body)), page_size, cursor)
+        return LawSearchResponse(
+            items=_search_items(laws, keyword),
+            total=count_query.scalar() if with_total else None,
+            page_size=page_size,
+            next_cursor=next_cursor,
+        )
+
+    # 总数
+    total = count_query.scalar()
+
+    # 分页：先只按相关度（相同时按发布日期降序）取当前页的 id，
+    # 再加载这一页的法规和正文，命中片段只为这一页计算
+    total_pages = math.ceil(total / page_size) if total > 0 else 1
+    offset = (page - 1) * page_size
+    page_ids = [
+        row[0]
+        for row in query.with_entities(Law.id)
+        .order_by(rank_order(backend, match_query), desc(Law.publish_date))
+        .offset(offset)
+        .limit(page_size)
+    ]
+    laws = {
+        law.id: law
+        for law in db.query(Law).options(selectinload(Law.body)).filter(Law.id.in_(page_ids))
+    }
+
+    return LawSearchResponse(
+        items=_search_items([laws[i] for i in page_ids if i in laws], keyword),
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_pages=total_pages,
+    )
 
-    # 按发布日期降序
-    query = query.order_by(desc(Law.publish_date))
+
+def _search_items(laws: list[Law], keyword: str) -> list[LawSearchItem]:
+    """将法规转换为搜索结果条目，命中片段依次从正文、附件全文、标题中截取"""
+    items = []
+    for law in laws:
+        item = LawSearchItem.model_validate(law)
+        snippet = make_snippet(keyword, html_to_text(law.content), law.file_content, law.title)
+        item.snippet = highlight(snippet or law.summary or "", keyword)
+        items.append(item)
+    return items
+
+
+# LIKE 兜底搜索每批解压匹配的法规数
+LIKE_SCAN_BATCH = 200
+
+
+def _search_laws_like(
+    db: Session,
+    keyword: str,
+    category: str | None,
+    page: int,
+    page_size: int,
+    cursor: str | None = None,
+    with_total: bool = False,
+) -> LawSearchResponse:
+    """LIKE 模糊搜索（数据库不支持全文索引时使用）
+
+    匹配标题、正文和附件全文，语义同 ilike('%kw%')。正文和附件全文是压缩存储的，
+    按发布日期降序分批读取并解压后在 Python 中匹配，每次请求最多扫描 search_like_max_scan 条：
+    游标分页时凑满一页或额度用完即停止，额度用完时 next_cursor 指向扫描停止的位置
+    （这一页可能不足 page_size 条）；页码分页和 total 只统计最近的 search_like_max_scan 条法规。
+    """
+    # 游标分页
+    if cursor is not None:
+        matches, next_cursor = _scan_like_matches(
+            db, keyword, category, cursor, limit=page_size + 1
+        )
+        if len(matches) > page_size:
+            matches = matches[:page_size]
+            next_cursor = encode_cursor(matches[-1][1], matches[-1][0], descending=True)
+        return LawSearchResponse(
+            items=_load_search_items(db, [law_id for law_id, _ in matches]),
+            total=len(_scan_like_matches(db, keyword, category)[0]) if with_total else None,
+            page_size=page_size,
+            next_cursor=next_cursor,
+        )
 
     # 总数
-    total = query.count()
+    matches, _ = _scan_like_matches(db, keyword, category)
+    total = len(matches)
 
     # 分页
     total_pages = math.ceil(total / page_size) if total > 0 else 1
     offset = (page - 1) * page_size
-    items = query.offset(offset).limit(page_size).all()
+    page_ids = [law_id for law_id, _ in matches[offset:offset + page_size]]
 
-    return LawListResponse(
-        items=[LawResponse.model_validate(item) for item in items],
+    return LawSearchResponse(
+        items=_load_search_items(db, page_ids),
         total=total,
         page=page,
         page_size=page_size,
@@ -119,54 +295,165 @@ def search_laws(
     )
 
 
-@router.get("/timeline")
-def get_timeline(
+def _scan_like_matches(
+    db: Session,
+    keyword: str,
+    category: str | None,
+    cursor: str | None = None,
+    limit: int | None = None,
+) -> tuple[list[tuple], str | None]:
+    """按游标分页的顺序（发布日期降序）扫描匹配关键词的法规，返回 ([(id, 发布日期)], 续扫游标)
+
+    cursor 为开始位置（空表示从头开始），找到 limit 条后停止；扫描 search_like_max_scan 条
+    仍未找够时也停止，此时返回续扫游标，其余情况续扫游标为 None。
+    """
+    query = db.query(
+        Law.id, Law.publish_date, Law.title, LawBody.content, LawBody.file_content
+    ).outerjoin(LawBody, LawBody.law_id == Law.id)
+    if category:
+        query = query.filter(Law.category == category)
+
+    pattern = keyword.lower()
+    matches = []
+    budget = settings.search_like_max_scan
+    while True:
+        rows, cursor = keyset_page(query, min(LIKE_SCAN_BATCH, budget), cursor or None)
+        budget -= len(rows)
+        matches += [(row.id, row.publish_date) for row in rows if _row_matches(db, row, pattern)]
+        if limit is not None and len(matches) >= limit:
+            return matches[:limit], None
+        if cursor is None or budget <= 0:
+            return matches, cursor
+
+
+def _row_matches(db: Session, row, pattern: str) -> bool:
+    """标题、正文（HTML 原文）或附件全文中是否包含关键词（不区分大小写）"""
+    if pattern in (row.title or "").lower():
+        return True
+    return any(
+        pattern in (decode_body(db, data) or "").lower()
+        for data in (row.content, row.file_content)
+    )
+
+
+def _load_search_items(db: Session, law_ids: list[int]) -> list[LawSearchItem]:
+    """按给定顺序加载法规并转换为搜索结果条目"""
+    laws = {law.id: law for law in db.query(Law).filter(Law.id.in_(law_ids))}
+    return [LawSearchItem.model_validate(laws[law_id]) for law_id in law_ids if law_id in laws]
+
+
+@router.get("/timeline", response_model=TimelineResponse)
+async def get_timeline(
+    request: Request,
     year: Optional[int] = Query(None, description="年份筛选"),
     category: Optional[str] = Query(None, description="分类筛选"),
-    db: Session = Depends(get_db),
+    db=Depends(get_read_db),
 ):
-    """按时间线获取法规"""
-    query = db.query(Law)
+    """按时间线统计法规数量（按年、按月）
 
-    # 年份筛选
-    if year:
-        query = query.filter(Law.publish_date >= f"{year}-01-01").filter(
-            Law.publish_date <= f"{year}-12-31"
-        )
+    具体条目通过 /timeline/items 按月分页获取。
+    """
+    params = {"year": year, "category": category}
+    return await cached_read(
+        request, db, "timeline", params, lambda session: _build_timeline(session, year, category)
+    )
 
-    # 分类筛选
+
+def _build_timeline(db: Session, year: int | None, category: str | None) -> TimelineResponse:
+    """用 SQL 分组统计时间线"""
+    year_col = extract("year", Law.publish_date)
+    month_col = extract("month", Law.publish_date)
+
+    query = db.query(year_col, month_col, func.count(Law.id)).filter(Law.publish_date.isnot(None))
     if category:
         query = query.filter(Law.category == category)
+    rows = query.group_by(year_col, month_col).all()
+
+    # 年份列表不受年份筛选影响，供前端下拉框使用
+    year_counts: dict[int, int] = {}
+    for row_year, _, count in rows:
+        year_counts[int(row_year)] = year_counts.get(int(row_year), 0) + count
 
-    # 按发布日期降序
-    query = query.order_by(desc(Law.publish_date))
+    months = [
+        TimelineBucket(key=f"{int(row_year):04d}-{int(row_month):02d}", count=count)
+        for row_year, row_month, count in rows
+        if year is None or int(row_year) == year
+    ]
+    months.sort(key=lambda bucket: bucket.key, reverse=True)
+
+    return TimelineResponse(
+        years=[
+            TimelineBucket(key=str(y), count=c)
+            for y, c in sorted(year_counts.items(), reverse=True)
+        ],
+        months=months,
+        total=sum(bucket.count for bucket in months),
+    )
 
-    items = query.all()
 
-    # 按年月分组
-    timeline = {}
-    for item in items:
-        if item.publish_date:
-            year_month = item.publish_date.strftime("%Y-%m")
-            if year_month not in timeline:
-                timeline[year_month] = []
-            timeline[year_month].append(LawResponse.model_validate(item))
+@router.get("/timeline/items", response_model=LawListResponse)
+async def get_timeline_items(
+    request: Request,
+    month: str = Query(..., pattern=r"^\d{4}-\d{2}$", description="月份，格式 YYYY-MM"),
+    category: str | None = Query(None, description="分类筛选"),
+    page: int = Query(1, ge=1, description="页码"),
+    page_size: int = Query(50, ge=1, le=200, description="每页数量"),
+    db=Depends(get_read_db),
+):
+    """获取时间线某个月份的法规（分页）"""
+    year_num, month_num = int(month[:4]), int(month[5:])
+    if not 1 <= month_num <= 12:
+        raise HTTPException(status_code=422, detail="无效的月份")
 
-    return {"timeline": timeline, "years": sorted(set(k[:4] for k in timeline.keys()), reverse=True)}
+    start = date(year_num, month_num, 1)
+    end = date(year_num + 1, 1, 1) if month_num == 12 else date(year_num, month_num + 1, 1)
+
+    def build(session: Session) -> LawListResponse:
+        query = session.query(Law).filter(Law.publish_date >= start, Law.publish_date < end)
+        if category:
+            query = query.filter(Law.category == category)
+
+        total = query.count()
+        total_pages = math.ceil(total / page_size) if total > 0 else 1
+        items = (
+            query.order_by(desc(Law.publish_date), desc(Law.id))
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+            .all()
+        )
+        return LawListResponse(
+            items=[LawSummary.model_validate(item) for item in items],
+            total=total,
+            page=page,
+            page_size=page_size,
+            total_pages=total_pages,
+        )
+
+    params = {"month": month, "category": category, "page": page, "page_size": page_size}
+    return await cached_read(request, db, "timeline_items", params, build)
 
 
 @router.get("/{law_id}", response_model=LawResponse)
-def get_law_detail(law_id: int, db: Session = Depends(get_db)):
+async def get_law_detail(law_id: int, request: Request, db=Depends(get_read_db)):
     """获取法规详情"""
-    law = db.query(Law).filter(Law.id == law_id).first()
-    if not law:
-        raise HTTPException(status_code=404, detail="法规不存在")
-    return LawResponse.model_validate(law)
+
+    def build(session: Session) -> LawResponse:
+        law = session.query(Law).options(joinedload(Law.body)).filter(Law.id == law_id).first()
+        if not law:
+            raise HTTPException(status_code=404, detail="法规不存在")
+        return LawResponse.model_validate(law)
+
+    return await cached_read(request, db, "law_detail", {"law_id": law_id}, build)
 
 
-@router.get("/{law_id}/download")
-def download_attachment(law_id: int, db: Session = Depends(get_db)):
-    """下载法规附件"""
+@router.api_route("/{law_id}/download", methods=["GET", "HEAD"])
+def download_attachment(
+    law_id: int,
+    request: Request,
+    inline: bool = Query(False, description="在浏览器中直接打开（如 PDF）而不是下载"),
+    db: Session = Depends(get_db),
+):
+    """下载法规附件（支持 Range 分段下载与条件请求）"""
     law = db.query(Law).filter(Law.id == law_id).first()
     if not law:
         raise HTTPException(status_code=404, detail="法规不存在")
@@ -176,109 +463,70 @@ def download_attachment(law_id: int, db: Session = Depends(get_db)):
 
     # 构建完整文件路径
     file_path = Path(settings.attachment_dir) / law.file_path
-    if not file_path.exists():
+    if not file_path.is_file():
         raise HTTPException(status_code=404, detail="附件文件不存在")
 
-    # 获取文件名
-    filename = law.file_path.split("/")[-1] if law.file_path else "attachment"
-    # 中文文件名编码
-    encoded_filename = quote(filename)
-
-    return FileResponse(
-        path=str(file_path),
-        filename=filename,
-        media_type="application/octet-stream",
-        headers={
-            "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
-        }
-    )
+    # 获取文件名（内容寻址存储中的文件名是摘要，优先使用原始链接中的文件名）
+    filename = Path(urlparse(law.file_url).path).name if law.file_url else ""
+    if not filename or Path(filename).suffix.lower() != file_path.suffix.lower():
+        filename = file_path.name
+
+    return attachment_response(request, file_path, filename, inline=inline)
 
 
 # 爬取相关 API
 crawl_router = APIRouter(prefix="/api/crawl", tags=["crawl"])
 
-# 全局爬取状态
-_crawl_status = {
-    "is_running": False,
-    "last_crawl_time": None,
-    "last_crawl_status": None,
-    "last_crawl_count": None,
-}
 
+@crawl_router.get("/status", response_model=CrawlStatusResponse)
+async def get_crawl_status(db=Depends(get_read_db)):
+    """获取爬取状态"""
+    return await run_read(db, _crawl_status)
 
-def get_crawl_status_from_db(db: Session) -> dict:
-    """从数据库获取爬取状态"""
+
+def _crawl_status(db: Session) -> CrawlStatusResponse:
+    active_job = get_active_crawl_job(db)
     last_log = (
         db.query(CrawlLog)
         .order_by(desc(CrawlLog.created_at))
         .first()
     )
-    if last_log:
-        _crawl_status["last_crawl_time"] = last_log.created_at
-        _crawl_status["last_crawl_status"] = last_log.status
-        _crawl_status["last_crawl_count"] = last_log.count
-    return _crawl_status
-
-
-@crawl_router.get("/status", response_model=CrawlStatusResponse)
-def get_crawl_status(db: Session = Depends(get_db)):
-    """获取爬取状态"""
-    status = get_crawl_status_from_db(db)
     return CrawlStatusResponse(
-        is_running=status["is_running"],
-        last_crawl_time=status["last_crawl_time"],
-        last_crawl_status=status["last_crawl_status"],
-        last_crawl_count=status["last_crawl_count"],
+        is_running=active_job is not None,
+        task_id=active_job.id if active_job else None,
+        last_crawl_time=last_log.created_at if last_log else None,
+        last_crawl_status=last_log.status if last_log else None,
+        last_crawl_count=last_log.count if last_log else None,
     )
 
 
+@crawl_router.get("/status/{task_id}", response_model=CrawlJobResponse)
+async def get_crawl_job_status(task_id: str, db=Depends(get_read_db)):
+    """获取爬取任务进度"""
+    job = await run_read(db, lambda session: get_crawl_job(session, task_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return job
+
+
 @crawl_router.post("/start", response_model=CrawlStartResponse)
 def start_crawl(
     category: Optional[str] = Query(None, description="指定分类，不传则爬取全部"),
+    incremental: bool = Query(False, description="增量爬取：跳过已入库的条目"),
     db: Session = Depends(get_db),
 ):
-    """手动触发爬取"""
-    global _crawl_status
-
-    if _crawl_status["is_running"]:
-        raise HTTPException(status_code=400, detail="爬取任务正在进行中")
+    """手动触发爬取（后台执行，通过 /api/crawl/status/{task_id} 查询进度）"""
+    from app.services.jobs import CrawlAlreadyRunningError, submit_crawl_job
 
-    # 这里只是触发，实际爬取在后台执行
-    from app.services.crawler import CrawlerService
-
-    _crawl_status["is_running"] = True
+    if category and category not in settings.categories:
+        raise HTTPException(status_code=400, detail=f"未知的分类: {category}")
 
     try:
-        crawler = CrawlerService(db)
-        if category:
-            count = crawler.crawl_category(category)
-        else:
-            count = crawler.crawl_all()
-
-        _crawl_status["is_running"] = False
-        _crawl_status["last_crawl_time"] = datetime.utcnow()
-        _crawl_status["last_crawl_status"] = "success"
-        _crawl_status["last_crawl_count"] = count
-
-        return CrawlStartResponse(
-            message="爬取完成",
-            task_id=None,
-        )
-    except Exception as e:
-        _crawl_status["is_running"] = False
-        _crawl_status["last_crawl_time"] = datetime.utcnow()
-        _crawl_status["last_crawl_status"] = "failed"
-        _crawl_status["last_crawl_count"] = 0
+        job = submit_crawl_job(db, category, incremental=incremental)
+    except CrawlAlreadyRunningError as e:
+        raise HTTPException(status_code=400, detail="爬取任务正在进行中") from e
 
-        # 记录错误日志
-        create_crawl_log(db, {
-            "category": category or "全部",
-            "status": "failed",
-            "count": 0,
-            "error_message": str(e),
-        })
-
-        raise HTTPException(status_code=500, detail=f"爬取失败: {str(e)}")
+    return CrawlStartResponse(message="爬取任务已提交", task_id=job.id)
 
 
 # 分类 API
@@ -286,11 +534,11 @@ category_router = APIRouter(prefix="/api/categories", tags=["categories"])
 
 
 @category_router.get("", response_model=list[CategoryResponse])
-def get_categories():
+async def get_categories(request: Request):
     """获取分类列表"""
     from app.config import settings
 
-    return [
+    return cached_response(request, None, "categories", {}, lambda: [
         CategoryResponse(name=name, code=code)
         for name, code in settings.categories.items()
-    ]
+    ])
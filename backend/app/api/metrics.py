@@ -0,0 +1,50 @@
+"""接口指标中间件与 /metrics 路由"""
+import time
+
+from fastapi import APIRouter, Response
+
+from app.services import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus 文本格式的指标"""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+class MetricsMiddleware:
+    """按路由模板（如 /api/laws/{law_id}）统计请求数和耗时
+
+    直接实现 ASGI 接口而不是继承 BaseHTTPMiddleware，不会缓冲流式响应（如附件下载）。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # 路由匹配后 scope 中带有 route；未匹配的请求归为一类，避免路径作为标签值无限增长
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            metrics.HTTP_REQUESTS.labels(scope["method"], path, str(status)).inc()
+            elapsed = time.perf_counter() - started
+            metrics.HTTP_LATENCY.labels(scope["method"], path).observe(elapsed)
+
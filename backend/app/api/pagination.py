@@ -0,0 +1,81 @@
+"""游标（keyset）分页
+
+按 (publish_date, id) 翻页，借助 idx_law_publish_date 直接定位到上一页末尾，
+不再需要 OFFSET 跳过前面的行，也不必每次都 COUNT 全表。
+
+发布日期为空的记录统一排在最后：先翻完有日期的部分，再按 id 翻无日期的部分，
+两段都能走索引，且与数据库对 NULL 的默认排序方式无关。
+"""
+import base64
+import json
+from collections.abc import Callable
+from datetime import date
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+from app.models.law import Law
+
+
+def encode_cursor(publish_date: date | None, law_id: int, descending: bool) -> str:
+    """生成不透明的游标字符串"""
+    payload = [publish_date.isoformat() if publish_date else None, law_id, int(descending)]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[date | None, int, bool]:
+    """解析游标，格式错误时返回 400"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date_str, law_id, descending = json.loads(raw)
+        publish_date = date.fromisoformat(date_str) if date_str else None
+        return publish_date, int(law_id), bool(descending)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="无效的分页游标") from e
+
+
+def keyset_page(
+    query: Query,
+    page_size: int,
+    cursor: str | None,
+    descending: bool = True,
+    law_of: Callable = lambda row: row,
+) -> tuple[list, str | None]:
+    """按 (publish_date, id) 取一页，返回 (当前页行, 下一页游标)
+
+    cursor 为空表示第一页；law_of 用于从查询结果行中取出 Law 对象。
+    """
+    after = decode_cursor(cursor) if cursor else None
+    if after and after[2] != descending:
+        raise HTTPException(status_code=400, detail="分页游标与排序方向不一致")
+
+    def ordered(column):
+        return column.desc() if descending else column.asc()
+
+    rows = []
+    limit = page_size + 1
+
+    # 第一段：有发布日期的记录
+    if after is None or after[0] is not None:
+        dated = query.filter(Law.publish_date.isnot(None))
+        if after:
+            key = tuple_(Law.publish_date, Law.id)
+            bound = (after[0], after[1])
+            dated = dated.filter(key < bound if descending else key > bound)
+        rows = dated.order_by(ordered(Law.publish_date), ordered(Law.id)).limit(limit).all()
+
+    # 第二段：发布日期为空的记录
+    if len(rows) < limit:
+        undated = query.filter(Law.publish_date.is_(None))
+        if after and after[0] is None:
+            undated = undated.filter(Law.id < after[1] if descending else Law.id > after[1])
+        rows += undated.order_by(ordered(Law.id)).limit(limit - len(rows)).all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = law_of(rows[-1])
+        next_cursor = encode_cursor(last.publish_date, last.id, descending)
+    return rows, next_cursor
@@ -0,0 +1,56 @@
+"""Server-Timing 与按需采样分析中间件"""
+import hmac
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import settings
+from app.services import profiling
+
+PROFILE_TOKEN_HEADER = "x-profile-token"
+
+
+def _profile_requested(scope) -> bool:
+    """请求头中的令牌与 profiler_token 一致时才采样（未配置令牌时始终不采样）"""
+    if not settings.profiler_token:
+        return False
+    token = Headers(scope=scope).get(PROFILE_TOKEN_HEADER, "")
+    return hmac.compare_digest(token.encode("utf-8"), settings.profiler_token.encode("utf-8"))
+
+
+class ProfilingMiddleware:
+    """给响应加上 Server-Timing 头，并按需对单个请求采样分析
+
+    采样结果的文件名通过 X-Profile-File 响应头返回，文件保存在 profile_dir 下。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profiler = None
+        if _profile_requested(scope):
+            profiler = profiling.RequestProfiler(scope["method"], scope["path"])
+            if not profiler.start():
+                profiler = None
+        timing, token = profiling.start_timing() if settings.server_timing else (None, None)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if timing is not None:
+                    headers.append("Server-Timing", timing.header())
+                if profiler is not None:
+                    headers.append("X-Profile-File", profiler.path.name)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            if token is not None:
+                profiling.stop_timing(token)
+            if profiler is not None:
+                profiler.stop()
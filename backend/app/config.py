@@ -17,18 +17,73 @@ class Settings(BaseSettings):
 
     # 数据库（使用绝对路径）
     database_url: str = f"sqlite:///{DATA_DIR / 'laws.db'}"
+    # 数据库配置档：auto（按 database_url 判断）/ sqlite / postgresql
+    database_profile: str = "auto"
+
+    # SQLite 配置档（每个连接建立时通过 PRAGMA 设置）
+    sqlite_journal_mode: str = "wal"  # WAL 模式下读写互不阻塞
+    sqlite_synchronous: str = "normal"  # WAL 下 NORMAL 即可保证一致性
+    sqlite_cache_size_mb: int = 64  # 每个连接的页缓存
+    sqlite_mmap_size_mb: int = 256  # 内存映射读取的大小，0 表示不使用
+    sqlite_busy_timeout_ms: int = 5000  # 遇到写锁时的等待时间
+
+    # PostgreSQL 配置档（连接池）
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30  # 等待空闲连接的秒数
+    db_pool_recycle: int = 1800  # 连接最长使用秒数，避免被服务端或中间件断开
+
+    # 读接口使用异步会话（实验性，需安装 sqlalchemy[asyncio] 以及 aiosqlite 或 asyncpg），
+    # 关闭时读接口的查询放到线程池执行；定时任务和爬虫始终使用同步会话
+    database_async: bool = False
 
     # 爬虫配置
     crawler_base_url: str = "https://www.weain.mil.cn"
-    crawler_request_delay: float = 1.5  # 请求间隔（秒）
+    crawler_request_delay: float = 1.5  # 重试退避基数（秒）
     crawler_max_retries: int = 3
     crawler_timeout: int = 30
 
+    # 增量爬取
+    crawler_incremental_stop_after: int = 20  # 连续遇到多少条已入库条目后停止翻页
+    crawler_full_resync_days: int = 7  # 定时任务每隔多少天做一次全量同步
+
     # 附件存储（使用绝对路径）
     attachment_dir: Path = DATA_DIR / "attachments"
 
+    # 附件下载由前置 Nginx 发送时的 internal location 前缀（如 /protected-attachments/），
+    # 该 location 需指向 attachment_dir；为空时由应用自身发送文件
+    download_accel_redirect_prefix: str = ""
+
+    # 附件文本缓存（按文件摘要 + 解析器版本，独立的 SQLite 文件，解析进程也可直接读写）
+    parse_cache_path: Path = DATA_DIR / "parse_cache.db"
+    parse_cache_max_mb: int = 512  # 压缩后总大小上限，超出时淘汰最久未使用的条目；0 表示不缓存
+
+    # 法规正文和附件全文压缩后存放在 law_bodies 表中
+    body_compression: str = "auto"  # auto（安装了 zstandard 时用 zstd，否则 zlib）/ zstd / zlib
+    body_compression_level: int = 9
+
+    # 不支持全文索引时的 LIKE 兜底搜索：每次请求最多解压匹配的法规数（按发布日期从新到旧）
+    search_like_max_scan: int = 2000
+
+    # 读接口缓存
+    cache_backend: str = "memory"  # memory / redis / none
+    cache_redis_url: str = "redis://localhost:6379/0"
+    cache_max_entries: int = 512  # 进程内缓存最大条目数
+    cache_ttl_seconds: int = 300
+    cache_max_body_bytes: int = 1024 * 1024  # 超过此大小的响应不缓存（仍支持 ETag）
+
+    # Prometheus 指标（需安装 prometheus_client；多 worker 部署时设置 PROMETHEUS_MULTIPROC_DIR）
+    metrics_enabled: bool = True
+
+    # 性能分析（默认全部关闭，关闭时没有额外开销）
+    slow_query_ms: float = 0  # 语句执行超过该毫秒数时连同执行计划写入日志，0 表示关闭
+    server_timing: bool = False  # 响应附带 Server-Timing 头（db / serialize / total）
+    profiler_token: str = ""  # 非空时，带 X-Profile-Token: <令牌> 请求头的请求会被采样分析
+    profile_dir: Path = DATA_DIR / "profiles"  # 采样结果保存目录
+
     # 定时任务
     scheduler_interval_hours: int = 48  # 每48小时执行一次
+    crawl_lock_ttl_seconds: int = 600  # 爬取锁租约时长，运行期间每 1/3 时长续期一次
 
     # 分类映射（路径）
     categories: dict = {
@@ -50,7 +105,33 @@ class Settings(BaseSettings):
     # API 配置
     crawler_api_url: str = "https://www.weain.mil.cn/api/regulations/search"
     crawler_page_size: int = 20  # API 每页数量
-    crawler_detail_delay: float = 2.0  # 详情页请求间隔
+
+    # 并发与限速
+    crawler_rate_limit: float = 1.0  # 每个主机每秒请求数（令牌桶速率）
+    crawler_rate_burst: int = 3  # 令牌桶容量（允许的突发请求数）
+    crawler_detail_workers: int = 4  # 详情页抓取线程数
+    crawler_attachment_workers: int = 2  # 附件下载解析线程数
+    crawler_write_batch_size: int = 20  # 每批写入数据库的条数
+
+    # 附件下载
+    crawler_download_chunk_size: int = 256 * 1024  # 下载时每次读取的字节数
+    crawler_max_attachment_bytes: int = 200 * 1024 * 1024  # 单个附件大小上限，超过时中止下载
+
+    # 附件解析进程池
+    crawler_parse_workers: int = 2  # 解析进程数，0 表示在爬虫进程内直接解析
+    crawler_parse_timeout: float = 120.0  # 单个文件（或 PDF 页段）的解析超时（秒）
+    crawler_parse_memory_mb: int = 1024  # 解析进程内存上限（MB），0 表示不限制
+    crawler_pdf_pages_per_task: int = 20  # PDF 超过该页数时按页段并行解析
+    crawler_archive_max_bytes: int = 256 * 1024 * 1024  # 单个附件（含嵌套压缩包）解压后总大小上限
+    crawler_archive_max_members: int = 2000  # 单个附件中压缩包成员总数上限
+    crawler_archive_max_depth: int = 2  # 压缩包最大嵌套层数
+    crawler_archive_spool_bytes: int = 8 * 1024 * 1024  # 压缩包成员超过此大小时暂存到磁盘
+
+    # HTTP 后端
+    crawler_http_backend: str = "threads"  # threads（requests）/ async（httpx）
+    crawler_http2: bool = True  # async 后端在安装了 h2 时启用 HTTP/2
+    crawler_max_connections: int = 10  # async 后端连接池大小
+    crawler_max_connections_per_host: int = 4  # async 后端每个主机的并发连接数
 
     class Config:
         env_file = ".env"
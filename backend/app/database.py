@@ -1,16 +1,124 @@
-"""数据库连接配置"""
-from sqlalchemy import create_engine
+"""数据库连接配置
+
+按配置档创建引擎：
+
+- sqlite：每个连接设置 WAL、synchronous、页缓存、mmap 和 busy_timeout，
+  读请求不再被爬虫写入阻塞
+- postgresql：带健康检查和回收的连接池，全文检索使用 tsvector（见 app.services.search）
+
+开启 database_async 时，读接口另用一个异步引擎（aiosqlite / asyncpg），
+查询在事件循环中完成，不再占用线程池；定时任务和爬虫仍使用同步的 SessionLocal。
+"""
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 
 from app.config import settings
+from app.services.metrics import instrument_db_queries
+from app.services.profiling import install_query_hooks, profile_call
+
+PROFILES = ("sqlite", "postgresql")
+
+# 各配置档的异步驱动
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def database_profile(url: str) -> str:
+    """根据 database_profile 配置和连接串确定配置档"""
+    dialect = make_url(url).get_backend_name()
+    profile = dialect if settings.database_profile == "auto" else settings.database_profile
+    if profile not in PROFILES:
+        raise ValueError(f"不支持的数据库配置档: {profile}")
+    if profile != dialect:
+        raise ValueError(f"数据库配置档 {profile} 与连接串类型 {dialect} 不一致")
+    return profile
+
+
+def sqlite_pragmas() -> dict[str, object]:
+    """SQLite 配置档在每个连接上执行的 PRAGMA"""
+    return {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "cache_size": -settings.sqlite_cache_size_mb * 1024,  # 负数表示 KiB
+        "mmap_size": settings.sqlite_mmap_size_mb * 1024 * 1024,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "temp_store": "memory",
+    }
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(url: str | None = None, **kwargs) -> Engine:
+    """按配置档创建引擎，kwargs 覆盖默认参数（如测试用的 poolclass）"""
+    url = url or settings.database_url
+    kwargs.setdefault("echo", settings.debug)
+
+    if database_profile(url) == "sqlite":
+        kwargs.setdefault("connect_args", {
+            "check_same_thread": False,
+            "timeout": settings.sqlite_busy_timeout_ms / 1000,
+        })
+        sqlite_engine = create_engine(url, **kwargs)
+        event.listen(sqlite_engine, "connect", _apply_sqlite_pragmas)
+        return sqlite_engine
+
+    kwargs.setdefault("pool_size", settings.db_pool_size)
+    kwargs.setdefault("max_overflow", settings.db_max_overflow)
+    kwargs.setdefault("pool_timeout", settings.db_pool_timeout)
+    kwargs.setdefault("pool_recycle", settings.db_pool_recycle)
+    kwargs.setdefault("pool_pre_ping", True)
+    return create_engine(url, **kwargs)
+
+
+def async_database_url(url: str) -> str:
+    """把同步连接串换成对应的异步驱动（如 sqlite:// -> sqlite+aiosqlite://）"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS[database_profile(url)]
+    parsed = parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}")
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str | None = None, **kwargs):
+    """按配置档创建异步引擎，参数与 create_db_engine 一致"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = url or settings.database_url
+    kwargs.setdefault("echo", settings.debug)
+
+    if database_profile(url) == "sqlite":
+        kwargs.setdefault("connect_args", {"timeout": settings.sqlite_busy_timeout_ms / 1000})
+        async_engine = create_async_engine(async_database_url(url), **kwargs)
+        event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+        return async_engine
+
+    kwargs.setdefault("pool_size", settings.db_pool_size)
+    kwargs.setdefault("max_overflow", settings.db_max_overflow)
+    kwargs.setdefault("pool_timeout", settings.db_pool_timeout)
+    kwargs.setdefault("pool_recycle", settings.db_pool_recycle)
+    kwargs.setdefault("pool_pre_ping", True)
+    return create_async_engine(async_database_url(url), **kwargs)
+
+
+# 统计语句执行耗时（对所有引擎生效）
+instrument_db_queries()
+# 慢查询日志和 Server-Timing 需要语句计时，都关闭时不注册事件
+if settings.slow_query_ms > 0 or settings.server_timing:
+    install_query_hooks()
 
 # 创建数据库引擎
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False},  # SQLite 需要
-    echo=settings.debug,
-)
+engine = create_db_engine()
 
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -28,8 +136,109 @@ def get_db():
         db.close()
 
 
+# 异步引擎和会话工厂在第一次使用时创建（未开启 database_async 时不需要安装异步驱动）
+_async_engine = None
+_async_session_factory = None
+
+
+def async_session_factory():
+    """异步会话工厂"""
+    global _async_engine, _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_engine = create_async_db_engine()
+        _async_session_factory = async_sessionmaker(
+            bind=_async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory
+
+
+async def get_async_db():
+    """获取异步数据库会话的依赖"""
+    async with async_session_factory()() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """关闭异步引擎的连接池"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = _async_session_factory = None
+
+
+# 读接口使用的会话依赖：开启 database_async 时为 AsyncSession，否则为同步 Session
+get_read_db = get_async_db if settings.database_async else get_db
+
+
+async def run_read(db, fn: Callable[[Session], Any]) -> Any:
+    """在读会话上执行同步查询函数 fn(session)
+
+    AsyncSession 通过 run_sync 执行：查询代码不变，I/O 由异步驱动在事件循环中完成；
+    同步 Session 则放到线程池执行，避免阻塞事件循环（被采样分析的请求在工作线程上采样）。
+    """
+    if hasattr(db, "run_sync"):
+        return await db.run_sync(fn)
+    return await run_in_threadpool(profile_call, fn, db)
+
+
 def init_db():
     """初始化数据库，创建所有表"""
-    from app.models import Law, CrawlLog  # noqa: F401
+    from app.models import (  # noqa: F401
+        Attachment,
+        BodyDictionary,
+        CrawlJob,
+        CrawlLog,
+        DataVersion,
+        JobLock,
+        Law,
+        LawBody,
+    )
+    from app.models.law import backfill_summaries, load_body_dictionaries
+    from app.services.body_store import migrate_law_bodies
+    from app.services.search import ensure_search_index
 
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    create_missing_indexes(engine)
+
+    # 旧版内联在 laws 表中的正文须先迁移，重建全文索引时才读得到；
+    # 启动时只迁移数据，删除旧列由 scripts/compress_law_bodies.py 显式执行
+    with SessionLocal() as db:
+        load_body_dictionaries(db)
+        migrate_law_bodies(db)
+
+    ensure_search_index(engine)
+
+    with SessionLocal() as db:
+        backfill_summaries(db)
+
+
+def add_missing_columns(bind) -> list[str]:
+    """为已存在的表补充模型中新增的列
+
+    create_all 只会创建缺失的表，不会修改已有表结构。新增的列均为可空列，
+    这里用 ALTER TABLE ADD COLUMN 补齐，返回新增的 "表.列" 列表。
+    """
+    inspector = inspect(bind)
+    added = []
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def create_missing_indexes(bind) -> None:
+    """为已存在的表补建模型中新增的索引（create_all 不会处理已有表）"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
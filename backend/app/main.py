@@ -4,10 +4,15 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.laws import category_router, crawl_router, router
+from app.api.metrics import MetricsMiddleware
+from app.api.metrics import router as metrics_router
+from app.api.profiling import ProfilingMiddleware
 from app.config import settings
-from app.database import init_db
-from app.api.laws import router, crawl_router, category_router
+from app.database import dispose_async_engine, init_db
 from app.scheduler.tasks import start_scheduler, stop_scheduler
+from app.services import metrics
+from app.services.attachment_parser import attachment_parser
 
 
 @asynccontextmanager
@@ -19,6 +24,9 @@ async def lifespan(app: FastAPI):
     yield
     # 关闭时
     stop_scheduler()
+    attachment_parser.shutdown()
+    await dispose_async_engine()
+    metrics.mark_process_dead()
 
 
 app = FastAPI(
@@ -35,11 +43,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if metrics.enabled:
+    app.add_middleware(MetricsMiddleware)
+if settings.server_timing or settings.profiler_token:
+    app.add_middleware(ProfilingMiddleware)
 
 # 注册路由
 app.include_router(router)
 app.include_router(crawl_router)
 app.include_router(category_router)
+if metrics.enabled:
+    app.include_router(metrics_router)
 
 
 @app.get("/")
@@ -1,3 +1,11 @@
-from .law import Law, CrawlLog
+from .attachment import Attachment
+from .job import CrawlJob
+from .law import BodyDictionary, CrawlLog, Law, LawBody
+from .state import DataVersion, JobLock
+
+__all__ = [
+    "Law", "LawBody", "BodyDictionary", "CrawlLog",
+    "Attachment", "CrawlJob", "DataVersion", "JobLock",
+]
+
 
-__all__ = ["Law", "CrawlLog"]
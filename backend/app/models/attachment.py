@@ -0,0 +1,72 @@
+"""附件清单数据模型"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, update
+from sqlalchemy.orm import Session
+
+from app.database import Base
+
+# 清单中可写入的字段
+MANIFEST_FIELDS = ("file_url", "digest", "file_path", "size", "etag", "last_modified", "fetched_at")
+
+
+class Attachment(Base):
+    """附件清单表：记录每个附件链接对应的内容摘要和缓存校验信息
+
+    重新爬取时据此发送条件请求（If-None-Match / If-Modified-Since），
+    内容未变化时跳过下载和解析。
+    """
+
+    __tablename__ = "attachments"
+
+    file_url = Column(String(500), primary_key=True, comment="附件下载链接")
+    digest = Column(String(64), nullable=False, comment="内容 SHA-256")
+    file_path = Column(String(500), nullable=False, comment="本地存储路径")
+    size = Column(Integer, nullable=True, comment="文件大小（字节）")
+    etag = Column(String(200), nullable=True, comment="响应头 ETag")
+    last_modified = Column(String(100), nullable=True, comment="响应头 Last-Modified")
+    fetched_at = Column(DateTime, default=datetime.utcnow, comment="最后请求时间")
+
+    __table_args__ = (
+        Index("idx_attachment_digest", "digest"),
+    )
+
+    def __repr__(self):
+        return f"<Attachment(file_url='{self.file_url}', digest='{self.digest[:12]}')>"
+
+
+def get_attachment_manifest(db: Session) -> dict[str, dict]:
+    """加载全部附件清单：file_url -> 字段字典"""
+    columns = [getattr(Attachment, name) for name in MANIFEST_FIELDS]
+    return {row.file_url: dict(row._mapping) for row in db.query(*columns)}
+
+
+def upsert_attachments(db: Session, entries: list[dict]) -> None:
+    """批量写入附件清单（不提交事务）"""
+    rows = list({e["file_url"]: {k: e.get(k) for k in MANIFEST_FIELDS} for e in entries}.values())
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        urls = [r["file_url"] for r in rows]
+        existing = {
+            row[0] for row in db.query(Attachment.file_url).filter(Attachment.file_url.in_(urls))
+        }
+
+        db.add_all(Attachment(**r) for r in rows if r["file_url"] not in existing)
+        updates = [r for r in rows if r["file_url"] in existing]
+        if updates:
+            db.execute(update(Attachment), updates)
+        return
+
+    stmt = dialect_insert(Attachment)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Attachment.file_url],
+        set_={name: stmt.excluded[name] for name in MANIFEST_FIELDS if name != "file_url"},
+    )
+    db.execute(stmt, rows)
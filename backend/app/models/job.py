@@ -0,0 +1,81 @@
+"""后台任务数据模型"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models.state import JobLock
+
+# 任务状态
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_SUCCESS = "success"
+JOB_FAILED = "failed"
+
+ACTIVE_STATUSES = (JOB_PENDING, JOB_RUNNING)
+
+# 爬取任务的互斥锁名称（锁的持有者为任务 ID）
+CRAWL_LOCK = "crawl"
+
+
+class CrawlJob(Base):
+    """爬取任务表
+
+    进度保存在数据库中，多个 uvicorn worker 查询同一任务时结果一致。
+    """
+
+    __tablename__ = "crawl_jobs"
+
+    id = Column(String(32), primary_key=True, comment="任务 ID")
+    category = Column(String(50), nullable=False, comment="爬取的分类，全部分类为“全部”")
+    mode = Column(String(20), nullable=False, comment="爬取模式：full/incremental")
+    status = Column(String(20), nullable=False, default=JOB_PENDING, comment="状态")
+    pages_total = Column(Integer, default=0, comment="列表总页数")
+    pages_done = Column(Integer, default=0, comment="已处理页数")
+    items_new = Column(Integer, default=0, comment="新增条数")
+    items_updated = Column(Integer, default=0, comment="更新条数")
+    items_failed = Column(Integer, default=0, comment="失败条数")
+    items_skipped = Column(Integer, default=0, comment="跳过的已知条数")
+    throughput = Column(Float, default=0.0, comment="写入速率（条/秒）")
+    profile_misses = Column(Integer, default=0, comment="站点配置未命中、退回通用提取的页数")
+    extraction = Column(Text, nullable=True, comment="详情页提取命中的配置和选择器统计（JSON）")
+    error_message = Column(Text, nullable=True, comment="错误信息")
+    created_at = Column(DateTime, default=datetime.utcnow, comment="提交时间")
+    started_at = Column(DateTime, nullable=True, comment="开始时间")
+    finished_at = Column(DateTime, nullable=True, comment="结束时间")
+    updated_at = Column(DateTime, default=datetime.utcnow, comment="最后更新时间")
+
+    __table_args__ = (
+        Index("idx_crawl_job_status", "status"),
+    )
+
+    def __repr__(self):
+        return f"<CrawlJob(id='{self.id}', category='{self.category}', status='{self.status}')>"
+
+
+def get_crawl_job(db: Session, job_id: str) -> CrawlJob | None:
+    """按任务 ID 获取任务"""
+    return db.get(CrawlJob, job_id)
+
+
+def get_active_crawl_job(db: Session) -> CrawlJob | None:
+    """获取当前排队或运行中的任务
+
+    只返回仍持有未过期爬取锁的任务：进程异常退出后任务记录停留在 running，
+    租约到期即不再视为运行中（下一个任务接管锁时再标记为失败）。
+    """
+    return (
+        db.query(CrawlJob)
+        .join(JobLock, (JobLock.name == CRAWL_LOCK) & (JobLock.owner == CrawlJob.id))
+        .filter(CrawlJob.status.in_(ACTIVE_STATUSES), JobLock.expires_at >= datetime.utcnow())
+        .order_by(CrawlJob.created_at.desc())
+        .first()
+    )
+
+
+def update_crawl_job(db: Session, job_id: str, values: dict) -> None:
+    """更新任务字段并提交"""
+    values = {**values, "updated_at": datetime.utcnow()}
+    db.query(CrawlJob).filter(CrawlJob.id == job_id).update(values, synchronize_session=False)
+    db.commit()
@@ -1,10 +1,33 @@
 """法规数据模型"""
-from datetime import date, datetime
+from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String, Text, Date, Index
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    insert,
+    or_,
+    update,
+)
+from sqlalchemy.orm import Session, object_session, relationship, selectinload
 
 from app.database import Base
+from app.models.state import bump_data_version
+from app.services.body_codec import UnknownDictionaryError, body_codec
+
+# 附件处理状态（无附件时为空）
+ATTACHMENT_OK = "ok"
+ATTACHMENT_FAILED = "failed"
+
+# 压缩后存放在 law_bodies 表中的大字段
+BODY_FIELDS = ("content", "file_content")
 
 
 class Law(Base):
@@ -16,11 +39,13 @@ class Law(Base):
     title = Column(String(500), nullable=False, comment="法规标题")
     category = Column(String(50), nullable=False, comment="分类")
     publish_date = Column(Date, nullable=True, comment="发布日期")
-    content = Column(Text, nullable=True, comment="法规正文内容（HTML）")
     source_url = Column(String(500), nullable=False, comment="原文链接")
     file_url = Column(String(500), nullable=True, comment="附件下载链接")
     file_path = Column(String(500), nullable=True, comment="本地附件存储路径")
-    file_content = Column(Text, nullable=True, comment="附件解析后的文本内容")
+    summary = Column(String(300), nullable=True, comment="正文摘要（列表展示用）")
+    attachment_status = Column(
+        String(20), nullable=True, comment="附件处理状态：ok/failed（failed 的条目会被重新爬取）"
+    )
     is_internal = Column(Integer, default=0, comment="是否为内部法规")
     created_at = Column(DateTime, default=datetime.utcnow, comment="入库时间")
     updated_at = Column(
@@ -28,16 +53,116 @@ class Law(Base):
     )
     hash = Column(String(64), nullable=True, comment="内容哈希（用于增量更新）")
 
+    # 正文与附件文本体积大，压缩后单独存放，访问 content / file_content 时才加载并解压
+    body = relationship("LawBody", uselist=False, cascade="all, delete-orphan")
+
     __table_args__ = (
         Index("idx_law_category", "category"),
         Index("idx_law_publish_date", "publish_date"),
+        Index("idx_law_category_publish_date", "category", "publish_date"),
         Index("idx_law_hash", "hash"),
     )
 
+    @property
+    def has_attachment(self) -> bool:
+        """是否有附件"""
+        return bool(self.file_url or self.file_path)
+
+    @property
+    def content(self) -> str | None:
+        """法规正文内容（HTML）"""
+        return self._body_text("content")
+
+    @content.setter
+    def content(self, value: str | None) -> None:
+        self._set_body_text("content", value)
+
+    @property
+    def file_content(self) -> str | None:
+        """附件解析后的文本内容"""
+        return self._body_text("file_content")
+
+    @file_content.setter
+    def file_content(self, value: str | None) -> None:
+        self._set_body_text("file_content", value)
+
+    def _body_text(self, field: str) -> str | None:
+        if self.body is None:
+            return None
+        return decode_body(object_session(self), getattr(self.body, field))
+
+    def _set_body_text(self, field: str, value: str | None) -> None:
+        if self.body is None:
+            self.body = LawBody()
+        for key, encoded in encode_body({field: value}).items():
+            setattr(self.body, key, encoded)
+
     def __repr__(self):
         return f"<Law(id={self.id}, title='{self.title}', category='{self.category}')>"
 
 
+class LawBody(Base):
+    """法规正文表：正文 HTML 和附件全文压缩后单独存放（格式见 app.services.body_codec）
+
+    主表只保留列表、筛选和检索需要的字段，扫描、计数和备份都不再读写大字段。
+    """
+
+    __tablename__ = "law_bodies"
+
+    law_id = Column(Integer, ForeignKey("laws.id", ondelete="CASCADE"), primary_key=True)
+    content = Column(LargeBinary, nullable=True, comment="压缩后的正文 HTML")
+    file_content = Column(LargeBinary, nullable=True, comment="压缩后的附件文本")
+    content_size = Column(Integer, nullable=True, comment="正文原始大小（UTF-8 字节）")
+    file_content_size = Column(Integer, nullable=True, comment="附件文本原始大小（UTF-8 字节）")
+
+    def __repr__(self):
+        return f"<LawBody(law_id={self.law_id})>"
+
+
+class BodyDictionary(Base):
+    """zstd 压缩字典表（最新的一个用于写入，旧的保留用于读取旧数据）"""
+
+    __tablename__ = "body_dictionaries"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False, comment="zstd 字典 ID")
+    data = Column(LargeBinary, nullable=False, comment="字典内容")
+    sample_count = Column(Integer, nullable=True, comment="训练样本数")
+    created_at = Column(DateTime, default=datetime.utcnow, comment="训练时间")
+
+    def __repr__(self):
+        return f"<BodyDictionary(id={self.id})>"
+
+
+def encode_body(record: dict) -> dict:
+    """把记录中的正文字段编码为 law_bodies 的列（不含正文字段时返回空字典）"""
+    row = {}
+    for field in BODY_FIELDS:
+        if field in record:
+            value = record[field]
+            row[field] = body_codec.encode(value)
+            row[f"{field}_size"] = len(value.encode("utf-8")) if value is not None else None
+    return row
+
+
+def decode_body(db: Session | None, data: bytes | None) -> str | None:
+    """解压正文字段，遇到未加载的字典（如由迁移脚本新训练的）时从数据库加载后重试"""
+    try:
+        return body_codec.decode(data)
+    except UnknownDictionaryError:
+        if db is None:
+            raise
+        load_body_dictionaries(db)
+        return body_codec.decode(data)
+
+
+def load_body_dictionaries(db: Session) -> int:
+    """加载全部压缩字典，最新的一个用于之后的写入，返回字典数"""
+    dictionaries = db.query(BodyDictionary).order_by(BodyDictionary.created_at).all()
+    for dictionary in dictionaries:
+        body_codec.add_dictionary(dictionary.id, dictionary.data)
+    return len(dictionaries)
+
+
 class CrawlLog(Base):
     """爬取日志表"""
 
@@ -46,6 +171,7 @@ class CrawlLog(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     category = Column(String(50), nullable=False, comment="爬取的分类")
     status = Column(String(20), nullable=False, comment="状态：success/failed")
+    mode = Column(String(20), nullable=True, comment="爬取模式：full/incremental")
     count = Column(Integer, default=0, comment="爬取数量")
     error_message = Column(Text, nullable=True, comment="错误信息")
     created_at = Column(DateTime, default=datetime.utcnow, comment="爬取时间")
@@ -54,6 +180,39 @@ class CrawlLog(Base):
         return f"<CrawlLog(id={self.id}, category='{self.category}', status='{self.status}')>"
 
 
+SUMMARY_LENGTH = 120
+
+
+def summarize(content: str | None, file_content: str | None) -> str:
+    """生成列表摘要：正文纯文本（无正文时取附件文本）的前 SUMMARY_LENGTH 个字符"""
+    from app.services.search import html_to_text
+
+    text = html_to_text(content) or " ".join((file_content or "").split())
+    if len(text) > SUMMARY_LENGTH:
+        return text[:SUMMARY_LENGTH] + "…"
+    return text
+
+
+def backfill_summaries(db: Session, batch_size: int = 200) -> int:
+    """为缺少摘要的旧记录补充摘要，返回处理的条数"""
+    total = 0
+    while True:
+        laws = (
+            db.query(Law)
+            .options(selectinload(Law.body))
+            .filter(Law.summary.is_(None))
+            .limit(batch_size)
+            .all()
+        )
+        if not laws:
+            return total
+        for law in laws:
+            law.summary = summarize(law.content, law.file_content)
+        db.commit()
+        db.expunge_all()
+        total += len(laws)
+
+
 def get_law_by_hash(db: Session, hash_value: str) -> Law | None:
     """根据哈希值获取法规"""
     return db.query(Law).filter(Law.hash == hash_value).first()
@@ -64,10 +223,42 @@ def get_law_by_source_url(db: Session, source_url: str) -> Law | None:
     return db.query(Law).filter(Law.source_url == source_url).first()
 
 
+def get_known_source_urls(db: Session, category: str | None = None) -> set[str]:
+    """获取已入库法规的来源 URL 集合（用于增量爬取）
+
+    附件处理失败的条目不算已知，增量爬取时会重新处理。
+    """
+    query = db.query(Law.source_url).filter(
+        or_(Law.attachment_status.is_(None), Law.attachment_status != ATTACHMENT_FAILED)
+    )
+    if category:
+        query = query.filter(Law.category == category)
+    return {row[0] for row in query}
+
+
+def get_last_crawl_log(
+    db: Session, category: str, status: str | None = None, mode: str | None = None
+) -> CrawlLog | None:
+    """获取指定分类最近一条爬取日志"""
+    query = db.query(CrawlLog).filter(CrawlLog.category == category)
+    if status:
+        query = query.filter(CrawlLog.status == status)
+    if mode:
+        query = query.filter(CrawlLog.mode == mode)
+    return query.order_by(CrawlLog.created_at.desc()).first()
+
+
 def create_law(db: Session, law_data: dict) -> Law:
     """创建法规记录"""
+    from app.services.search import index_law
+
     law = Law(**law_data)
+    if law.summary is None:
+        law.summary = summarize(law.content, law.file_content)
     db.add(law)
+    db.flush()
+    index_law(db, law)
+    bump_data_version(db)
     db.commit()
     db.refresh(law)
     return law
@@ -75,13 +266,142 @@ def create_law(db: Session, law_data: dict) -> Law:
 
 def update_law(db: Session, law: Law, update_data: dict) -> Law:
     """更新法规记录"""
+    from app.services.search import index_law, prepare_reindex
+
+    prepare_reindex(db, [law.id])
     for key, value in update_data.items():
         setattr(law, key, value)
+    if "summary" not in update_data and ("content" in update_data or "file_content" in update_data):
+        law.summary = summarize(law.content, law.file_content)
+    db.flush()
+    index_law(db, law)
+    bump_data_version(db)
     db.commit()
     db.refresh(law)
     return law
 
 
+def bulk_upsert_laws(db: Session, records: list[dict]) -> tuple[int, int]:
+    """批量新增或更新法规记录，返回 (新增数, 更新数)
+
+    已有记录先按 hash、再按 source_url 匹配，整批只做一次 IN 查询；
+    写入使用 INSERT ... ON CONFLICT(id) DO UPDATE，整批在一个事务中提交。
+    同一批中 hash 相同的记录以最后一条为准。
+    """
+    from app.services.search import index_rows, prepare_reindex
+
+    if not records:
+        return 0, 0
+
+    records = list({r.get("hash") or id(r): r for r in records}.values())
+    hashes = {r["hash"] for r in records if r.get("hash")}
+    urls = {r["source_url"] for r in records}
+
+    by_hash: dict[str, int] = {}
+    by_url: dict[str, int] = {}
+    for law_id, hash_value, source_url in db.query(Law.id, Law.hash, Law.source_url).filter(
+        or_(Law.hash.in_(hashes), Law.source_url.in_(urls))
+    ):
+        if hash_value:
+            by_hash.setdefault(hash_value, law_id)
+        by_url.setdefault(source_url, law_id)
+
+    now = datetime.utcnow()
+    new_rows, existing_rows = [], []
+    for record in records:
+        if "summary" not in record:
+            record = {
+                **record,
+                "summary": summarize(record.get("content"), record.get("file_content")),
+            }
+        law_id = by_hash.get(record.get("hash")) or by_url.get(record["source_url"])
+        if law_id:
+            existing_rows.append({**record, "id": law_id, "updated_at": now})
+        else:
+            new_rows.append(record)
+
+    # written 保留原文用于写入正文表和全文索引，写入主表时去掉正文字段
+    written = []
+    for rows in _group_by_keys(new_rows).values():
+        result = db.execute(
+            insert(Law).returning(Law.id, sort_by_parameter_order=True),
+            [_law_columns(r) for r in rows],
+        )
+        written += [
+            {**row, "id": law_id} for row, law_id in zip(rows, result.scalars(), strict=True)
+        ]
+
+    # 覆盖之前删除旧索引；记录中没有的正文字段按库中原有内容写入索引
+    previous = prepare_reindex(db, [row["id"] for row in existing_rows])
+    for keys, rows in _group_by_keys(existing_rows).items():
+        update_keys = [k for k in keys if k not in BODY_FIELDS]
+        _upsert_by_id(db, [_law_columns(r) for r in rows], update_keys)
+        written += rows
+
+    upsert_bodies(db, [{"law_id": row["id"], **encode_body(row)} for row in written])
+    documents = {row["id"]: {**previous.get(row["id"], {}), **row} for row in written}
+    index_rows(db, list(documents.values()))
+    bump_data_version(db)
+    db.commit()
+    return len(new_rows), len(existing_rows)
+
+
+def _group_by_keys(rows: list[dict]) -> dict[tuple, list[dict]]:
+    """按字段集合分组（executemany 要求每行字段一致）"""
+    groups: dict[tuple, list[dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    return groups
+
+
+def _law_columns(record: dict) -> dict:
+    """记录中写入主表的字段"""
+    return {key: value for key, value in record.items() if key not in BODY_FIELDS}
+
+
+def _dialect_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+def _upsert_by_id(db: Session, rows: list[dict], keys) -> None:
+    """按主键批量覆盖已有记录"""
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        db.execute(update(Law), rows)
+        return
+
+    stmt = dialect_insert(Law)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Law.id],
+        set_={key: stmt.excluded[key] for key in keys if key != "id"},
+    )
+    db.execute(stmt, rows)
+
+
+def upsert_bodies(db: Session, rows: list[dict]) -> None:
+    """批量写入或覆盖 law_bodies（不提交事务），每行只覆盖其中出现的列"""
+    rows = [row for row in rows if len(row) > 1]
+    dialect_insert = _dialect_insert(db)
+    for keys, group in _group_by_keys(rows).items():
+        if dialect_insert is None:
+            for row in group:
+                db.merge(LawBody(**row))
+            continue
+        stmt = dialect_insert(LawBody)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LawBody.law_id],
+            set_={key: stmt.excluded[key] for key in keys if key != "law_id"},
+        )
+        db.execute(stmt, group)
+
+
 def create_crawl_log(db: Session, log_data: dict) -> CrawlLog:
     """创建爬取日志"""
     log = CrawlLog(**log_data)
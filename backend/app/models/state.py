@@ -0,0 +1,105 @@
+"""全局状态数据模型"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Integer, String, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import Base
+
+
+class DataVersion(Base):
+    """数据版本表（单行）
+
+    每次写入法规数据时递增，读接口的缓存以此判断是否失效。
+    放在数据库里而不是进程内，导入脚本等其他进程写入后同样能让缓存失效。
+    """
+
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0, comment="数据版本号")
+    updated_at = Column(DateTime, default=datetime.utcnow, comment="最后写入时间")
+
+    def __repr__(self):
+        return f"<DataVersion(version={self.version})>"
+
+
+def get_data_version(db: Session) -> int:
+    """获取当前数据版本号"""
+    version = db.query(DataVersion.version).filter(DataVersion.id == 1).scalar()
+    return version or 0
+
+
+def bump_data_version(db: Session) -> None:
+    """递增数据版本号（不提交事务，随数据写入一起提交）
+
+    用单条 upsert 完成，表为空时多个写入方同时插入首行也不会主键冲突。
+    """
+    db.execute(
+        text(
+            "INSERT INTO data_version (id, version, updated_at) VALUES (1, 1, :now) "
+            "ON CONFLICT (id) DO UPDATE SET version = data_version.version + 1, "
+            "updated_at = excluded.updated_at"
+        ),
+        {"now": datetime.utcnow()},
+    )
+
+
+class JobLock(Base):
+    """跨进程互斥锁（租约）
+
+    持有者需在 expires_at 之前续期，进程异常退出后租约到期即可被其他进程接管。
+    """
+
+    __tablename__ = "job_locks"
+
+    name = Column(String(50), primary_key=True, comment="锁名称")
+    owner = Column(String(64), nullable=False, comment="持有者（任务 ID）")
+    expires_at = Column(DateTime, nullable=False, comment="租约到期时间")
+
+    def __repr__(self):
+        return f"<JobLock(name='{self.name}', owner='{self.owner}')>"
+
+
+def acquire_lock(db: Session, name: str, owner: str, ttl: float) -> bool:
+    """尝试获取锁（已过期的锁可被接管），成功返回 True，会提交事务"""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl)
+    result = db.execute(
+        text(
+            "UPDATE job_locks SET owner = :owner, expires_at = :expires_at "
+            "WHERE name = :name AND (expires_at < :now OR owner = :owner)"
+        ),
+        {"name": name, "owner": owner, "expires_at": expires_at, "now": now},
+    )
+    if result.rowcount:
+        db.commit()
+        return True
+
+    try:
+        db.add(JobLock(name=name, owner=owner, expires_at=expires_at))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def refresh_lock(db: Session, name: str, owner: str, ttl: float) -> bool:
+    """续期锁，锁已被他人接管时返回 False"""
+    result = db.execute(
+        text("UPDATE job_locks SET expires_at = :expires_at WHERE name = :name AND owner = :owner"),
+        {"name": name, "owner": owner, "expires_at": datetime.utcnow() + timedelta(seconds=ttl)},
+    )
+    db.commit()
+    return bool(result.rowcount)
+
+
+def release_lock(db: Session, name: str, owner: str) -> None:
+    """释放锁（只释放自己持有的）"""
+    db.execute(
+        text("DELETE FROM job_locks WHERE name = :name AND owner = :owner"),
+        {"name": name, "owner": owner},
+    )
+    db.commit()
@@ -1,6 +1,6 @@
 """定时任务调度"""
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
@@ -14,33 +14,35 @@ logger = logging.getLogger(__name__)
 scheduler = BackgroundScheduler()
 
 
+def needs_full_resync(db) -> bool:
+    """距离上次成功的全量同步是否已超过 crawler_full_resync_days"""
+    from app.models.law import get_last_crawl_log
+
+    last_full = get_last_crawl_log(db, "全部", status="success", mode="full")
+    if not last_full:
+        return True
+    resync_interval = timedelta(days=settings.crawler_full_resync_days)
+    return datetime.utcnow() - last_full.created_at >= resync_interval
+
+
 def crawl_all_categories():
-    """爬取所有分类"""
-    from app.services.crawler import CrawlerService
-    from app.models.law import create_crawl_log
-
-    logger.info("开始定时爬取任务")
-    db = SessionLocal()
-    try:
-        crawler = CrawlerService(db)
-        count = crawler.crawl_all()
-        create_crawl_log(db, {
-            "category": "全部",
-            "status": "success",
-            "count": count,
-            "error_message": None,
-        })
-        logger.info(f"定时爬取完成，共爬取 {count} 条法规")
-    except Exception as e:
-        logger.error(f"定时爬取失败: {e}")
-        create_crawl_log(db, {
-            "category": "全部",
-            "status": "failed",
-            "count": 0,
-            "error_message": str(e),
-        })
-    finally:
-        db.close()
+    """爬取所有分类（默认增量，定期全量同步）
+
+    与手动触发共用爬取锁，已有任务运行时跳过本次调度。
+    """
+    from app.services.jobs import CrawlAlreadyRunningError, create_crawl_job, run_crawl_job
+
+    with SessionLocal() as db:
+        incremental = not needs_full_resync(db)
+        try:
+            job = create_crawl_job(db, None, incremental=incremental)
+        except CrawlAlreadyRunningError:
+            logger.info("已有爬取任务在运行，跳过本次定时爬取")
+            return
+        job_id = job.id
+
+    logger.info(f"开始定时爬取任务 {job_id}，模式: {'incremental' if incremental else 'full'}")
+    run_crawl_job(job_id, None, incremental)
 
 
 def start_scheduler():
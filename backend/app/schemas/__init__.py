@@ -1,3 +1,25 @@
-from .law import LawCreate, LawResponse, LawListResponse, CrawlLogResponse
+from .law import (
+    CrawlJobResponse,
+    CrawlLogResponse,
+    LawCreate,
+    LawListResponse,
+    LawResponse,
+    LawSearchItem,
+    LawSearchResponse,
+    LawSummary,
+    TimelineBucket,
+    TimelineResponse,
+)
 
-__all__ = ["LawCreate", "LawResponse", "LawListResponse", "CrawlLogResponse"]
+__all__ = [
+    "LawCreate",
+    "LawResponse",
+    "LawSummary",
+    "LawListResponse",
+    "LawSearchItem",
+    "LawSearchResponse",
+    "CrawlLogResponse",
+    "CrawlJobResponse",
+    "TimelineBucket",
+    "TimelineResponse",
+]
@@ -2,7 +2,7 @@
 from datetime import date, datetime
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Json
 
 
 class LawBase(BaseModel):
@@ -36,14 +36,59 @@ class LawResponse(LawBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class LawSummary(BaseModel):
+    """法规列表条目（不含正文和附件全文）"""
+
+    id: int
+    title: str
+    category: str
+    publish_date: date | None = None
+    has_attachment: bool = False
+    summary: str | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class LawListResponse(BaseModel):
-    """法规列表响应模型"""
+    """法规列表响应模型
 
-    items: list[LawResponse]
-    total: int
-    page: int
+    页码分页时返回 total/page/total_pages；游标分页时返回 next_cursor，
+    total 仅在 with_total=true 时返回。
+    """
+
+    items: list[LawSummary]
+    total: int | None = None
+    page: int | None = None
     page_size: int
-    total_pages: int
+    total_pages: int | None = None
+    next_cursor: str | None = None
+
+
+class LawSearchItem(LawSummary):
+    """搜索结果条目（附带高亮摘要）"""
+
+    snippet: str | None = None
+
+
+class LawSearchResponse(LawListResponse):
+    """搜索结果响应模型"""
+
+    items: list[LawSearchItem]
+
+
+class TimelineBucket(BaseModel):
+    """时间线分组（年份 YYYY 或月份 YYYY-MM）"""
+
+    key: str
+    count: int
+
+
+class TimelineResponse(BaseModel):
+    """时间线统计响应模型"""
+
+    years: list[TimelineBucket]
+    months: list[TimelineBucket]
+    total: int
 
 
 class CrawlLogResponse(BaseModel):
@@ -52,6 +97,7 @@ class CrawlLogResponse(BaseModel):
     id: int
     category: str
     status: str
+    mode: str | None = None
     count: int
     error_message: Optional[str] = None
     created_at: datetime
@@ -63,11 +109,37 @@ class CrawlStatusResponse(BaseModel):
     """爬取状态响应模型"""
 
     is_running: bool
+    task_id: str | None = None
     last_crawl_time: Optional[datetime] = None
     last_crawl_status: Optional[str] = None
     last_crawl_count: Optional[int] = None
 
 
+class CrawlJobResponse(BaseModel):
+    """爬取任务进度响应模型"""
+
+    id: str
+    category: str
+    mode: str
+    status: str
+    pages_total: int = 0
+    pages_done: int = 0
+    items_new: int = 0
+    items_updated: int = 0
+    items_failed: int = 0
+    items_skipped: int = 0
+    throughput: float = 0.0
+    profile_misses: int | None = 0
+    extraction: Json[dict[str, dict[str, int]]] | None = None  # "配置名/字段" -> {选择器: 次数}
+    error_message: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    updated_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class CrawlStartResponse(BaseModel):
     """触发爬取响应模型"""
 
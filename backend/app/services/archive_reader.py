@@ -0,0 +1,202 @@
+"""流式读取压缩包成员
+
+不再把整个压缩包 extractall 到临时目录：逐个成员解压到 SpooledTemporaryFile
+（较小的成员留在内存中，超过 crawler_archive_spool_bytes 才落盘），边解压边计算摘要，
+解析完即释放。只有调用方需要的成员（可解析的格式）才会被解压。
+
+为防范压缩炸弹，同一附件（含嵌套的压缩包）共用一份额度：解压后总字节数和成员数
+都有上限，超出时抛出 ArchiveLimitError。额度按实际解压出的字节计算，
+不依赖压缩包头中声明的大小。
+"""
+import hashlib
+import logging
+import tempfile
+import zipfile
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIXES = {".zip", ".7z", ".rar"}
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class ArchiveLimitError(Exception):
+    """解压超出额度"""
+
+
+class ArchiveBudget:
+    """一次附件解析的解压额度"""
+
+    def __init__(self, max_bytes: int | None = None, max_members: int | None = None):
+        if max_bytes is None:
+            max_bytes = settings.crawler_archive_max_bytes
+        if max_members is None:
+            max_members = settings.crawler_archive_max_members
+        self.remaining_bytes = max_bytes
+        self.remaining_members = max_members
+
+    def add_member(self) -> None:
+        self.remaining_members -= 1
+        if self.remaining_members < 0:
+            raise ArchiveLimitError("压缩包成员数超出上限")
+
+    def consume(self, size: int) -> None:
+        self.remaining_bytes -= size
+        if self.remaining_bytes < 0:
+            raise ArchiveLimitError("解压后总大小超出上限")
+
+
+class ArchiveMember:
+    """解压出的成员（file 为 None 表示未解压，只有文件名）"""
+
+    def __init__(self, name: str, budget: ArchiveBudget | None = None):
+        self.name = name
+        self.digest: str | None = None
+        self.file: BinaryIO | None = None
+        self._budget = budget
+        self._hash = hashlib.sha256()
+        if budget is not None:
+            self.file = tempfile.SpooledTemporaryFile(max_size=settings.crawler_archive_spool_bytes)
+
+    def write(self, chunk) -> int:
+        self._budget.consume(len(chunk))
+        self._hash.update(chunk)
+        return self.file.write(chunk)
+
+    def copy_from(self, stream: BinaryIO) -> "ArchiveMember":
+        for chunk in iter(lambda: stream.read(_CHUNK_SIZE), b""):
+            self.write(chunk)
+        return self.finish()
+
+    def finish(self) -> "ArchiveMember":
+        self.digest = self._hash.hexdigest()
+        self.file.seek(0)
+        return self
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def iter_members(
+    name: str,
+    source,
+    budget: ArchiveBudget,
+    wanted: Callable[[str], bool],
+) -> Iterator[ArchiveMember]:
+    """按顺序产出压缩包中的文件成员
+
+    source 为文件路径或可 seek 的文件对象；wanted(name) 为 False 的成员不解压，
+    只产出文件名。每个成员在下一次迭代前关闭。
+    """
+    suffix = Path(name).suffix.lower()
+    if suffix == ".zip":
+        yield from _iter_zip(source, budget, wanted)
+    elif suffix == ".rar":
+        yield from _iter_rar(source, budget, wanted)
+    elif suffix == ".7z":
+        yield from _iter_7z(source, budget, wanted)
+
+
+def _zip_name(info: zipfile.ZipInfo) -> str:
+    """未设置 UTF-8 标志的成员名按 GBK 解码（国内常见的压缩工具默认使用 GBK）"""
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode("cp437").decode("gbk")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
+
+
+def _iter_zip(source, budget: ArchiveBudget, wanted) -> Iterator[ArchiveMember]:
+    with zipfile.ZipFile(source) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            budget.add_member()
+            name = _zip_name(info)
+            if not wanted(name):
+                yield ArchiveMember(name)
+                continue
+            with ArchiveMember(name, budget) as member, zf.open(info) as stream:
+                yield member.copy_from(stream)
+
+
+def _iter_rar(source, budget: ArchiveBudget, wanted) -> Iterator[ArchiveMember]:
+    import rarfile
+
+    with rarfile.RarFile(source) as rf:
+        for info in rf.infolist():
+            if info.isdir():
+                continue
+            budget.add_member()
+            if not wanted(info.filename):
+                yield ArchiveMember(info.filename)
+                continue
+            with ArchiveMember(info.filename, budget) as member, rf.open(info) as stream:
+                yield member.copy_from(stream)
+
+
+def _iter_7z(source, budget: ArchiveBudget, wanted) -> Iterator[ArchiveMember]:
+    """7z 成员（py7zr 只能批量解压，所需成员同时暂存在 SpooledTemporaryFile 中）"""
+    import py7zr
+    from py7zr.io import Py7zIO, WriterFactory
+
+    class _MemberIO(Py7zIO):
+        def __init__(self, member: ArchiveMember):
+            self.member = member
+
+        def write(self, s) -> int:
+            return self.member.write(s)
+
+        def read(self, size=None) -> bytes:
+            return self.member.file.read(size)
+
+        def seek(self, offset: int, whence: int = 0) -> int:
+            return self.member.file.seek(offset, whence)
+
+        def flush(self) -> None:
+            self.member.file.flush()
+
+        def size(self) -> int:
+            return self.member.file.tell()
+
+    class _Factory(WriterFactory):
+        def __init__(self):
+            self.members: dict[str, ArchiveMember] = {}
+
+        def create(self, filename: str) -> Py7zIO:
+            member = self.members[filename] = ArchiveMember(filename, budget)
+            return _MemberIO(member)
+
+    with py7zr.SevenZipFile(source, mode="r") as szf:
+        names = []
+        for info in szf.list():
+            if info.is_directory:
+                continue
+            budget.add_member()
+            names.append(info.filename)
+
+        targets = [n for n in names if wanted(n)]
+        factory = _Factory()
+        try:
+            if targets:
+                szf.extract(targets=targets, factory=factory)
+            for filename in names:
+                member = factory.members.get(filename)
+                yield member.finish() if member else ArchiveMember(filename)
+        finally:
+            for member in factory.members.values():
+                member.close()
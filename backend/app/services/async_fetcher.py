@@ -0,0 +1,163 @@
+"""基于 asyncio 的 HTTP 抓取后端（httpx）
+
+- 连接池复用 keep-alive 连接，安装了 h2 时启用 HTTP/2
+- 按主机限制并发连接数
+- 与线程后端共用按主机的令牌桶限速
+- 失败重试采用带随机抖动的指数退避
+"""
+import asyncio
+import logging
+import random
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+import httpx
+
+from app.config import settings
+from app.services import metrics
+from app.services.rate_limiter import HostRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# 退避时间上限（秒）
+MAX_BACKOFF = 30.0
+
+
+def http2_available() -> bool:
+    """是否安装了 HTTP/2 支持（httpx[http2]）"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def backoff_delay(attempt: int) -> float:
+    """第 attempt 次失败后的等待时间（full jitter 指数退避）"""
+    return random.uniform(0, min(MAX_BACKOFF, settings.crawler_request_delay * (2 ** attempt)))
+
+
+class AsyncFetcher:
+    """异步 HTTP 抓取器（需在事件循环中创建和使用）"""
+
+    def __init__(
+        self,
+        headers: dict,
+        rate_limiter: HostRateLimiter,
+        max_connections: int | None = None,
+        max_per_host: int | None = None,
+        http2: bool | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        max_connections = max_connections or settings.crawler_max_connections
+        self.max_per_host = max_per_host or settings.crawler_max_connections_per_host
+        http2 = settings.crawler_http2 if http2 is None else http2
+        if http2 and not http2_available():
+            logger.info("未安装 h2，异步抓取使用 HTTP/1.1")
+            http2 = False
+
+        self.rate_limiter = rate_limiter
+        self._client = httpx.AsyncClient(
+            headers=headers,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=settings.crawler_timeout,
+            follow_redirects=True,
+            transport=transport,
+        )
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+
+    def _slot(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_slots[host]
+
+    async def _throttle(self, url: str) -> None:
+        wait = self.rate_limiter.reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def get(self, url: str, kind: str = "page", **kwargs) -> httpx.Response | None:
+        """带重试的 GET 请求（读取完整响应体），kind 为指标中的请求类型"""
+        for attempt in range(settings.crawler_max_retries):
+            retry = attempt < settings.crawler_max_retries - 1
+            try:
+                await self._throttle(url)
+                async with self._slot(url):
+                    response = await self._client.get(url, **kwargs)
+                response.raise_for_status()
+                metrics.record_crawler_attempt(kind, response.status_code, retry=False)
+                metrics.CRAWLER_BYTES.labels(kind).inc(len(response.content))
+                return response
+            except httpx.HTTPError as e:
+                metrics.record_crawler_attempt(kind, metrics.error_status(e), retry=retry)
+                logger.warning(
+                    f"请求失败 (尝试 {attempt + 1}/{settings.crawler_max_retries}): "
+                    f"{url}, 错误: {e}"
+                )
+                if retry:
+                    await asyncio.sleep(backoff_delay(attempt))
+        return None
+
+    @asynccontextmanager
+    async def stream(
+        self, url: str, headers: dict | None = None, kind: str = "attachment"
+    ) -> AsyncIterator[httpx.Response | None]:
+        """带重试的流式 GET 请求，失败时产出 None
+
+        只重试建立连接和读取响应头的阶段，响应体由调用方按块读取（下载字节数也由调用方统计）。
+        """
+        response = None
+        slot = self._slot(url)
+        for attempt in range(settings.crawler_max_retries):
+            retry = attempt < settings.crawler_max_retries - 1
+            await self._throttle(url)
+            await slot.acquire()
+            try:
+                response = await self._send_stream(url, headers)
+            except httpx.HTTPError as e:
+                metrics.record_crawler_attempt(kind, metrics.error_status(e), retry=retry)
+                logger.warning(
+                    f"请求失败 (尝试 {attempt + 1}/{settings.crawler_max_retries}): "
+                    f"{url}, 错误: {e}"
+                )
+            finally:
+                # 只有交给调用方的响应继续占用连接槽，失败、取消或其他异常时都要释放
+                if response is None:
+                    slot.release()
+            if response is not None:
+                metrics.record_crawler_attempt(kind, response.status_code, retry=False)
+                break
+            if retry:
+                await asyncio.sleep(backoff_delay(attempt))
+
+        if response is None:
+            yield None
+            return
+
+        try:
+            yield response
+        finally:
+            try:
+                await response.aclose()
+            finally:
+                slot.release()
+
+    async def _send_stream(self, url: str, headers: dict | None) -> httpx.Response:
+        """发送流式 GET 请求，状态码表示失败时关闭响应并抛出 HTTPStatusError"""
+        request = self._client.build_request("GET", url, headers=headers)
+        response = await self._client.send(request, stream=True)
+        try:
+            response.raise_for_status()
+        except BaseException:
+            await response.aclose()
+            raise
+        return response
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
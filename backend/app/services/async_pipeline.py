@@ -0,0 +1,124 @@
+"""基于 asyncio 的抓取流水线
+
+接口与 CrawlPipeline 相同（submit/drain，调用方线程写库），区别在于网络 I/O：
+详情页和附件都由后台线程中的事件循环通过 AsyncFetcher 并发请求，
+HTML 解析和附件文本提取仍交给线程池，沿用 CrawlerService 原有的解析方法。
+"""
+import asyncio
+import logging
+import threading
+import time
+from urllib.parse import urljoin
+
+from app.config import settings
+from app.models.law import ATTACHMENT_FAILED
+from app.services import metrics
+from app.services.async_fetcher import AsyncFetcher
+from app.services.attachment_store import check_declared_size
+from app.services.crawl_pipeline import CrawlPipeline
+from app.services.crawler import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCrawlPipeline(CrawlPipeline):
+    """使用异步 HTTP 后端的抓取流水线"""
+
+    def __init__(self, crawler, category_name: str, **kwargs):
+        super().__init__(crawler, category_name, **kwargs)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="crawler-async", daemon=True
+        )
+        self._thread.start()
+        self._tasks: set = set()
+        self._fetcher = self._run(self._open()).result()
+
+    async def _open(self) -> AsyncFetcher:
+        self._detail_slots = asyncio.Semaphore(self.detail_workers)
+        self._attachment_slots = asyncio.Semaphore(self.attachment_workers)
+        return AsyncFetcher(self.crawler.HEADERS, rate_limiter)
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            return super().__exit__(exc_type, exc, tb)
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+            self._run(self._fetcher.aclose()).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+    def _dispatch(self, item: dict) -> None:
+        future = self._run(self._process(item))
+        self._tasks.add(future)
+        future.add_done_callback(self._tasks.discard)
+
+    async def _process(self, item: dict) -> None:
+        """处理单个条目：详情页 -> 附件，结果放入结果队列"""
+        try:
+            async with self._detail_slots:
+                law_data = await self._fetch_detail(item)
+            if law_data and law_data.get("file_url"):
+                async with self._attachment_slots:
+                    await self._fetch_attachment(law_data)
+            self._results.put((item, law_data, None))
+        except Exception as e:
+            self._results.put((item, None, e))
+
+    async def _fetch_detail(self, item: dict):
+        detail_url = urljoin(settings.crawler_base_url, item["pcUrl"])
+        started = time.perf_counter()
+        try:
+            response = await self._fetcher.get(detail_url, kind="detail")
+            if response is None:
+                return None
+
+            law_data = await self._loop.run_in_executor(
+                self._detail_pool,
+                self.crawler._parse_detail_page,
+                response.text,
+                detail_url,
+                self.category_name,
+            )
+        finally:
+            metrics.CRAWLER_STAGE.labels("detail").observe(time.perf_counter() - started)
+        if law_data:
+            self._apply_api_date(item, law_data)
+        return law_data
+
+    async def _fetch_attachment(self, law_data: dict) -> None:
+        file_url = law_data["file_url"]
+        law_data["attachment_status"] = ATTACHMENT_FAILED
+        crawler = self.crawler
+        started = time.perf_counter()
+        try:
+            headers = crawler._conditional_headers(file_url)
+            async with self._fetcher.stream(file_url, headers) as response:
+                if response is None:
+                    return
+                if response.status_code == 304:
+                    entry = crawler._manifest_entry(file_url, response.headers, None)
+                else:
+                    max_bytes = settings.crawler_max_attachment_bytes
+                    check_declared_size(response.headers, max_bytes)
+                    suffix = crawler._attachment_suffix(file_url)
+                    chunk_size = settings.crawler_download_chunk_size
+                    with crawler.store.writer(suffix, max_bytes) as obj:
+                        async for chunk in response.aiter_bytes(chunk_size):
+                            obj.write(chunk)
+                            metrics.CRAWLER_BYTES.labels("attachment").inc(len(chunk))
+                    entry = crawler._manifest_entry(file_url, response.headers, obj)
+            metrics.CRAWLER_STAGE.labels("download").observe(time.perf_counter() - started)
+
+            await self._loop.run_in_executor(
+                self._attachment_pool, crawler._apply_attachment, law_data, entry
+            )
+            logger.info(f"附件处理完成: {law_data['file_path']}")
+        except Exception as e:
+            law_data["attachment_status"] = ATTACHMENT_FAILED
+            logger.error(f"附件处理失败: {file_url}, 错误: {e}")
@@ -0,0 +1,356 @@
+"""附件文本提取（进程池）
+
+PDF、Word、压缩包的解析是 CPU 密集型操作，在爬虫线程中执行会长时间占用 GIL，
+一个大的扫描版 PDF 就能拖慢整个抓取流程。这里把解析放到独立的进程池中：
+
+- 每个文件有超时时间：工作进程内用 SIGALRM 中断解析，主进程另有兜底超时，
+  超过后终止工作进程并重建进程池
+- 工作进程通过 RLIMIT_AS 限制内存，超限时该文件解析失败，不影响主进程
+- 页数较多的 PDF 按页段拆分，多个进程并行解析后按顺序拼接
+
+解析失败（异常、超时、工作进程被杀）统一抛出 AttachmentParseError，
+由调用方将记录标记为待重试。crawler_parse_workers 为 0 时在当前进程内直接解析。
+信号和内存限制仅在 POSIX 系统上生效。
+
+解析结果按文件摘要缓存（见 text_cache），命中时不再提交给进程池。
+"""
+import logging
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import BinaryIO
+
+from app.config import settings
+from app.services.archive_reader import (
+    ARCHIVE_SUFFIXES,
+    ArchiveBudget,
+    ArchiveLimitError,
+    ArchiveMember,
+    iter_members,
+)
+from app.services.text_cache import MISS, TextCache, file_digest
+
+logger = logging.getLogger(__name__)
+
+# 解析器版本：解析逻辑变化导致提取结果不同时递增，使旧的缓存文本失效
+PARSER_VERSION = "2"
+
+# 需要读取内容的格式（.doc 只输出提示，不读取内容）
+PARSEABLE_SUFFIXES = {".pdf", ".docx", ".txt"} | ARCHIVE_SUFFIXES
+
+_text_cache: TextCache | None = None
+
+
+class AttachmentParseError(Exception):
+    """附件解析失败（含超时和工作进程异常退出）"""
+
+
+def get_text_cache() -> TextCache:
+    """当前进程的文本缓存（主进程和解析进程各自打开同一个缓存文件）"""
+    global _text_cache
+    if _text_cache is None:
+        max_bytes = settings.parse_cache_max_mb * 1024 * 1024
+        _text_cache = TextCache(settings.parse_cache_path, max_bytes)
+    return _text_cache
+
+
+# ---------- 解析函数（在工作进程中执行） ----------
+
+def parse_file_cached(file_path: str, digest: str | None = None) -> str | None:
+    """带缓存的 parse_file"""
+    cache = get_text_cache()
+    if not cache.enabled:
+        return parse_file(file_path)
+
+    digest = digest or file_digest(file_path)
+    text = cache.get(digest, PARSER_VERSION)
+    if text is MISS:
+        text = parse_file(file_path)
+        cache.put(digest, PARSER_VERSION, text)
+    return text
+
+
+def parse_file(file_path: str) -> str | None:
+    """按扩展名解析文件，返回文本；格式不支持时返回 None，解析出错时抛出异常"""
+    path = Path(file_path)
+    with open(path, "rb") as f:
+        return parse_stream(path.name, f)
+
+
+def is_parseable(name: str) -> bool:
+    """是否需要读取内容来解析（压缩包中只解压这些成员）"""
+    return Path(name).suffix.lower() in PARSEABLE_SUFFIXES
+
+
+def parse_stream(name: str, stream: BinaryIO | None) -> str | None:
+    """按文件名后缀解析文件对象（需可 seek）"""
+    suffix = Path(name).suffix.lower()
+
+    if suffix == ".pdf":
+        return parse_pdf(stream)
+    elif suffix == ".docx":
+        return parse_docx(stream)
+    elif suffix == ".doc":
+        # .doc 格式需要特殊处理，这里返回提示
+        logger.warning(f"不支持 .doc 格式，请手动转换: {name}")
+        return f"[.doc 格式文件，需手动查看: {Path(name).name}]"
+    elif suffix == ".txt":
+        return stream.read().decode("utf-8", errors="ignore")
+    elif suffix in ARCHIVE_SUFFIXES:
+        return parse_archive(stream, name)
+    else:
+        logger.warning(f"不支持的文件格式: {suffix}")
+        return None
+
+
+def pdf_page_count(source) -> int:
+    """PDF 页数（source 为路径或文件对象）"""
+    import pdfplumber
+
+    with pdfplumber.open(source) as pdf:
+        return len(pdf.pages)
+
+
+def parse_pdf(source, start: int = 0, end: int | None = None) -> str | None:
+    """解析 PDF 的 [start, end) 页（source 为路径或文件对象）"""
+    import pdfplumber
+
+    text_parts = []
+    with pdfplumber.open(source) as pdf:
+        for page in pdf.pages[start:end]:
+            text = page.extract_text()
+            if text:
+                text_parts.append(text)
+            page.close()
+
+    return "\n".join(text_parts) if text_parts else None
+
+
+def parse_docx(source) -> str | None:
+    """解析 Word 文档（source 为路径或文件对象）"""
+    from docx import Document
+
+    doc = Document(source)
+    paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
+    return "\n".join(paragraphs)
+
+
+def parse_archive(
+    source,
+    name: str | None = None,
+    budget: ArchiveBudget | None = None,
+    depth: int = 0,
+) -> str | None:
+    """逐个成员流式解析压缩包（source 为路径或文件对象）
+
+    单个成员解析失败时跳过；超出解压额度时停止，保留已解析的部分；
+    嵌套超过 crawler_archive_max_depth 层的压缩包不再展开。
+    """
+    name = name or str(source)
+    budget = budget or ArchiveBudget()
+    extracted_texts = []
+
+    try:
+        for member in iter_members(name, source, budget, is_parseable):
+            try:
+                inner_text = _parse_member(member, budget, depth)
+            except ArchiveLimitError:
+                raise
+            except Exception as e:
+                logger.error(f"解析压缩包内文件失败 {member.name}: {e}")
+                continue
+            if inner_text:
+                extracted_texts.append(f"=== {member.name} ===\n{inner_text}")
+    except ArchiveLimitError as e:
+        logger.warning(
+            f"压缩包 {Path(name).name} {e}，只保留已解析的 {len(extracted_texts)} 个文件"
+        )
+
+    return "\n\n".join(extracted_texts) if extracted_texts else None
+
+
+def _parse_member(member: ArchiveMember, budget: ArchiveBudget, depth: int) -> str | None:
+    """解析压缩包成员（非压缩包成员按摘要走文本缓存）"""
+    if Path(member.name).suffix.lower() in ARCHIVE_SUFFIXES:
+        if depth + 1 > settings.crawler_archive_max_depth:
+            logger.warning(f"压缩包嵌套过深，跳过: {member.name}")
+            return None
+        return parse_archive(member.file, member.name, budget, depth + 1)
+
+    if member.file is None:
+        return parse_stream(member.name, None)
+
+    cache = get_text_cache()
+    text = cache.get(member.digest, PARSER_VERSION)
+    if text is MISS:
+        text = parse_stream(member.name, member.file)
+        cache.put(member.digest, PARSER_VERSION, text)
+    return text
+
+
+def _init_worker(memory_mb: int) -> None:
+    """工作进程初始化：限制地址空间大小"""
+    if memory_mb <= 0:
+        return
+    try:
+        import resource
+
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"无法限制解析进程内存: {e}")
+
+
+def _on_alarm(signum, frame):
+    raise TimeoutError("解析超时")
+
+
+def _run_with_alarm(timeout: float, fn, *args):
+    """在工作进程中执行解析函数，超过 timeout 秒时中断"""
+    if not hasattr(signal, "setitimer"):
+        return fn(*args)
+
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+# ---------- 进程池（在主进程中使用） ----------
+
+class AttachmentParser:
+    """附件解析进程池（线程安全，多个附件线程可同时调用 parse）"""
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        timeout: float | None = None,
+        memory_mb: int | None = None,
+        pdf_pages_per_task: int | None = None,
+    ):
+        self.workers = settings.crawler_parse_workers if workers is None else workers
+        self.timeout = timeout or settings.crawler_parse_timeout
+        self.memory_mb = settings.crawler_parse_memory_mb if memory_mb is None else memory_mb
+        self.pdf_pages_per_task = pdf_pages_per_task or settings.crawler_pdf_pages_per_task
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # 爬虫进程中有多个线程，fork 出的子进程可能继承到被占用的锁，统一使用 spawn
+                self._executor = ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.memory_mb,),
+                )
+            return self._executor
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        """终止出问题的进程池，下次调用时重建（其他线程已重建时跳过）"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+
+        # ProcessPoolExecutor 没有公开的终止接口，只能直接结束工作进程
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args) -> tuple[ProcessPoolExecutor, Future]:
+        for _ in range(2):
+            executor = self._pool()
+            try:
+                return executor, executor.submit(_run_with_alarm, self.timeout, fn, *args)
+            except RuntimeError:
+                # 进程池已被其他线程终止或已损坏
+                self._restart(executor)
+        raise AttachmentParseError("解析进程池不可用")
+
+    def _result(self, executor: ProcessPoolExecutor, future: Future):
+        # 工作进程内的 SIGALRM 通常会先触发，这里的兜底超时用于 C 扩展中卡死等情况。
+        # 排队时间不计入超时：等待开始时任务仍在排队的，超时后再等一轮。
+        # 等待和取结果分开：工作进程内 SIGALRM 抛出的 TimeoutError 与等待超时是同一个类，
+        # 只有任务确实还在执行时才终止进程池。
+        started = future.running()
+        while not wait([future], timeout=self.timeout * 2).done:
+            if not started:
+                started = future.running()
+                continue
+            self._restart(executor)
+            raise AttachmentParseError("解析超时，已终止解析进程")
+
+        try:
+            return future.result()
+        except BrokenProcessPool as e:
+            self._restart(executor)
+            raise AttachmentParseError("解析进程异常退出（可能超出内存限制）") from e
+        except MemoryError as e:
+            raise AttachmentParseError("解析超出内存限制") from e
+        except Exception as e:
+            raise AttachmentParseError(str(e)) from e
+
+    def parse(self, file_path, digest: str | None = None) -> str | None:
+        """解析附件文本，失败时抛出 AttachmentParseError
+
+        digest 为文件的 SHA-256（已知时传入可省去一次读文件计算）。
+        """
+        path = str(file_path)
+        if self.workers <= 0:
+            try:
+                return parse_file_cached(path, digest)
+            except Exception as e:
+                raise AttachmentParseError(str(e)) from e
+
+        cache = get_text_cache()
+        if cache.enabled:
+            digest = digest or file_digest(path)
+            text = cache.get(digest, PARSER_VERSION)
+            if text is not MISS:
+                return text
+
+        if Path(path).suffix.lower() == ".pdf":
+            text = self._parse_pdf(path)
+        else:
+            text = self._result(*self._submit(parse_file, path))
+
+        if cache.enabled:
+            cache.put(digest, PARSER_VERSION, text)
+        return text
+
+    def _parse_pdf(self, path: str) -> str | None:
+        """按页段并行解析 PDF"""
+        pages = self._result(*self._submit(pdf_page_count, path))
+        step = self.pdf_pages_per_task
+        if pages <= step:
+            return self._result(*self._submit(parse_pdf, path))
+
+        tasks = [
+            self._submit(parse_pdf, path, start, min(start + step, pages))
+            for start in range(0, pages, step)
+        ]
+        try:
+            parts = [self._result(executor, future) for executor, future in tasks]
+        finally:
+            for _, future in tasks:
+                future.cancel()
+        text = "\n".join(part for part in parts if part)
+        return text or None
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# 进程内共享的解析进程池（首次使用时启动）
+attachment_parser = AttachmentParser()
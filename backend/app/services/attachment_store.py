@@ -0,0 +1,116 @@
+"""附件内容寻址存储
+
+附件按内容的 SHA-256 存放在 ``<attachment_dir>/objects/ab/cd/<digest><后缀>``，
+相同内容只保存一份，不同内容即使文件名相同也不会互相覆盖。
+写入时先写临时文件并同时计算摘要，完成后再原子地移动到最终位置。
+
+写入过程中还会：
+- 根据文件头识别实际格式，存储扩展名以识别结果为准（解析时按扩展名选择解析器）
+- 内容是 HTML 页面时中止（附件链接返回了错误页）
+- 超过大小上限时中止
+"""
+import hashlib
+import os
+import tempfile
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.services.filetype import HEAD_SIZE, is_html, sniff_suffix
+
+
+class AttachmentRejectedError(Exception):
+    """附件内容不符合要求（超过大小上限或不是文件）"""
+
+
+def check_declared_size(headers: Mapping, max_bytes: int | None) -> None:
+    """按 Content-Length 提前拒绝过大的附件"""
+    length = headers.get("Content-Length")
+    if max_bytes and length and length.isdigit() and int(length) > max_bytes:
+        raise AttachmentRejectedError(f"附件大小 {int(length)} 字节超过上限 {max_bytes} 字节")
+
+
+class StoredObject:
+    """正在写入的附件对象"""
+
+    def __init__(self, store: "AttachmentStore", suffix: str, max_bytes: int | None = None):
+        self.store = store
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.digest: str | None = None
+        self.path: Path | None = None
+        # 写入前存储中是否已有相同内容
+        self.existed = False
+        self._hash = hashlib.sha256()
+        self._head = b""
+        self._sniffed = False
+        fd, tmp_name = tempfile.mkstemp(dir=store.tmp_dir, suffix=suffix)
+        self._tmp_path = Path(tmp_name)
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise AttachmentRejectedError(f"附件超过大小上限 {self.max_bytes} 字节")
+        if not self._sniffed:
+            self._head += chunk[:HEAD_SIZE - len(self._head)]
+            if len(self._head) >= HEAD_SIZE:
+                self._sniff()
+        self._file.write(chunk)
+        self._hash.update(chunk)
+
+    def _sniff(self) -> None:
+        """根据文件头确定扩展名"""
+        self._sniffed = True
+        if is_html(self._head):
+            raise AttachmentRejectedError("附件链接返回的是 HTML 页面")
+        self.suffix = sniff_suffix(self._head, self.suffix)
+
+    def commit(self) -> Path:
+        """完成写入，移动到内容寻址路径（已存在相同内容时丢弃临时文件）"""
+        if not self._sniffed:
+            self._sniff()
+        self._file.close()
+        self.digest = self._hash.hexdigest()
+        self.path = self.store.path_for(self.digest, self.suffix)
+        if self.path.exists():
+            self.existed = True
+            self._tmp_path.unlink()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def discard(self) -> None:
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+class AttachmentStore:
+    """按 SHA-256 寻址的附件存储"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.tmp_dir = self.root / "tmp"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, digest: str, suffix: str = "") -> Path:
+        """摘要对应的存储路径"""
+        return self.objects_dir / digest[:2] / digest[2:4] / f"{digest}{suffix}"
+
+    @contextmanager
+    def writer(self, suffix: str = "", max_bytes: int | None = None) -> Iterator[StoredObject]:
+        """写入一个对象：正常退出时提交，出现异常（含 AttachmentRejectedError）时丢弃
+
+        suffix 为链接中的扩展名，文件头可识别时以识别结果为准。
+        """
+        obj = StoredObject(self, suffix.lower(), max_bytes)
+        try:
+            yield obj
+            obj.commit()
+        except BaseException:
+            obj.discard()
+            raise
@@ -0,0 +1,127 @@
+"""法规正文与附件文本的压缩编码
+
+每个值编码为 1 字节格式标记 + 压缩数据，读取时按标记解码，不同格式的数据可以共存：
+
+- ``z``：zlib（未安装 zstandard 时使用）
+- ``Z``：zstd
+- ``D``：zstd + 训练字典（帧头带字典 ID，字典保存在 body_dictionaries 表中）
+
+正文 HTML 来自少数几个页面模板，重复的标签和样式很多，
+用训练字典压缩单篇正文的效果明显好于逐篇单独压缩。
+"""
+import threading
+import zlib
+
+from app.config import settings
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，未安装时使用 zlib
+    zstandard = None
+
+ZLIB = b"z"
+ZSTD = b"Z"
+ZSTD_DICT = b"D"
+
+FORMAT_NAMES = {ZLIB: "zlib", ZSTD: "zstd", ZSTD_DICT: "zstd+dict"}
+
+
+class UnknownDictionaryError(LookupError):
+    """数据使用了尚未加载的压缩字典"""
+
+    def __init__(self, dict_id: int):
+        super().__init__(f"未加载的压缩字典: {dict_id}")
+        self.dict_id = dict_id
+
+
+class BodyCodec:
+    """正文编解码器（线程安全，压缩器和解压器按线程缓存）"""
+
+    def __init__(self, method: str = "auto", level: int = 9):
+        if method == "auto":
+            method = "zstd" if zstandard is not None else "zlib"
+        if method not in ("zstd", "zlib"):
+            raise ValueError(f"不支持的正文压缩方式: {method}")
+        if method == "zstd" and zstandard is None:
+            raise RuntimeError("body_compression=zstd 需要安装 zstandard 包: pip install zstandard")
+        self.method = method
+        self.level = level
+        self.active_dictionary: int | None = None
+        self._dictionaries: dict[int, zstandard.ZstdCompressionDict] = {}
+        self._local = threading.local()
+
+    def add_dictionary(self, dict_id: int, data: bytes, activate: bool = True) -> None:
+        """加载字典；activate 时之后的写入都使用该字典"""
+        if zstandard is None:
+            raise RuntimeError("压缩字典需要安装 zstandard 包: pip install zstandard")
+        self._dictionaries[dict_id] = zstandard.ZstdCompressionDict(data)
+        if activate and self.method == "zstd":
+            self.active_dictionary = dict_id
+
+    def has_dictionary(self, dict_id: int) -> bool:
+        return dict_id in self._dictionaries
+
+    def clear_dictionaries(self) -> None:
+        self._dictionaries.clear()
+        self.active_dictionary = None
+        self._local = threading.local()
+
+    def _cached(self, kind: str, dict_id: int | None):
+        cache = self._local.__dict__.setdefault(kind, {})
+        if dict_id not in cache:
+            options = {"dict_data": self._dictionaries[dict_id]} if dict_id is not None else {}
+            if kind == "compressor":
+                cache[dict_id] = zstandard.ZstdCompressor(level=self.level, **options)
+            else:
+                cache[dict_id] = zstandard.ZstdDecompressor(**options)
+        return cache[dict_id]
+
+    def encode(self, text: str | None) -> bytes | None:
+        """压缩文本（None 原样返回）"""
+        if text is None:
+            return None
+        raw = text.encode("utf-8")
+        if self.method == "zlib":
+            return ZLIB + zlib.compress(raw, min(self.level, 9))
+        if self.active_dictionary is not None:
+            return ZSTD_DICT + self._cached("compressor", self.active_dictionary).compress(raw)
+        return ZSTD + self._cached("compressor", None).compress(raw)
+
+    def decode(self, data: bytes | None) -> str | None:
+        """解压文本，字典未加载时抛出 UnknownDictionaryError"""
+        if data is None:
+            return None
+        data = bytes(data)  # PostgreSQL 的 bytea 读出为 memoryview
+        marker, payload = data[:1], data[1:]
+        if marker == ZLIB:
+            return zlib.decompress(payload).decode("utf-8")
+        if marker not in (ZSTD, ZSTD_DICT):
+            raise ValueError(f"未知的正文编码标记: {marker!r}")
+        if zstandard is None:
+            raise RuntimeError("读取 zstd 压缩的正文需要安装 zstandard 包: pip install zstandard")
+
+        dict_id = None
+        if marker == ZSTD_DICT:
+            dict_id = zstandard.get_frame_parameters(payload).dict_id
+            if dict_id not in self._dictionaries:
+                raise UnknownDictionaryError(dict_id)
+        return self._cached("decompressor", dict_id).decompress(payload).decode("utf-8")
+
+
+def train_dictionary(samples: list[bytes], size: int) -> tuple[int, bytes]:
+    """用样本训练 zstd 字典，返回 (字典 ID, 字典内容)"""
+    if zstandard is None:
+        raise RuntimeError("训练压缩字典需要安装 zstandard 包: pip install zstandard")
+    dictionary = zstandard.train_dictionary(size, samples)
+    return dictionary.dict_id(), dictionary.as_bytes()
+
+
+def format_name(data: bytes | None) -> str | None:
+    """编码后数据的格式名称（统计用）"""
+    if data is None:
+        return None
+    return FORMAT_NAMES.get(bytes(data[:1]), "unknown")
+
+
+# 全局编解码器
+body_codec = BodyCodec(settings.body_compression, settings.body_compression_level)
@@ -0,0 +1,202 @@
+"""法规正文存储：旧数据迁移、压缩字典训练、重新压缩和空间统计
+
+旧版本把 content / file_content 以文本形式直接存放在 laws 表中。
+migrate_law_bodies 把它们压缩后移到 law_bodies 表并清空旧列（应用启动时自动执行）；
+删除旧列不可逆，只由 scripts/compress_law_bodies.py 显式执行。
+空间要等 VACUUM（SQLite）或 VACUUM FULL（PostgreSQL）后才会真正归还。
+"""
+import logging
+import sqlite3
+from collections.abc import Callable
+
+from sqlalchemy import bindparam, func, inspect, text
+from sqlalchemy.orm import Session
+
+from app.models.law import (
+    BODY_FIELDS,
+    BodyDictionary,
+    LawBody,
+    decode_body,
+    encode_body,
+    upsert_bodies,
+)
+from app.services.body_codec import body_codec, format_name, train_dictionary
+from app.services.search import FTS_TABLE, PG_SEARCH_TABLE
+
+logger = logging.getLogger(__name__)
+
+Progress = Callable[[int], None] | None
+
+
+def legacy_body_columns(bind) -> list[str]:
+    """laws 表中仍然存在的旧版正文列"""
+    inspector = inspect(bind)
+    if not inspector.has_table("laws"):
+        return []
+    existing = {column["name"] for column in inspector.get_columns("laws")}
+    return [field for field in BODY_FIELDS if field in existing]
+
+
+def migrate_law_bodies(
+    db: Session, batch_size: int = 200, drop_columns: bool = False, progress: Progress = None
+) -> int:
+    """把 laws 表中内联的正文压缩后移到 law_bodies，返回迁移的条数
+
+    每批迁移后把原列置空并提交，中断后再次执行会从剩余的行继续。
+    drop_columns 为 True 时，全部迁移完成后删除旧列（数据库不支持 DROP COLUMN 时保留空列）。
+    """
+    columns = legacy_body_columns(db.get_bind())
+    if not columns:
+        return 0
+
+    select = text(
+        f"SELECT id, {', '.join(columns)} FROM laws "
+        f"WHERE {' OR '.join(f'{c} IS NOT NULL' for c in columns)} ORDER BY id LIMIT :limit"
+    )
+    clear = text(
+        f"UPDATE laws SET {', '.join(f'{c} = NULL' for c in columns)} WHERE id IN :ids"
+    ).bindparams(bindparam("ids", expanding=True))
+
+    total = 0
+    while True:
+        rows = db.execute(select, {"limit": batch_size}).mappings().all()
+        if not rows:
+            break
+        upsert_bodies(db, [{"law_id": row["id"], **encode_body(row)} for row in rows])
+        db.execute(clear, {"ids": [row["id"] for row in rows]})
+        db.commit()
+        total += len(rows)
+        if progress:
+            progress(total)
+
+    if total:
+        logger.info(f"已将 {total} 条法规的正文迁移到 law_bodies")
+    if drop_columns:
+        _drop_legacy_columns(db, columns)
+    return total
+
+
+def _drop_legacy_columns(db: Session, columns: list[str]) -> None:
+    bind = db.get_bind()
+    if bind.dialect.name == "sqlite" and sqlite3.sqlite_version_info < (3, 35, 0):
+        logger.warning(
+            f"SQLite {sqlite3.sqlite_version} 不支持 DROP COLUMN，保留已清空的旧列: {columns}"
+        )
+        return
+    for column in columns:
+        db.execute(text(f"ALTER TABLE laws DROP COLUMN {column}"))
+    db.commit()
+
+
+def train_body_dictionary(db: Session, samples: int = 2000, size: int = 64 * 1024) -> int:
+    """用最近入库的 samples 篇正文训练 zstd 字典并设为当前字典，返回字典 ID
+
+    只用正文 HTML 训练：页面模板的重复片段集中在正文里，附件文本之间的共性很少。
+    """
+    data = [
+        decode_body(db, row[0]).encode("utf-8")
+        for row in db.query(LawBody.content)
+        .filter(LawBody.content.isnot(None))
+        .order_by(LawBody.law_id.desc())
+        .limit(samples)
+    ]
+    dict_id, dictionary = train_dictionary(data, size)
+    db.merge(BodyDictionary(id=dict_id, data=dictionary, sample_count=len(data)))
+    db.commit()
+    body_codec.add_dictionary(dict_id, dictionary)
+    logger.info(f"压缩字典 {dict_id} 训练完成（{len(data)} 个样本，{len(dictionary)} 字节）")
+    return dict_id
+
+
+def recompress_law_bodies(db: Session, batch_size: int = 200, progress: Progress = None) -> int:
+    """用当前编码方式和字典重新压缩全部正文，返回处理的条数"""
+    total = 0
+    last_id = 0
+    while True:
+        bodies = (
+            db.query(LawBody)
+            .filter(LawBody.law_id > last_id)
+            .order_by(LawBody.law_id)
+            .limit(batch_size)
+            .all()
+        )
+        if not bodies:
+            return total
+        rows = [
+            {
+                "law_id": body.law_id,
+                **encode_body({
+                    field: decode_body(db, getattr(body, field)) for field in BODY_FIELDS
+                }),
+            }
+            for body in bodies
+        ]
+        last_id = bodies[-1].law_id
+        db.expunge_all()
+        upsert_bodies(db, rows)
+        db.commit()
+        total += len(rows)
+        if progress:
+            progress(total)
+
+
+def table_sizes(db: Session) -> dict[str, int]:
+    """laws、law_bodies 和全文索引表占用的字节数（含索引；SQLite 上含 FTS5 的各个影子表）
+
+    数据库不支持统计时返回空字典（SQLite 需在编译时启用 dbstat 虚拟表）。
+    """
+    sizes = {}
+    try:
+        if db.get_bind().dialect.name == "sqlite":
+            patterns = {"laws": "laws", "law_bodies": "law_bodies", FTS_TABLE: f"{FTS_TABLE}%"}
+            for table, pattern in patterns.items():
+                sizes[table] = db.execute(
+                    text(
+                        "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+                        "(SELECT name FROM sqlite_master WHERE tbl_name LIKE :pattern)"
+                    ),
+                    {"pattern": pattern},
+                ).scalar() or 0
+        else:
+            for table in ("laws", "law_bodies", PG_SEARCH_TABLE):
+                sizes[table] = db.execute(
+                    text("SELECT pg_total_relation_size(to_regclass(:name))"), {"name": table}
+                ).scalar() or 0
+    except Exception as e:
+        logger.warning(f"无法统计表占用空间: {e}")
+        db.rollback()
+        return {}
+    return sizes
+
+
+def body_size_report(db: Session) -> dict:
+    """正文存储的空间统计
+
+    原始大小、压缩后大小、各编码格式的条数，以及各表实际占用的空间（tables，见 table_sizes）。
+    """
+    rows, raw, stored = db.query(
+        func.count(LawBody.law_id),
+        func.coalesce(func.sum(LawBody.content_size), 0)
+        + func.coalesce(func.sum(LawBody.file_content_size), 0),
+        func.coalesce(func.sum(func.length(LawBody.content)), 0)
+        + func.coalesce(func.sum(func.length(LawBody.file_content)), 0),
+    ).one()
+
+    formats: dict[str, int] = {}
+    for field in (LawBody.content, LawBody.file_content):
+        marker = func.substr(field, 1, 1)
+        counts = db.query(marker, func.count()).filter(field.isnot(None)).group_by(marker)
+        for value, count in counts:
+            name = format_name(value)
+            formats[name] = formats.get(name, 0) + count
+
+    return {
+        "rows": rows,
+        "raw_bytes": int(raw),
+        "stored_bytes": int(stored),
+        "saved_bytes": int(raw) - int(stored),
+        "ratio": round(raw / stored, 2) if stored else None,
+        "formats": formats,
+        "dictionaries": db.query(func.count(BodyDictionary.id)).scalar(),
+        "tables": table_sizes(db),
+    }
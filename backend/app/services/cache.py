@@ -0,0 +1,107 @@
+"""读接口缓存后端
+
+默认使用进程内 LRU（带 TTL）；多 worker 部署时可切换到本机 Redis 兼容服务，
+让各进程共享同一份缓存。缓存键中带有数据版本号（见 app.models.state），
+数据写入后版本号递增，旧缓存项不再命中，随后被 LRU 淘汰或过期清理。
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """线程安全的 LRU 缓存，条目超过 ttl 秒后过期"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisCache:
+    """Redis 兼容服务缓存（值为 bytes，键为字符串）
+
+    Redis 不可用时只记录警告并按未命中处理，不影响接口正常返回。
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str = "laws:cache:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("cache_backend=redis 需要安装 redis 包: pip install redis") from e
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self._client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"读取 Redis 缓存失败: {e}")
+            return default
+        return default if value is None else value
+
+    def set(self, key: str, value: bytes) -> None:
+        try:
+            self._client.set(self.prefix + key, value, ex=max(int(self.ttl), 1))
+        except Exception as e:
+            logger.warning(f"写入 Redis 缓存失败: {e}")
+
+    def clear(self) -> None:
+        try:
+            keys = list(self._client.scan_iter(match=self.prefix + "*"))
+            if keys:
+                self._client.delete(*keys)
+        except Exception as e:
+            logger.warning(f"清空 Redis 缓存失败: {e}")
+
+
+def create_cache_backend(backend: str) -> Any | None:
+    """按配置创建缓存后端，"none" 表示不缓存"""
+    if backend == "memory":
+        return TTLCache(settings.cache_max_entries, settings.cache_ttl_seconds)
+    if backend == "redis":
+        return RedisCache(settings.cache_redis_url, settings.cache_ttl_seconds)
+    if backend == "none":
+        return None
+    raise ValueError(f"未知的缓存后端: {backend}")
+
+
+cache = create_cache_backend(settings.cache_backend)
@@ -0,0 +1,241 @@
+"""详情页并发抓取流水线
+
+列表页仍由调用方按顺序获取，每个条目依次经过：
+
+1. 详情线程池：请求详情页、提取标题/日期/正文/附件链接
+2. 附件线程池：下载并解析附件（没有附件的条目跳过此阶段）
+3. 写入：由调用方所在线程统一落库（数据库会话不跨线程共享），
+   结果先缓冲，每 crawler_write_batch_size 条批量写入一次
+
+在途条目数有上限，超过时调用方线程先写入已完成的结果再继续提交。
+传入 stop 事件时，每页列表开始前和每次批量写入前检查，置位后抛出 CrawlStoppedError。
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from app.config import settings
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlStoppedError(Exception):
+    """爬取被中止（stop 事件已置位）"""
+
+
+class CrawlStats:
+    """一次爬取任务的进度统计（可跨多个分类累计）"""
+
+    def __init__(self):
+        self.pages_total = 0
+        self.pages_done = 0
+        self.items_new = 0
+        self.items_updated = 0
+        self.items_failed = 0
+        self.items_skipped = 0
+        # 详情页提取命中情况："配置名/字段" -> {选择器: 次数}，未命中的选择器记为 "-"
+        self.extraction: dict[str, dict[str, int]] = {}
+        # 有站点配置但快速路径未命中、退回通用提取的页数
+        self.profile_misses = 0
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record_extraction(self, page, expected_profile: str | None = None) -> None:
+        """记录一次详情页提取使用的配置和选择器（详情线程中调用）"""
+        with self._lock:
+            if expected_profile and page.profile != expected_profile:
+                self.profile_misses += 1
+            for field, selector in page.selectors.items():
+                counts = self.extraction.setdefault(f"{page.profile}/{field}", {})
+                key = selector or "-"
+                counts[key] = counts.get(key, 0) + 1
+
+    @property
+    def throughput(self) -> float:
+        """每秒写入的条目数"""
+        elapsed = time.monotonic() - self._started
+        return (self.items_new + self.items_updated) / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        # 进度回调与详情线程并发执行，先在锁内复制命中统计再序列化
+        with self._lock:
+            extraction = {key: dict(counts) for key, counts in self.extraction.items()}
+            profile_misses = self.profile_misses
+        return {
+            "pages_total": self.pages_total,
+            "pages_done": self.pages_done,
+            "items_new": self.items_new,
+            "items_updated": self.items_updated,
+            "items_failed": self.items_failed,
+            "items_skipped": self.items_skipped,
+            "throughput": round(self.throughput, 3),
+            "profile_misses": profile_misses,
+            "extraction": json.dumps(extraction, ensure_ascii=False, sort_keys=True),
+        }
+
+
+class CrawlPipeline:
+    """单个分类的抓取流水线"""
+
+    def __init__(
+        self,
+        crawler,
+        category_name: str,
+        detail_workers: int | None = None,
+        attachment_workers: int | None = None,
+        stats: CrawlStats | None = None,
+        stop: threading.Event | None = None,
+    ):
+        self.crawler = crawler
+        self.category_name = category_name
+        self.detail_workers = detail_workers or settings.crawler_detail_workers
+        self.attachment_workers = attachment_workers or settings.crawler_attachment_workers
+        self.max_pending = (self.detail_workers + self.attachment_workers) * 2
+
+        self._detail_pool = ThreadPoolExecutor(
+            self.detail_workers, thread_name_prefix="crawler-detail"
+        )
+        self._attachment_pool = ThreadPoolExecutor(
+            self.attachment_workers, thread_name_prefix="crawler-attachment"
+        )
+        self._results: queue.Queue = queue.Queue()
+        self._pending = 0
+        self._buffer: list[dict] = []
+        self.batch_size = settings.crawler_write_batch_size
+
+        self.count = 0
+        self.failed = 0
+        self.stats = stats or CrawlStats()
+        self.stop = stop
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.drain()
+        finally:
+            self._detail_pool.shutdown(wait=True, cancel_futures=exc_type is not None)
+            self._attachment_pool.shutdown(wait=True, cancel_futures=exc_type is not None)
+        return False
+
+    def submit(self, item: dict) -> None:
+        """提交一个列表条目（API 返回的 contentList 元素）"""
+        if not item.get("pcUrl"):
+            return
+
+        while self._pending >= self.max_pending:
+            self._write(self._results.get())
+
+        self._pending += 1
+        self._dispatch(item)
+
+    def check_stopped(self) -> None:
+        """stop 事件已置位时抛出 CrawlStoppedError"""
+        if self.stop is not None and self.stop.is_set():
+            raise CrawlStoppedError("爬取已中止")
+
+    def drain(self) -> None:
+        """等待所有在途条目完成并写入"""
+        while self._pending > 0:
+            self._write(self._results.get())
+        self.flush()
+
+    def flush(self) -> None:
+        """批量写入缓冲中的结果"""
+        if not self._buffer:
+            return
+
+        self.check_stopped()
+        batch, self._buffer = self._buffer, []
+        try:
+            self._saved(self.crawler._save_laws(batch))
+            self.count += len(batch)
+            return
+        except Exception as e:
+            self.crawler.db.rollback()
+            logger.error(f"批量保存 {len(batch)} 条法规失败，改为逐条保存: {e}")
+
+        for law_data in batch:
+            try:
+                self._saved(self.crawler._save_laws([law_data]))
+                self.count += 1
+            except Exception as e:
+                self._failed()
+                self.crawler.db.rollback()
+                logger.error(f"保存法规失败: {law_data.get('title')}, 错误: {e}")
+
+    def _saved(self, result: tuple[int, int]) -> None:
+        created, updated = result
+        self.stats.items_new += created
+        self.stats.items_updated += updated
+        metrics.CRAWLER_ITEMS.labels(self.category_name, "new").inc(created)
+        metrics.CRAWLER_ITEMS.labels(self.category_name, "updated").inc(updated)
+
+    def _failed(self) -> None:
+        self.failed += 1
+        self.stats.items_failed += 1
+        metrics.CRAWLER_ITEMS.labels(self.category_name, "failed").inc()
+
+    def _dispatch(self, item: dict) -> None:
+        """开始处理一个条目，完成后结果放入结果队列"""
+        self._detail_pool.submit(self._detail_stage, item)
+
+    def _apply_api_date(self, item: dict, law_data: dict) -> None:
+        """如果 API 有日期但详情页没解析到，使用 API 的日期"""
+        fbsj = item.get("FBSJ", "")
+        api_date = self.crawler._parse_date(fbsj) if fbsj else None
+        if api_date and not law_data.get("publish_date"):
+            law_data["publish_date"] = api_date
+
+    def _detail_stage(self, item: dict) -> None:
+        """详情阶段（在详情线程池中执行）"""
+        try:
+            detail_url = urljoin(settings.crawler_base_url, item["pcUrl"])
+            law_data = self.crawler._crawl_detail_page(
+                detail_url, self.category_name, download_attachments=False
+            )
+            if not law_data:
+                self._results.put((item, None, None))
+                return
+
+            self._apply_api_date(item, law_data)
+
+            if law_data.get("file_url"):
+                self._attachment_pool.submit(self._attachment_stage, item, law_data)
+            else:
+                self._results.put((item, law_data, None))
+        except Exception as e:
+            self._results.put((item, None, e))
+
+    def _attachment_stage(self, item: dict, law_data: dict) -> None:
+        """附件阶段（在附件线程池中执行）"""
+        try:
+            self.crawler._attach(law_data)
+        except Exception as e:
+            logger.error(f"附件处理失败: {law_data['file_url']}, 错误: {e}")
+        self._results.put((item, law_data, None))
+
+    def _write(self, result: tuple) -> None:
+        """写入阶段（在调用方线程中执行）"""
+        item, law_data, error = result
+        self._pending -= 1
+
+        if error is not None:
+            self._failed()
+            logger.error(f"爬取详情页失败: {item.get('BT', 'unknown')}, 错误: {error}")
+            return
+        if not law_data:
+            # 详情页请求失败或提取不到标题（原因已在详情阶段记录日志）
+            self._failed()
+            return
+
+        self._buffer.append(law_data)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
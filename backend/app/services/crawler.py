@@ -1,63 +1,113 @@
 """爬虫服务"""
 import hashlib
 import logging
-import os
 import re
-import tempfile
+import threading
 import time
-import zipfile
+from collections.abc import Callable
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 from urllib.parse import urljoin, urlparse
 
-import pdfplumber
 import requests
 from bs4 import BeautifulSoup
-from docx import Document
 
 from app.config import settings
+from app.models.attachment import get_attachment_manifest, upsert_attachments
 from app.models.law import (
+    ATTACHMENT_FAILED,
+    ATTACHMENT_OK,
     Law,
-    create_law,
-    get_law_by_hash,
-    get_law_by_source_url,
-    update_law,
+    LawBody,
+    bulk_upsert_laws,
     create_crawl_log,
+    decode_body,
+    get_known_source_urls,
 )
+from app.services import metrics
+from app.services.attachment_parser import attachment_parser
+from app.services.attachment_store import AttachmentStore, StoredObject, check_declared_size
+from app.services.crawl_pipeline import CrawlPipeline, CrawlStats, CrawlStoppedError
+from app.services.extractor import extract_detail, profile_for
+from app.services.rate_limiter import HostRateLimiter
 
 logger = logging.getLogger(__name__)
 
+_DATE_PARTS_RE = re.compile(r"(\d{4})[年/-](\d{1,2})[月/-]?(\d{1,2})?")
+_LIST_DATE_RE = re.compile(r"(\d{4}[年/-]\d{1,2}[月/-]\d{1,2}[日]?|\d{4}-\d{2}-\d{2})")
+
+# 进程内共享的按主机限速器（多个爬虫实例共用同一配额）
+rate_limiter = HostRateLimiter(settings.crawler_rate_limit, settings.crawler_rate_burst)
+
 
 class CrawlerService:
     """爬虫服务类"""
 
-    def __init__(self, db):
+    HEADERS = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        ),
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+    }
+
+    def __init__(
+        self,
+        db,
+        progress: Callable[[CrawlStats], None] | None = None,
+        stop: threading.Event | None = None,
+    ):
+        """progress: 进度回调，每处理完一页列表调用一次
+        stop: 置位后在下一页列表或下一次批量写入前中止爬取（抛出 CrawlStoppedError）
+        """
         self.db = db
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-        })
+        self.stats = CrawlStats()
+        self.progress = progress
+        self.stop = stop
+        # 本次爬取失败的分类（crawl_category 不抛出异常，由调用方据此判断整体是否成功）
+        self.failed_categories: list[str] = []
+        self._local = threading.local()
         self.attachment_dir = settings.attachment_dir
-        self.attachment_dir.mkdir(parents=True, exist_ok=True)
-
-    def _request_with_retry(self, url: str, **kwargs) -> Optional[requests.Response]:
-        """带重试的请求"""
+        self.store = AttachmentStore(self.attachment_dir)
+        # 附件清单（file_url -> 条目），开始爬取分类时加载，只在写入线程中更新
+        self._manifest: dict[str, dict] = {}
+
+    @property
+    def session(self) -> requests.Session:
+        """当前线程的 HTTP 会话（requests.Session 不保证线程安全）"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.HEADERS)
+            self._local.session = session
+        return session
+
+    def _request_with_retry(
+        self, url: str, kind: str = "page", **kwargs
+    ) -> requests.Response | None:
+        """带重试的请求，kind 为指标中的请求类型（list / detail / attachment）"""
         kwargs.setdefault("timeout", settings.crawler_timeout)
 
         for attempt in range(settings.crawler_max_retries):
+            retry = attempt < settings.crawler_max_retries - 1
             try:
+                rate_limiter.acquire(url)
                 response = self.session.get(url, **kwargs)
                 response.raise_for_status()
-                # 修复编码问题：weain 网站返回 ISO-8859-1 但实际是 UTF-8
-                if response.encoding == 'ISO-8859-1' and response.apparent_encoding:
-                    response.encoding = response.apparent_encoding
+                metrics.record_crawler_attempt(kind, response.status_code, retry=False)
+                # 流式下载时不读取响应体（apparent_encoding 会读完整个响应体，绕过附件大小限制）
+                if not kwargs.get("stream"):
+                    metrics.CRAWLER_BYTES.labels(kind).inc(len(response.content))
+                    # 修复编码问题：weain 网站返回 ISO-8859-1 但实际是 UTF-8
+                    if response.encoding == 'ISO-8859-1' and response.apparent_encoding:
+                        response.encoding = response.apparent_encoding
                 return response
             except requests.RequestException as e:
+                metrics.record_crawler_attempt(kind, metrics.error_status(e), retry=retry)
                 logger.warning(f"请求失败 (尝试 {attempt + 1}/{settings.crawler_max_retries}): {url}, 错误: {e}")
-                if attempt < settings.crawler_max_retries - 1:
+                if retry:
                     time.sleep(settings.crawler_request_delay * (attempt + 1))
         return None
 
@@ -67,6 +117,7 @@ class CrawlerService:
 
         for attempt in range(settings.crawler_max_retries):
             try:
+                rate_limiter.acquire(url)
                 response = self.session.post(url, data=data, **kwargs)
                 response.raise_for_status()
                 return response
@@ -76,6 +127,7 @@ class CrawlerService:
                     time.sleep(settings.crawler_request_delay * (attempt + 1))
         return None
 
+    @metrics.timed(metrics.CRAWLER_STAGE, "list")
     def _fetch_list_via_api(self, lmid: str, page: int = 1) -> Optional[dict]:
         """通过 JSON API 获取列表数据"""
         params = {
@@ -83,7 +135,7 @@ class CrawlerService:
             "currentPage": page,
         }
 
-        response = self._request_with_retry(settings.crawler_api_url, params=params)
+        response = self._request_with_retry(settings.crawler_api_url, kind="list", params=params)
         if not response:
             return None
 
@@ -97,9 +149,8 @@ class CrawlerService:
             logger.error(f"解析 API 响应失败: {e}")
             return None
 
-    def _get_total_pages(self, lmid: str) -> int:
-        """获取分类的总页数"""
-        list_data = self._fetch_list_via_api(lmid, page=1)
+    def _get_total_pages(self, list_data: dict | None) -> int:
+        """根据第一页的列表数据计算分类的总页数"""
         if not list_data:
             return 0
 
@@ -142,7 +193,7 @@ class CrawlerService:
                 continue
 
         # 尝试提取年月日
-        match = re.search(r"(\d{4})[年/-](\d{1,2})[月/-]?(\d{1,2})?", date_str)
+        match = _DATE_PARTS_RE.search(date_str)
         if match:
             year, month = int(match.group(1)), int(match.group(2))
             day = int(match.group(3)) if match.group(3) else 1
@@ -153,8 +204,12 @@ class CrawlerService:
 
         return None
 
-    def crawl_category(self, category_name: str) -> int:
-        """爬取指定分类的法规（使用 API）"""
+    def crawl_category(self, category_name: str, incremental: bool = False) -> int:
+        """爬取指定分类的法规（使用 API）
+
+        incremental 为 True 时跳过库中已有的详情页（按 source_url 判断），
+        连续遇到 crawler_incremental_stop_after 条已知条目后停止翻页。
+        """
         category_code = settings.categories.get(category_name)
         lmid = settings.category_lmids.get(category_name)
 
@@ -162,93 +217,174 @@ class CrawlerService:
             logger.error(f"未知的分类或缺少 lmid: {category_name}")
             return 0
 
-        logger.info(f"开始爬取分类: {category_name}, lmid: {lmid}")
+        mode = "incremental" if incremental else "full"
+        logger.info(f"开始爬取分类: {category_name}, lmid: {lmid}, 模式: {mode}")
 
-        # 获取总页数
-        total_pages = self._get_total_pages(lmid)
+        # 获取总页数（第一页数据同时用于后续处理，避免重复请求）
+        first_page = self._fetch_list_via_api(lmid, page=1)
+        if first_page is None:
+            logger.error(f"分类 {category_name} 列表第一页获取失败")
+            self.failed_categories.append(category_name)
+            create_crawl_log(self.db, {
+                "category": category_name,
+                "status": "failed",
+                "mode": mode,
+                "count": 0,
+                "error_message": "列表第一页获取失败",
+            })
+            return 0
+        total_pages = self._get_total_pages(first_page)
         if total_pages == 0:
             logger.warning(f"分类 {category_name} 没有数据或无法获取页数")
             return 0
 
         logger.info(f"分类 {category_name} 共 {total_pages} 页")
+        self.stats.pages_total += total_pages
         total_count = 0
+        known_urls = get_known_source_urls(self.db, category_name) if incremental else set()
+        self._manifest = get_attachment_manifest(self.db)
+        consecutive_known = 0
+        skipped = 0
+        pipeline = self._create_pipeline(category_name)
 
         try:
-            # 遍历所有页面
-            for page in range(1, total_pages + 1):
-                logger.info(f"正在爬取第 {page}/{total_pages} 页...")
-
-                list_data = self._fetch_list_via_api(lmid, page)
-                if not list_data:
-                    logger.warning(f"第 {page} 页数据获取失败，跳过")
-                    continue
-
-                content_list = list_data.get("contentList", [])
-                if not content_list:
-                    logger.info(f"第 {page} 页没有数据，跳过")
-                    continue
+            # 列表页按顺序获取，详情页和附件交给流水线并发处理
+            with pipeline:
+                for page in range(1, total_pages + 1):
+                    pipeline.check_stopped()
+                    logger.info(f"正在爬取第 {page}/{total_pages} 页...")
+
+                    self._report_progress()
+                    list_data = first_page if page == 1 else self._fetch_list_via_api(lmid, page)
+                    self.stats.pages_done += 1
+                    if not list_data:
+                        logger.warning(f"第 {page} 页数据获取失败，跳过")
+                        continue
 
-                for item in content_list:
-                    try:
-                        # 构建 详情页 URL
-                        pc_url = item.get("pcUrl", "")
-                        if not pc_url:
-                            continue
-
-                        detail_url = urljoin(settings.crawler_base_url, pc_url)
-
-                        # 从 API 数据中获取日期
-                        fbsj = item.get("FBSJ", "")
-                        api_date = self._parse_date(fbsj) if fbsj else None
-
-                        # 爬取详情页
-                        law_data = self._crawl_detail_page(detail_url, category_name)
-                        if law_data:
-                            # 如果 API 有日期但详情页没解析到，使用 API 的日期
-                            if api_date and not law_data.get("publish_date"):
-                                law_data["publish_date"] = api_date
-
-                            # 检查是否已存在
-                            existing = get_law_by_hash(self.db, law_data["hash"])
-                            if existing:
-                                update_law(self.db, existing, law_data)
-                                logger.debug(f"更新法规: {law_data['title']}")
-                            else:
-                                create_law(self.db, law_data)
-                                logger.debug(f"新增法规: {law_data['title']}")
-                            total_count += 1
-
-                        # 详情页请求间隔
-                        time.sleep(settings.crawler_detail_delay)
-
-                    except Exception as e:
-                        logger.error(f"爬取详情页失败: {item.get('BT', 'unknown')}, 错误: {e}")
+                    content_list = list_data.get("contentList", [])
+                    if not content_list:
+                        logger.info(f"第 {page} 页没有数据，跳过")
                         continue
 
-                # 页面请求间隔
-                time.sleep(settings.crawler_request_delay)
+                    for item in content_list:
+                        pc_url = item.get("pcUrl", "")
+                        if incremental and pc_url:
+                            if urljoin(settings.crawler_base_url, pc_url) in known_urls:
+                                consecutive_known += 1
+                                skipped += 1
+                                self.stats.items_skipped += 1
+                                metrics.CRAWLER_ITEMS.labels(category_name, "skipped").inc()
+                                if consecutive_known >= settings.crawler_incremental_stop_after:
+                                    break
+                                continue
+                            consecutive_known = 0
+                        pipeline.submit(item)
+
+                    if incremental and consecutive_known >= settings.crawler_incremental_stop_after:
+                        logger.info(
+                            f"连续 {consecutive_known} 条已入库，"
+                            f"停止翻页（第 {page}/{total_pages} 页）"
+                        )
+                        break
+            total_count = pipeline.count
+            self._report_progress()
 
             # 记录爬取日志
             create_crawl_log(self.db, {
                 "category": category_name,
                 "status": "success",
+                "mode": mode,
                 "count": total_count,
                 "error_message": None,
             })
 
-            logger.info(f"分类 {category_name} 爬取完成，共 {total_count} 条")
+            logger.info(
+                f"分类 {category_name} 爬取完成，共 {total_count} 条，跳过已知 {skipped} 条"
+            )
 
+        except CrawlStoppedError:
+            raise
         except Exception as e:
             logger.error(f"爬取分类 {category_name} 失败: {e}")
+            self.failed_categories.append(category_name)
+            self.db.rollback()
             create_crawl_log(self.db, {
                 "category": category_name,
                 "status": "failed",
-                "count": total_count,
+                "mode": mode,
+                "count": pipeline.count,
                 "error_message": str(e),
             })
 
         return total_count
 
+    def _create_pipeline(self, category_name: str) -> CrawlPipeline:
+        """按 crawler_http_backend 配置创建抓取流水线"""
+        if settings.crawler_http_backend == "async":
+            from app.services.async_pipeline import AsyncCrawlPipeline
+
+            return AsyncCrawlPipeline(self, category_name, stats=self.stats, stop=self.stop)
+        return CrawlPipeline(self, category_name, stats=self.stats, stop=self.stop)
+
+    def _report_progress(self) -> None:
+        """回调当前进度（回调异常不影响爬取）"""
+        if self.progress is None:
+            return
+        try:
+            self.progress(self.stats)
+        except Exception as e:
+            logger.warning(f"进度回调失败: {e}")
+
+    @metrics.timed(metrics.CRAWLER_STAGE, "write")
+    def _save_laws(self, records: list[dict]) -> tuple[int, int]:
+        """批量保存爬取结果：已存在则更新，否则新增
+
+        附件清单与法规在同一事务中写入。
+        """
+        entries = [r["attachment"] for r in records if r.get("attachment")]
+        records = [{k: v for k, v in r.items() if k != "attachment"} for r in records]
+        self._fill_unchanged_attachments(records, entries)
+
+        upsert_attachments(self.db, entries)
+        created, updated = bulk_upsert_laws(self.db, records)
+        self._manifest.update((e["file_url"], e) for e in entries)
+        logger.debug(f"保存法规: 新增 {created} 条, 更新 {updated} 条")
+        return created, updated
+
+    def _fill_unchanged_attachments(self, records: list[dict], entries: list[dict]) -> None:
+        """为附件内容未变化的记录补上附件文本
+
+        文本依次取自同批记录、库中使用同一存储文件的记录，都没有时才重新解析。
+        """
+        unchanged = {e["file_path"] for e in entries if e["unchanged"]}
+        pending = [
+            r for r in records
+            if r.get("file_path") in unchanged and r.get("file_content") is None
+        ]
+        if not pending:
+            return
+
+        texts = {r["file_path"]: r["file_content"] for r in records if r.get("file_content")}
+        missing = {r["file_path"] for r in pending} - texts.keys()
+        if missing:
+            rows = (
+                self.db.query(Law.file_path, LawBody.file_content)
+                .join(LawBody, LawBody.law_id == Law.id)
+                .filter(Law.file_path.in_(missing), LawBody.file_content.isnot(None))
+            )
+            texts.update((path, decode_body(self.db, data)) for path, data in rows)
+
+        for record in pending:
+            path = record["file_path"]
+            if path not in texts:
+                try:
+                    texts[path] = self._parse_file_content(Path(path))
+                except Exception as e:
+                    logger.error(f"附件解析失败: {path}, 错误: {e}")
+                    record["attachment_status"] = ATTACHMENT_FAILED
+                    continue
+            record["file_content"] = texts[path]
+
     def _parse_list_page(self, soup: BeautifulSoup, base_url: str) -> list[dict]:
         """解析列表页，获取法规链接"""
         links = []
@@ -284,10 +420,7 @@ class CrawlerService:
             parent = item.parent
             if parent:
                 # 查找日期文本
-                date_match = re.search(
-                    r"(\d{4}[年/-]\d{1,2}[月/-]\d{1,2}[日]?|\d{4}-\d{2}-\d{2})",
-                    parent.get_text(),
-                )
+                date_match = _LIST_DATE_RE.search(parent.get_text())
                 if date_match:
                     date_str = date_match.group(1)
 
@@ -299,277 +432,154 @@ class CrawlerService:
 
         return links
 
-    def _crawl_detail_page(self, url: str, category: str) -> Optional[dict]:
-        """爬取详情页"""
-        response = self._request_with_retry(url)
+    @metrics.timed(metrics.CRAWLER_STAGE, "detail")
+    def _crawl_detail_page(
+        self, url: str, category: str, download_attachments: bool = True
+    ) -> dict | None:
+        """爬取详情页
+
+        download_attachments 为 False 时只记录附件链接，由调用方另行下载。
+        """
+        response = self._request_with_retry(url, kind="detail")
         if not response:
             return None
 
-        soup = BeautifulSoup(response.text, "lxml")
-
-        # 提取标题
-        title = self._extract_title(soup)
-        if not title:
+        law_data = self._parse_detail_page(response.text, url, category)
+        if law_data and download_attachments and law_data["file_url"]:
+            self._attach(law_data)
+        return law_data
+
+    @metrics.timed(metrics.CRAWLER_STAGE, "extract")
+    def _parse_detail_page(self, html: str, url: str, category: str) -> dict | None:
+        """解析详情页 HTML（只记录附件链接，不下载）"""
+        page = extract_detail(html, url)
+        profile = profile_for(url)
+        self.stats.record_extraction(page, profile.name if profile else None)
+        if not page.title:
             logger.warning(f"无法提取标题: {url}")
             return None
 
-        # 提取发布日期
-        publish_date = self._extract_publish_date(soup)
-
-        # 提取正文内容
-        content = self._extract_content(soup)
-
-        # 查找附件
-        file_url, file_path, file_content = self._process_attachments(soup, url, title)
-
-        # 计算哈希
-        content_hash = self._compute_hash(title, content)
-
         return {
-            "title": title,
+            "title": page.title,
             "category": category,
-            "publish_date": publish_date,
-            "content": content,
+            "publish_date": self._parse_date(page.publish_date) if page.publish_date else None,
+            "content": page.content,
             "source_url": url,
-            "file_url": file_url,
-            "file_path": file_path,
-            "file_content": file_content,
-            "hash": content_hash,
+            "file_url": page.file_url,
+            "file_path": None,
+            "file_content": None,
+            "attachment_status": None,
+            "hash": self._compute_hash(page.title, page.content),
         }
 
-    def _extract_title(self, soup: BeautifulSoup) -> Optional[str]:
-        """提取标题"""
-        # 尝试多种标题选择器（weain 网站优先）
-        selectors = [
-            "#nonSecretTitle",  # weain 网站标题
-            "h1",
-            "h2.title",
-            "h2",
-            ".article-title",
-            ".news-title",
-            ".content-title",
-            "title",
-        ]
-
-        for selector in selectors:
-            element = soup.select_one(selector)
-            if element:
-                title = element.get_text(strip=True)
-                # 清理标题
-                title = re.sub(r"\s+", " ", title)
-                title = re.sub(r"[-_|].*$", "", title)  # 移除网站名称后缀
-                if len(title) > 5:  # 标题至少要有一定长度
-                    return title.strip()
-
-        return None
-
-    def _extract_publish_date(self, soup: BeautifulSoup) -> Optional[datetime]:
-        """提取发布日期"""
-        # 在页面文本中查找日期
-        text = soup.get_text()
-        date_patterns = [
-            r"发布[日期时间：:\s]*(\d{4}[年/-]\d{1,2}[月/-]\d{1,2}[日]?)",
-            r"(\d{4}[年/-]\d{1,2}[月/-]\d{1,2}[日]?)",
-            r"(\d{4}-\d{2}-\d{2})",
-        ]
-
-        for pattern in date_patterns:
-            match = re.search(pattern, text)
-            if match:
-                return self._parse_date(match.group(1))
-
-        return None
-
-    def _extract_content(self, soup: BeautifulSoup) -> Optional[str]:
-        """提取正文内容"""
-        # 尝试多种内容容器选择器（weain 网站优先）
-        selectors = [
-            "div.txt#content",  # weain 网站正文
-            ".article-content",
-            ".news-content",
-            ".content",
-            ".article-body",
-            "#content",
-            "article",
-            ".TRS_Editor",
-            ".Custom_UnifyPE",
-        ]
-
-        for selector in selectors:
-            element = soup.select_one(selector)
-            if element:
-                # 清理内容
-                for tag in element.select("script, style, nav, header, footer"):
-                    tag.decompose()
-                return str(element)
-
-        # 如果没有找到，尝试获取所有段落
-        paragraphs = soup.find_all("p")
-        if paragraphs:
-            content = "\n".join(str(p) for p in paragraphs if p.get_text(strip=True))
-            if len(content) > 100:
-                return content
-
-        return None
-
-    def _process_attachments(self, soup: BeautifulSoup, base_url: str, title: str) -> tuple:
-        """处理附件"""
-        file_url = None
-        file_path = None
-        file_content = None
-
-        # 查找附件链接
-        attachment_extensions = [".pdf", ".doc", ".docx", ".xls", ".xlsx", ".zip", ".rar", ".7z", ".jpg", ".jpeg", ".png"]
-        attachment_links = []
-
-        # 优先查找 weain 网站的附件区域
-        enclosure = soup.select_one("#enclosureName a")
-        if enclosure and enclosure.get("href"):
-            attachment_links.append(urljoin(base_url, enclosure["href"]))
-
-        # 通用查找
-        for a in soup.find_all("a", href=True):
-            href = a["href"].lower()
-            if any(ext in href for ext in attachment_extensions):
-                full_url = urljoin(base_url, a["href"])
-                if full_url not in attachment_links:
-                    attachment_links.append(full_url)
-
-        if not attachment_links:
-            return file_url, file_path, file_content
-
-        # 处理第一个附件
-        file_url = attachment_links[0]
+    def _attach(self, law_data: dict) -> None:
+        """下载并解析 law_data 的附件，结果写回 law_data
 
+        下载或解析失败时 attachment_status 记为 failed，增量爬取会重新处理该条目。
+        """
         try:
-            # 下载附件
-            file_path, file_content = self._download_and_parse_attachment(file_url, title)
-            logger.info(f"附件处理完成: {file_path}")
+            entry = self._fetch_attachment(law_data["file_url"])
+            if entry is None:
+                raise RuntimeError("下载失败")
+            self._apply_attachment(law_data, entry)
         except Exception as e:
-            logger.error(f"附件处理失败: {file_url}, 错误: {e}")
-
-        return file_url, file_path, file_content
-
-    def _download_and_parse_attachment(self, url: str, title: str) -> tuple[Optional[str], Optional[str]]:
-        """下载并解析附件"""
-        response = self._request_with_retry(url, stream=True)
+            logger.error(f"附件处理失败: {law_data['file_url']}, 错误: {e}")
+            law_data["attachment_status"] = ATTACHMENT_FAILED
+            return
+
+        logger.info(f"附件处理完成: {law_data['file_path']}")
+
+    @metrics.timed(metrics.CRAWLER_STAGE, "download")
+    def _fetch_attachment(self, url: str) -> dict | None:
+        """下载附件到内容寻址存储，返回附件清单条目（下载失败返回 None）
+
+        清单中已有该链接时发送条件请求，304 时不下载。
+        超过 crawler_max_attachment_bytes 或返回 HTML 页面时抛出 AttachmentRejectedError。
+        """
+        response = self._request_with_retry(
+            url, kind="attachment", stream=True, headers=self._conditional_headers(url)
+        )
         if not response:
-            return None, None
-
-        # 获取文件名
-        parsed_url = urlparse(url)
-        filename = os.path.basename(parsed_url.path)
-        if not filename:
-            filename = f"{title[:50]}.dat"
-
-        # 清理文件名
-        filename = re.sub(r'[<>:"/\\|?*]', "_", filename)
-
-        # 确定存储目录（按年份）
-        year_dir = self.attachment_dir / str(datetime.now().year)
-        year_dir.mkdir(parents=True, exist_ok=True)
-
-        # 保存文件
-        file_path = year_dir / filename
-        with open(file_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-
-        # 解析文件内容
-        file_content = self._parse_file_content(file_path)
-
-        return str(file_path), file_content
-
-    def _parse_file_content(self, file_path: Path) -> Optional[str]:
-        """解析文件内容"""
-        suffix = file_path.suffix.lower()
-
-        try:
-            if suffix == ".pdf":
-                return self._parse_pdf(file_path)
-            elif suffix == ".docx":
-                return self._parse_docx(file_path)
-            elif suffix == ".doc":
-                # .doc 格式需要特殊处理，这里返回提示
-                logger.warning(f"不支持 .doc 格式，请手动转换: {file_path}")
-                return f"[.doc 格式文件，需手动查看: {file_path.name}]"
-            elif suffix == ".txt":
-                return file_path.read_text(encoding="utf-8", errors="ignore")
-            elif suffix in [".zip", ".rar", ".7z"]:
-                return self._parse_archive(file_path)
-            else:
-                logger.warning(f"不支持的文件格式: {suffix}")
-                return None
-        except Exception as e:
-            logger.error(f"解析文件失败 {file_path}: {e}")
             return None
 
-    def _parse_pdf(self, file_path: Path) -> Optional[str]:
-        """解析 PDF 文件"""
-        text_parts = []
-        try:
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        text_parts.append(text)
-        except Exception as e:
-            logger.error(f"PDF 解析失败: {e}")
-
-        return "\n".join(text_parts) if text_parts else None
-
-    def _parse_docx(self, file_path: Path) -> Optional[str]:
-        """解析 Word 文档"""
-        try:
-            doc = Document(file_path)
-            paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
-            return "\n".join(paragraphs)
-        except Exception as e:
-            logger.error(f"Word 解析失败: {e}")
-            return None
-
-    def _parse_archive(self, file_path: Path) -> Optional[str]:
-        """解析压缩包"""
-        extracted_texts = []
-
-        with tempfile.TemporaryDirectory() as temp_dir:
-            try:
-                if file_path.suffix.lower() == ".zip":
-                    with zipfile.ZipFile(file_path, "r") as zf:
-                        zf.extractall(temp_dir)
-                elif file_path.suffix.lower() == ".7z":
-                    import py7zr
-                    with py7zr.SevenZipFile(file_path, mode="r") as szf:
-                        szf.extractall(temp_dir)
-                elif file_path.suffix.lower() == ".rar":
-                    import rarfile
-                    with rarfile.RarFile(file_path, "r") as rf:
-                        rf.extractall(temp_dir)
-                else:
-                    return None
-
-                # 递归解析解压后的文件
-                for root, _, files in os.walk(temp_dir):
-                    for name in files:
-                        inner_path = Path(root) / name
-                        inner_text = self._parse_file_content(inner_path)
-                        if inner_text:
-                            extracted_texts.append(f"=== {name} ===\n{inner_text}")
-
-            except Exception as e:
-                logger.error(f"解压失败: {e}")
-                return None
-
-        return "\n\n".join(extracted_texts) if extracted_texts else None
-
-    def crawl_all(self) -> int:
-        """爬取所有分类"""
+        with response:
+            if response.status_code == 304:
+                return self._manifest_entry(url, response.headers, None)
+
+            max_bytes = settings.crawler_max_attachment_bytes
+            check_declared_size(response.headers, max_bytes)
+            with self.store.writer(self._attachment_suffix(url), max_bytes) as obj:
+                for chunk in response.iter_content(chunk_size=settings.crawler_download_chunk_size):
+                    obj.write(chunk)
+                    metrics.CRAWLER_BYTES.labels("attachment").inc(len(chunk))
+        return self._manifest_entry(url, response.headers, obj)
+
+    def _conditional_headers(self, url: str) -> dict:
+        """根据附件清单生成条件请求头（本地文件缺失时不发送）"""
+        known = self._manifest.get(url)
+        if not known or not Path(known["file_path"]).exists():
+            return {}
+
+        headers = {}
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+        return headers
+
+    def _manifest_entry(self, url: str, headers, obj: StoredObject | None) -> dict:
+        """生成附件清单条目；obj 为 None 表示服务器返回 304
+
+        unchanged 为 True 表示存储中已有相同内容（304、摘要未变或其他链接下载过），
+        此时不再解析，附件文本在写入时从已有记录中取。
+        """
+        known = self._manifest.get(url) or {}
+        if obj is None:
+            entry = {
+                **known,
+                "etag": headers.get("ETag") or known.get("etag"),
+                "last_modified": headers.get("Last-Modified") or known.get("last_modified"),
+                "unchanged": True,
+            }
+        else:
+            entry = {
+                "file_url": url,
+                "digest": obj.digest,
+                "file_path": str(obj.path),
+                "size": obj.size,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "unchanged": obj.existed,
+            }
+        entry["fetched_at"] = datetime.utcnow()
+        return entry
+
+    def _apply_attachment(self, law_data: dict, entry: dict) -> None:
+        """把附件清单条目写回 law_data，内容有变化时解析附件文本"""
+        law_data["file_path"] = entry["file_path"]
+        law_data["attachment"] = entry
+        if not entry["unchanged"]:
+            law_data["file_content"] = self._parse_file_content(
+                Path(entry["file_path"]), entry["digest"]
+            )
+        law_data["attachment_status"] = ATTACHMENT_OK
+
+    @staticmethod
+    def _attachment_suffix(url: str) -> str:
+        """链接中的扩展名（下载时会根据文件头修正，解析时按扩展名选择解析器）"""
+        return Path(urlparse(url).path).suffix.lower()
+
+    @metrics.timed(metrics.CRAWLER_STAGE, "parse")
+    def _parse_file_content(self, file_path: Path, digest: str | None = None) -> str | None:
+        """解析文件内容（在解析进程池中执行，结果按摘要缓存），失败时抛出 AttachmentParseError"""
+        return attachment_parser.parse(file_path, digest)
+
+    def crawl_all(self, incremental: bool = False) -> int:
+        """爬取所有分类（失败的分类记录在 failed_categories 中）"""
         total = 0
         for category_name in settings.categories.keys():
-            count = self.crawl_category(category_name)
+            count = self.crawl_category(category_name, incremental=incremental)
             total += count
-            # 分类之间的间隔
-            time.sleep(settings.crawler_request_delay * 2)
 
         logger.info(f"全部爬取完成，共 {total} 条法规")
         return total
@@ -0,0 +1,373 @@
+"""详情页提取（站点配置快速路径 + lxml 单次遍历）
+
+已知站点（按主机名匹配 :data:`SITE_PROFILES`）直接用预编译的 XPath
+取该站点的标题、正文和附件区域；未配置的站点、或快速路径没有取到
+标题/正文时（通常是站点改版），退回通用提取。
+
+通用提取只解析一次页面，遍历一遍元素树，同时收集：
+
+- 各候选标题/正文选择器按文档顺序的第一个命中元素
+- 第一个附件链接
+- 非空段落（正文选择器全部落空时的兜底）
+- 页面文本（用于查找发布日期）
+
+遍历结束后再按选择器优先级挑选结果，行为与原先逐个选择器
+在 BeautifulSoup 树上查找一致，但不再为每个选择器重复遍历全树。
+
+选择器只支持本模块用到的 CSS 子集：``tag``、``#id``、``.class``
+及其组合（如 ``div.txt#content``），以及一层后代关系（``#enclosureName a``）。
+
+每次提取都会记录使用的站点配置和各字段命中的选择器（:attr:`DetailPage.selectors`），
+爬取统计据此汇总，快速路径失效时可以及时发现。
+"""
+import logging
+import re
+from urllib.parse import urljoin, urlparse
+
+import lxml.html
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+_SIMPLE_SELECTOR_RE = re.compile(r"^([a-zA-Z][\w-]*)?((?:[#.][\w-]+)*)$")
+_SELECTOR_PART_RE = re.compile(r"([#.])([\w-]+)")
+
+_SPACE_RE = re.compile(r"\s+")
+_TITLE_SUFFIX_RE = re.compile(r"[-_|].*$")  # 网站名称后缀
+_PUBLISH_DATE_RE = re.compile(r"发布[日期时间：:\s]*(\d{4}[年/-]\d{1,2}[月/-]\d{1,2}[日]?)")
+_DATE_RE = re.compile(r"(\d{4}[年/-]\d{1,2}[月/-]\d{1,2}[日]?)")
+_ATTACHMENT_HREF_RE = re.compile(r"\.(?:pdf|doc|xls|zip|rar|7z|jpg|jpeg|png)", re.I)
+
+# 标题至少要有一定长度
+MIN_TITLE_LENGTH = 6
+# 段落兜底时正文的最小长度
+MIN_PARAGRAPH_CONTENT = 101
+
+# 正文中需要去掉的元素
+_CONTENT_STRIP_TAGS = ("script", "style", "nav", "header", "footer")
+
+# 通用提取的配置名
+GENERIC_PROFILE = "generic"
+
+
+class Selector:
+    """预编译的简单 CSS 选择器"""
+
+    def __init__(self, css: str):
+        self.css = css
+        parts = css.split()
+        if not 1 <= len(parts) <= 2:
+            raise ValueError(f"不支持的选择器: {css}")
+        self._ancestor = self._compile(parts[0]) if len(parts) == 2 else None
+        self._tag, self._id, self._classes = self._compile(parts[-1])
+
+        steps = [self._ancestor] if self._ancestor else []
+        steps.append((self._tag, self._id, self._classes))
+        self.xpath = etree.XPath("//" + "//".join(self._xpath_step(*step) for step in steps))
+
+    def __repr__(self):
+        return f"Selector({self.css!r})"
+
+    @staticmethod
+    def _compile(simple: str) -> tuple[str | None, str | None, tuple[str, ...]]:
+        match = _SIMPLE_SELECTOR_RE.match(simple)
+        if not match or simple in ("", "*"):
+            raise ValueError(f"不支持的选择器: {simple}")
+        element_id = None
+        classes = []
+        for kind, name in _SELECTOR_PART_RE.findall(match.group(2)):
+            if kind == "#":
+                element_id = name
+            else:
+                classes.append(name)
+        tag = match.group(1).lower() if match.group(1) else None
+        return tag, element_id, tuple(classes)
+
+    @staticmethod
+    def _xpath_step(tag, element_id, classes) -> str:
+        step = tag or "*"
+        if element_id is not None:
+            step += f"[@id='{element_id}']"
+        for name in classes:
+            step += f"[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]"
+        return step
+
+    def first(self, root):
+        """文档顺序中第一个匹配的元素"""
+        found = self.xpath(root)
+        return found[0] if found else None
+
+    @staticmethod
+    def _match_simple(element, tag, element_id, classes) -> bool:
+        if tag is not None and element.tag != tag:
+            return False
+        if element_id is not None and element.get("id") != element_id:
+            return False
+        if classes:
+            names = (element.get("class") or "").split()
+            return all(name in names for name in classes)
+        return True
+
+    def matches(self, element) -> bool:
+        if not self._match_simple(element, self._tag, self._id, self._classes):
+            return False
+        if self._ancestor is None:
+            return True
+        return any(
+            self._match_simple(parent, *self._ancestor) for parent in element.iterancestors()
+        )
+
+
+TITLE_SELECTORS = tuple(Selector(css) for css in (
+    "h1",
+    "h2.title",
+    "h2",
+    ".article-title",
+    ".news-title",
+    ".content-title",
+    "title",
+))
+
+CONTENT_SELECTORS = tuple(Selector(css) for css in (
+    ".article-content",
+    ".news-content",
+    ".content",
+    ".article-body",
+    "#content",
+    "article",
+    ".TRS_Editor",
+    ".Custom_UnifyPE",
+))
+
+_HREF_XPATH = etree.XPath("//a/@href")
+_STRIP_XPATH = etree.XPath(" | ".join(f"descendant::{tag}" for tag in _CONTENT_STRIP_TAGS))
+
+
+class SiteProfile:
+    """站点提取配置：该站点标题、正文、附件链接的选择器"""
+
+    def __init__(
+        self, name: str, hosts: tuple[str, ...], title: str, content: str, attachment: str
+    ):
+        self.name = name
+        self.hosts = hosts
+        self.title = Selector(title)
+        self.content = Selector(content)
+        self.attachment = Selector(attachment)
+
+
+SITE_PROFILES = (
+    SiteProfile(
+        "weain",
+        hosts=("www.weain.mil.cn", "weain.mil.cn"),
+        title="#nonSecretTitle",
+        content="div.txt#content",
+        attachment="#enclosureName a",
+    ),
+)
+
+_PROFILES_BY_HOST = {host: profile for profile in SITE_PROFILES for host in profile.hosts}
+
+
+def register_profile(profile: SiteProfile, *hosts: str) -> None:
+    """注册站点配置；传入 hosts 时把这些主机名也映射到该配置（如测试用的本地主机）"""
+    for host in hosts or profile.hosts:
+        _PROFILES_BY_HOST[host.lower()] = profile
+
+
+def profile_for(url: str) -> SiteProfile | None:
+    """按 URL 的主机名查找站点配置"""
+    return _PROFILES_BY_HOST.get((urlparse(url).hostname or "").lower())
+
+
+class DetailPage:
+    """详情页提取结果（publish_date 为页面中的原始日期文本）
+
+    profile 为实际使用的配置名，selectors 记录标题/正文/附件各自命中的选择器
+    （未命中为 None，正文用段落兜底时为 "p"）。
+    """
+
+    def __init__(
+        self,
+        title: str | None,
+        publish_date: str | None,
+        content: str | None,
+        file_url: str | None,
+        profile: str = GENERIC_PROFILE,
+        selectors: dict | None = None,
+    ):
+        self.title = title
+        self.publish_date = publish_date
+        self.content = content
+        self.file_url = file_url
+        self.profile = profile
+        self.selectors = selectors or {"title": None, "content": None, "attachment": None}
+
+
+def parse_html(html: str):
+    """解析 HTML，失败（如空文档）时返回 None"""
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # 带 encoding 声明的 XML 文档不能以 str 形式解析
+        try:
+            return lxml.html.document_fromstring(html.encode("utf-8"))
+        except (ValueError, etree.ParserError):
+            return None
+    except etree.ParserError:
+        return None
+
+
+def element_text(element) -> str:
+    """元素内各段文本去空白后拼接（同 BeautifulSoup 的 get_text(strip=True)）"""
+    return "".join(piece.strip() for piece in element.itertext())
+
+
+def _to_html(element) -> str:
+    return lxml.html.tostring(element, encoding="unicode", with_tail=False)
+
+
+def clean_title(element) -> str | None:
+    """从元素中取出标题，过短时返回 None"""
+    title = _SPACE_RE.sub(" ", element_text(element))
+    title = _TITLE_SUFFIX_RE.sub("", title).strip()
+    return title if len(title) >= MIN_TITLE_LENGTH else None
+
+
+def clean_content(element) -> str:
+    """去除脚本、导航等元素后输出正文 HTML"""
+    for tag in _STRIP_XPATH(element):
+        tag.drop_tree()
+    return _to_html(element)
+
+
+def find_publish_date(text: str) -> str | None:
+    """在页面文本中查找发布日期，优先匹配“发布日期”字样后的日期"""
+    match = _PUBLISH_DATE_RE.search(text) or _DATE_RE.search(text)
+    return match.group(1) if match else None
+
+
+def is_attachment_href(href: str) -> bool:
+    return bool(_ATTACHMENT_HREF_RE.search(href))
+
+
+def _first_title(elements: list) -> tuple[str | None, str | None]:
+    for selector, element in zip(TITLE_SELECTORS, elements, strict=True):
+        if element is not None:
+            title = clean_title(element)
+            if title:
+                return title, selector.css
+    return None, None
+
+
+def _paragraph_content(paragraphs: list) -> str | None:
+    content = "\n".join(_to_html(p) for p in paragraphs if element_text(p))
+    return content if len(content) >= MIN_PARAGRAPH_CONTENT else None
+
+
+def extract_detail(html: str, base_url: str) -> DetailPage:
+    """提取详情页的标题、发布日期、正文和第一个附件链接"""
+    root = parse_html(html)
+    if root is None:
+        return DetailPage(None, None, None, None)
+
+    profile = profile_for(base_url)
+    if profile is not None:
+        page = _extract_with_profile(root, base_url, profile)
+        if page is not None:
+            return page
+        logger.warning(f"站点配置 {profile.name} 未命中，改用通用提取: {base_url}")
+    return _extract_generic(root, base_url)
+
+
+def _extract_with_profile(root, base_url: str, profile: SiteProfile) -> DetailPage | None:
+    """快速路径：标题和正文都命中时返回结果，否则返回 None"""
+    title_element = profile.title.first(root)
+    title = clean_title(title_element) if title_element is not None else None
+    content_element = profile.content.first(root)
+    if not title or content_element is None:
+        return None
+
+    # 日期在正文之外，需在清理正文前取页面文本
+    publish_date = find_publish_date("".join(root.itertext()))
+    content = clean_content(content_element)
+
+    selectors = {"title": profile.title.css, "content": profile.content.css, "attachment": None}
+    link = next((a for a in profile.attachment.xpath(root) if a.get("href")), None)
+    if link is not None:
+        href = link.get("href")
+        selectors["attachment"] = profile.attachment.css
+    else:
+        href = next((h for h in _HREF_XPATH(root) if is_attachment_href(h)), None)
+        if href:
+            selectors["attachment"] = "a[href]"
+
+    return DetailPage(
+        title=title,
+        publish_date=publish_date,
+        content=content,
+        file_url=urljoin(base_url, href) if href else None,
+        profile=profile.name,
+        selectors=selectors,
+    )
+
+
+def _extract_generic(root, base_url: str) -> DetailPage:
+    """通用提取：单次遍历，按选择器优先级挑选结果"""
+    titles = [None] * len(TITLE_SELECTORS)
+    contents = [None] * len(CONTENT_SELECTORS)
+    attachment_href = None
+    paragraphs = []
+
+    # 日期按文档顺序在页面文本中查找，需在清理正文前取
+    publish_date = find_publish_date("".join(root.itertext()))
+
+    for element in root.iter():
+        tag = element.tag
+        if not isinstance(tag, str):  # 注释、处理指令
+            continue
+
+        for index, selector in enumerate(TITLE_SELECTORS):
+            if titles[index] is None and selector.matches(element):
+                titles[index] = element
+        for index, selector in enumerate(CONTENT_SELECTORS):
+            if contents[index] is None and selector.matches(element):
+                contents[index] = element
+
+        if tag == "p":
+            paragraphs.append(element)
+        elif tag == "a" and attachment_href is None:
+            href = element.get("href")
+            if href and is_attachment_href(href):
+                attachment_href = href
+
+    title, title_selector = _first_title(titles)
+    selectors = {"title": title_selector, "content": None, "attachment": None}
+
+    matched = next(
+        (
+            (sel, e)
+            for sel, e in zip(CONTENT_SELECTORS, contents, strict=True)
+            if e is not None
+        ),
+        None,
+    )
+
+    if matched is not None:
+        selectors["content"] = matched[0].css
+        content = clean_content(matched[1])
+    else:
+        content = _paragraph_content(paragraphs)
+        if content:
+            selectors["content"] = "p"
+
+    if attachment_href:
+        selectors["attachment"] = "a[href]"
+
+    return DetailPage(
+        title=title,
+        publish_date=publish_date,
+        content=content,
+        file_url=urljoin(base_url, attachment_href) if attachment_href else None,
+        selectors=selectors,
+    )
@@ -0,0 +1,51 @@
+"""根据文件头（magic bytes）识别附件类型
+
+附件链接的扩展名并不可靠（如 download.do?id=...，或 .pdf 链接返回了错误页），
+下载时根据前几个字节确定实际格式，解析时据此选择解析器。
+"""
+import mimetypes
+
+# 识别所需的文件头长度
+HEAD_SIZE = 2048
+
+_OOXML_SUFFIXES = {".docx", ".xlsx", ".pptx"}
+_OLE2_SUFFIXES = {".doc", ".xls", ".ppt"}
+
+_MIME_TYPES = {
+    ".pdf": "application/pdf",
+    ".doc": "application/msword",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".zip": "application/zip",
+    ".7z": "application/x-7z-compressed",
+    ".rar": "application/vnd.rar",
+    ".txt": "text/plain; charset=utf-8",
+}
+
+
+def is_html(head: bytes) -> bool:
+    """是否为 HTML 页面（常见于附件链接失效时返回的错误页）"""
+    start = head[:512].lstrip().lower()
+    return start.startswith((b"<!doctype html", b"<html", b"<head", b"<body"))
+
+
+def sniff_suffix(head: bytes, fallback: str = "") -> str:
+    """根据文件头返回扩展名，无法识别时返回 fallback（通常是链接中的扩展名）"""
+    if b"%PDF-" in head[:1024]:
+        return ".pdf"
+    if head.startswith(b"PK\x03\x04"):
+        if fallback in _OOXML_SUFFIXES:
+            return fallback
+        return ".docx" if b"word/" in head else ".zip"
+    if head.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"):
+        return fallback if fallback in _OLE2_SUFFIXES else ".doc"
+    if head.startswith(b"7z\xbc\xaf\x27\x1c"):
+        return ".7z"
+    if head.startswith(b"Rar!\x1a\x07"):
+        return ".rar"
+    return fallback
+
+
+def mime_type(suffix: str) -> str | None:
+    """扩展名对应的 MIME 类型"""
+    suffix = suffix.lower()
+    return _MIME_TYPES.get(suffix) or mimetypes.types_map.get(suffix)
@@ -0,0 +1,173 @@
+"""后台爬取任务
+
+手动触发和定时触发的爬取都以任务形式执行：提交时写入 crawl_jobs 并返回任务 ID，
+实际爬取在后台线程中进行，进度随每页列表写回任务记录。
+
+同一时间只允许一个爬取任务运行，互斥通过数据库中的租约锁（job_locks）实现，
+对多个 uvicorn worker 或多个进程同样有效；运行期间由心跳线程定期续期，
+进程异常退出后租约到期，下一个任务即可接管并将遗留任务标记为失败。
+续期时发现锁已被接管，或续期持续失败直到租约到期，则中止本次爬取并将任务标记为失败。
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.job import (
+    ACTIVE_STATUSES,
+    CRAWL_LOCK,
+    JOB_FAILED,
+    JOB_RUNNING,
+    JOB_SUCCESS,
+    CrawlJob,
+    update_crawl_job,
+)
+from app.models.law import create_crawl_log
+from app.models.state import acquire_lock, refresh_lock, release_lock
+from app.services.crawl_pipeline import CrawlStats
+
+logger = logging.getLogger(__name__)
+
+# 任务在本进程内的执行线程（跨进程互斥由锁保证）
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="crawl-job")
+
+
+class CrawlAlreadyRunningError(Exception):
+    """已有爬取任务在运行"""
+
+
+def create_crawl_job(db, category: str | None, incremental: bool) -> CrawlJob:
+    """获取爬取锁并创建任务记录，已有任务运行时抛出 CrawlAlreadyRunningError"""
+    job_id = uuid.uuid4().hex
+    if not acquire_lock(db, CRAWL_LOCK, job_id, settings.crawl_lock_ttl_seconds):
+        raise CrawlAlreadyRunningError("爬取任务正在进行中")
+
+    # 能拿到锁说明之前的任务已结束或其进程已退出，遗留的未完成任务标记为失败
+    now = datetime.utcnow()
+    db.query(CrawlJob).filter(CrawlJob.status.in_(ACTIVE_STATUSES)).update(
+        {"status": JOB_FAILED, "error_message": "任务中断", "finished_at": now, "updated_at": now},
+        synchronize_session=False,
+    )
+
+    job = CrawlJob(
+        id=job_id,
+        category=category or "全部",
+        mode="incremental" if incremental else "full",
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def submit_crawl_job(db, category: str | None = None, incremental: bool = False) -> CrawlJob:
+    """提交爬取任务，立即返回任务记录"""
+    job = create_crawl_job(db, category, incremental)
+    _executor.submit(run_crawl_job, job.id, category, incremental)
+    logger.info(f"已提交爬取任务 {job.id}（{job.category}，{job.mode}）")
+    return job
+
+
+class _Heartbeat(threading.Thread):
+    """定期续期爬取锁，失去锁时置位 lost"""
+
+    def __init__(self, job_id: str):
+        super().__init__(name=f"crawl-heartbeat-{job_id[:8]}", daemon=True)
+        self.job_id = job_id
+        self.lost = threading.Event()
+        self._stopped = threading.Event()
+
+    def run(self):
+        ttl = settings.crawl_lock_ttl_seconds
+        renewed_at = time.monotonic()
+        with SessionLocal() as db:
+            while not self._stopped.wait(ttl / 3):
+                try:
+                    if refresh_lock(db, CRAWL_LOCK, self.job_id, ttl):
+                        renewed_at = time.monotonic()
+                        continue
+                    logger.error(f"爬取任务 {self.job_id} 的锁已被其他进程接管，中止爬取")
+                except Exception as e:
+                    db.rollback()
+                    if time.monotonic() - renewed_at < ttl:
+                        logger.warning(f"续期爬取锁失败: {e}")
+                        continue
+                    logger.error(f"爬取任务 {self.job_id} 的锁续期失败直至租约到期，中止爬取: {e}")
+                self.lost.set()
+                return
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def run_crawl_job(job_id: str, category: str | None, incremental: bool) -> int:
+    """执行爬取任务（调用方须已通过 create_crawl_job 持有锁），返回爬取条数"""
+    from app.services.crawler import CrawlerService
+
+    db = SessionLocal()
+    job_db = SessionLocal()
+    heartbeat = _Heartbeat(job_id)
+    heartbeat.start()
+    mode = "incremental" if incremental else "full"
+    count = 0
+
+    def on_progress(stats: CrawlStats) -> None:
+        update_crawl_job(job_db, job_id, stats.to_dict())
+
+    try:
+        update_crawl_job(job_db, job_id, {"status": JOB_RUNNING, "started_at": datetime.utcnow()})
+        crawler = CrawlerService(db, progress=on_progress, stop=heartbeat.lost)
+        if category:
+            count = crawler.crawl_category(category, incremental=incremental)
+        else:
+            count = crawler.crawl_all(incremental=incremental)
+        # 分类失败不会抛出异常；有分类失败时任务和“全部”日志都记为失败，
+        # 以免 needs_full_resync 把失败的全量同步当作已完成
+        error = None
+        if crawler.failed_categories:
+            error = f"分类爬取失败: {', '.join(crawler.failed_categories)}"
+        if not category:
+            create_crawl_log(db, {
+                "category": "全部",
+                "status": "failed" if error else "success",
+                "mode": mode,
+                "count": count,
+                "error_message": error,
+            })
+        update_crawl_job(job_db, job_id, {
+            **crawler.stats.to_dict(),
+            "status": JOB_FAILED if error else JOB_SUCCESS,
+            "error_message": error,
+            "finished_at": datetime.utcnow(),
+        })
+        suffix = f"（{error}）" if error else ""
+        logger.info(f"爬取任务 {job_id} 完成，共 {count} 条法规{suffix}")
+
+    except Exception as e:
+        error = "爬取锁已失效，任务中止" if heartbeat.lost.is_set() else str(e)
+        logger.error(f"爬取任务 {job_id} 失败: {error}")
+        db.rollback()
+        job_db.rollback()
+        create_crawl_log(db, {
+            "category": category or "全部",
+            "status": "failed",
+            "mode": mode,
+            "count": 0,
+            "error_message": error,
+        })
+        update_crawl_job(job_db, job_id, {
+            "status": JOB_FAILED,
+            "error_message": error,
+            "finished_at": datetime.utcnow(),
+        })
+    finally:
+        heartbeat.stop()
+        release_lock(job_db, CRAWL_LOCK, job_id)
+        db.close()
+        job_db.close()
+    return count
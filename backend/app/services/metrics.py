@@ -0,0 +1,155 @@
+"""Prometheus 指标
+
+- 接口：按路由模板统计的请求数和耗时（见 app.api.metrics.MetricsMiddleware）
+- 数据库：按语句类型统计的查询耗时（SQLAlchemy 游标执行事件）
+- 爬虫：按类型和状态码统计的请求数、重试次数、下载字节数、各阶段耗时，
+  以及按分类统计的新增/更新/跳过/失败条目数
+
+需要安装 prometheus_client；未安装或 metrics_enabled=false 时所有指标为空操作，也不注册 /metrics。
+
+多 worker 部署时，启动前设置环境变量 PROMETHEUS_MULTIPROC_DIR 指向一个空目录
+（每次部署前清空），各进程把指标写入该目录下的内存映射文件，
+/metrics 由 MultiProcessCollector 汇总所有进程的数据，不论请求落在哪个 worker 上。
+"""
+import functools
+import logging
+import os
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # 可选依赖
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+enabled = settings.metrics_enabled and prometheus_client is not None
+if settings.metrics_enabled and prometheus_client is None:
+    logger.info("未安装 prometheus_client，指标统计已关闭")
+
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# 统计耗时的 SQL 语句类型，其余记为 other
+SQL_OPERATIONS = ("select", "insert", "update", "delete", "with")
+
+
+class _NullMetric:
+    """未启用指标时的空操作对象"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+def _counter(name: str, documentation: str, labelnames: tuple):
+    if not enabled:
+        return _NullMetric()
+    return prometheus_client.Counter(name, documentation, labelnames)
+
+
+def _histogram(name: str, documentation: str, labelnames: tuple, buckets=None):
+    if not enabled:
+        return _NullMetric()
+    buckets = buckets or prometheus_client.Histogram.DEFAULT_BUCKETS
+    return prometheus_client.Histogram(name, documentation, labelnames, buckets=buckets)
+
+
+HTTP_REQUESTS = _counter("http_requests_total", "接口请求数", ("method", "route", "status"))
+HTTP_LATENCY = _histogram(
+    "http_request_duration_seconds", "接口请求耗时（秒）", ("method", "route")
+)
+DB_QUERY_LATENCY = _histogram(
+    "db_query_duration_seconds", "数据库语句执行耗时（秒）", ("operation",), buckets=DB_BUCKETS
+)
+
+CRAWLER_REQUESTS = _counter(
+    "crawler_http_requests_total", "爬虫 HTTP 请求数（按每次尝试计）", ("kind", "status")
+)
+
+CRAWLER_RETRIES = _counter("crawler_http_retries_total", "爬虫 HTTP 请求重试次数", ("kind",))
+CRAWLER_BYTES = _counter("crawler_downloaded_bytes_total", "爬虫下载的字节数", ("kind",))
+CRAWLER_STAGE = _histogram(
+    "crawler_stage_duration_seconds", "爬虫各阶段耗时（秒）", ("stage",), buckets=STAGE_BUCKETS
+)
+CRAWLER_ITEMS = _counter("crawler_items_total", "爬虫处理的条目数", ("category", "result"))
+
+
+def record_crawler_attempt(kind: str, status, retry: bool) -> None:
+    """记录一次爬虫请求尝试：status 为状态码，没有响应时为 error；retry 表示之后还会重试"""
+    CRAWLER_REQUESTS.labels(kind, str(status)).inc()
+    if retry:
+        CRAWLER_RETRIES.labels(kind).inc()
+
+
+def error_status(error: Exception):
+    """请求异常对应的状态码标签（HTTP 错误取响应状态码，连接错误等为 error）"""
+    response = getattr(error, "response", None)
+    return response.status_code if response is not None else "error"
+
+
+def timed(histogram, *labels):
+    """统计函数耗时的装饰器"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.labels(*labels).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    words = statement.split(None, 1)
+    operation = words[0].lower() if words else ""
+    DB_QUERY_LATENCY.labels(operation if operation in SQL_OPERATIONS else "other").observe(
+        time.perf_counter() - started
+    )
+
+
+def instrument_db_queries() -> None:
+    """统计所有引擎（含异步引擎内部的同步引擎）的语句执行耗时"""
+    if not enabled or event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def multiprocess_dir():
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+def render() -> tuple[bytes, str]:
+    """生成文本格式的指标（多进程模式下汇总所有进程），返回 (内容, Content-Type)"""
+    registry = prometheus_client.REGISTRY
+    if multiprocess_dir():
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """进程退出时清理多进程模式下该进程的实时数据"""
+    if enabled and multiprocess_dir():
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,284 @@
+"""请求与查询性能分析（默认全部关闭）
+
+- 慢查询日志：slow_query_ms > 0 时，执行超过阈值的语句连同执行计划
+  （SQLite 为 EXPLAIN QUERY PLAN，PostgreSQL 为 EXPLAIN）写入日志
+- Server-Timing：server_timing=true 时响应带 Server-Timing 头，
+  给出本次请求的数据库耗时、序列化耗时和总耗时（浏览器开发者工具中可直接查看）
+- 按需采样分析：配置 profiler_token 后，带 X-Profile-Token 请求头的请求被采样分析，
+  结果保存到 profile_dir（安装了 pyinstrument 时为 HTML，否则为 cProfile 的 .prof 文件，
+  可用 snakeviz 等工具查看火焰图）。run_read 的查询仍在线程池中执行，
+  由工作线程上的分析器单独采样后并入结果，不会阻塞事件循环
+
+关闭时不注册数据库事件，也不添加中间件（见 app.main），没有额外开销。
+"""
+import contextvars
+import cProfile
+import logging
+import pstats
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+try:
+    import pyinstrument
+    from pyinstrument.renderers import HTMLRenderer
+    from pyinstrument.session import Session as ProfileSession
+except ImportError:  # 可选依赖
+    pyinstrument = None
+
+logger = logging.getLogger(__name__)
+
+# 只对这些语句获取执行计划
+EXPLAIN_OPERATIONS = ("select", "with")
+# 日志中语句参数的最大长度
+MAX_PARAMS_LOG_LENGTH = 300
+
+
+class RequestTiming:
+    """单个请求的分段耗时（秒）"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.serialize: float | None = None
+
+    def header(self) -> str:
+        """Server-Timing 头的值（毫秒）"""
+        parts = [f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"']
+        if self.serialize is not None:
+            parts.append(f"serialize;dur={self.serialize * 1000:.1f}")
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+# 当前请求的耗时记录；线程池中执行的查询复制了上下文，记录的是同一个对象
+_timing: contextvars.ContextVar[RequestTiming | None] = contextvars.ContextVar(
+    "request_timing", default=None
+)
+# 当前请求的采样分析器（未被采样时为 None）
+_profiler: contextvars.ContextVar[Optional["RequestProfiler"]] = contextvars.ContextVar(
+    "request_profiler", default=None
+)
+
+
+def start_timing() -> tuple[RequestTiming, contextvars.Token]:
+    timing = RequestTiming()
+    return timing, _timing.set(timing)
+
+
+def stop_timing(token: contextvars.Token) -> None:
+    _timing.reset(token)
+
+
+@contextmanager
+def timed_serialize():
+    """统计响应序列化耗时（未开启 Server-Timing 时不计时）"""
+    timing = _timing.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.serialize = (timing.serialize or 0.0) + time.perf_counter() - started
+
+
+def profiling_active() -> bool:
+    """当前请求是否正在被采样分析"""
+    return _profiler.get() is not None
+
+
+def profile_call(fn, *args):
+    """执行 fn(*args)；当前请求正在被采样时，在本线程上采样并并入请求的结果
+
+    供线程池中执行的函数使用（run_in_threadpool 会复制上下文，工作线程上同样能取到分析器）。
+    """
+    profiler = _profiler.get()
+    if profiler is None:
+        return fn(*args)
+    return profiler.call(fn, *args)
+
+
+# ---------------------------------------------------------------------------
+# 数据库事件
+# ---------------------------------------------------------------------------
+
+
+def _operation(statement: str) -> str:
+    words = statement.split(None, 1)
+    return words[0].lower() if words else ""
+
+
+def _format_sqlite_plan(rows) -> list[str]:
+    """EXPLAIN QUERY PLAN 的 (id, parent, notused, detail) 按父子关系缩进"""
+    depth = {0: -1}
+    lines = []
+    for row_id, parent, _, detail in rows:
+        depth[row_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[row_id] + str(detail))
+    return lines
+
+
+def explain(conn, statement: str, parameters) -> list[str]:
+    """在同一连接上获取语句的执行计划，返回逐行文本
+
+    直接使用 DBAPI 游标，不会再次触发 SQLAlchemy 事件；PostgreSQL 上放在保存点中执行，
+    获取失败时不影响所在事务。
+    """
+    sqlite = conn.dialect.name == "sqlite"
+    cursor = conn.connection.cursor()
+    try:
+        if sqlite:
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            return _format_sqlite_plan(cursor.fetchall())
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute("EXPLAIN " + statement, parameters)
+            return [str(row[0]) for row in cursor.fetchall()]
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            raise
+        finally:
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    finally:
+        cursor.close()
+
+
+def _log_slow_query(conn, statement: str, parameters, elapsed: float, executemany: bool) -> None:
+    params = repr(parameters)
+    if len(params) > MAX_PARAMS_LOG_LENGTH:
+        params = params[:MAX_PARAMS_LOG_LENGTH] + "..."
+    message = f"慢查询 {elapsed * 1000:.1f} ms\n{statement}\n参数: {params}"
+
+    if not executemany and _operation(statement) in EXPLAIN_OPERATIONS:
+        try:
+            plan = explain(conn, statement, parameters)
+            message += "\n执行计划:\n" + "\n".join(plan)
+        except Exception as e:
+            message += f"\n获取执行计划失败: {e}"
+    logger.warning(message)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._profiling_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_profiling_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+
+    timing = _timing.get()
+    if timing is not None:
+        timing.db += elapsed
+        timing.queries += 1
+
+    if 0 < settings.slow_query_ms <= elapsed * 1000:
+        _log_slow_query(conn, statement, parameters, elapsed, executemany)
+
+
+def install_query_hooks() -> None:
+    """为所有引擎注册语句计时事件（慢查询日志和 Server-Timing 的数据库耗时）"""
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---------------------------------------------------------------------------
+# 按需采样分析
+# ---------------------------------------------------------------------------
+
+# 同一时刻只分析一个请求（cProfile 和 pyinstrument 都不支持在同一线程上嵌套）
+_profile_lock = threading.Lock()
+
+
+def _profile_name(method: str, path: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", path.strip("/")) or "root"
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{method.lower()}-{slug[:80]}-{uuid.uuid4().hex[:6]}"
+
+
+class RequestProfiler:
+    """单个请求的采样分析器
+
+    pyinstrument（async_mode）在事件循环线程上只采样本请求的协程，cProfile 无法区分
+    同一线程上交替执行的其他协程，因此回退到 cProfile 时不采样事件循环线程。
+    经 profile_call 在线程池中执行的部分（run_read 的查询、序列化）在工作线程上
+    单独采样，结束时合并；同步接口的处理函数不在采样范围内。
+    """
+
+    def __init__(self, method: str, path: str, directory: Path | None = None):
+        directory = Path(directory or settings.profile_dir)
+        name = _profile_name(method, path)
+        if pyinstrument is not None:
+            self._profiler = pyinstrument.Profiler(async_mode="enabled")
+            self.path = directory / f"{name}.html"
+        else:
+            self._profiler = None
+            self.path = directory / f"{name}.prof"
+        # 工作线程上的采样结果（pyinstrument 的 Session 或 cProfile.Profile）
+        self._thread_results = []
+        self._results_lock = threading.Lock()
+        self._token = None
+
+    def start(self) -> bool:
+        """开始采样；已有请求在被分析时返回 False"""
+        if not _profile_lock.acquire(blocking=False):
+            return False
+        self._token = _profiler.set(self)
+        if self._profiler is not None:
+            self._profiler.start()
+        return True
+
+    def call(self, fn, *args):
+        """在当前线程上采样执行 fn(*args)"""
+        if pyinstrument is not None:
+            profiler = pyinstrument.Profiler(async_mode="disabled")
+            profiler.start()
+            try:
+                return fn(*args)
+            finally:
+                profiler.stop()
+                self._add_result(profiler.last_session)
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(fn, *args)
+        finally:
+            self._add_result(profiler)
+
+    def _add_result(self, result) -> None:
+        with self._results_lock:
+            self._thread_results.append(result)
+
+    def stop(self) -> Path:
+        """结束采样并保存结果"""
+        try:
+            if self._profiler is not None:
+                self._profiler.stop()
+            _profiler.reset(self._token)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if pyinstrument is not None:
+                session = self._profiler.last_session
+                for thread_session in self._thread_results:
+                    session = ProfileSession.combine(session, thread_session)
+                self.path.write_text(HTMLRenderer().render(session), encoding="utf-8")
+            elif self._thread_results:
+                pstats.Stats(*self._thread_results).dump_stats(str(self.path))
+            else:
+                cProfile.Profile().dump_stats(str(self.path))
+        finally:
+            _profile_lock.release()
+        logger.info(f"请求采样结果已保存: {self.path}")
+        return self.path
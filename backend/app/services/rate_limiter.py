@@ -0,0 +1,64 @@
+"""按主机限速（令牌桶）"""
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """线程安全的令牌桶
+
+    每次请求取一个令牌，令牌不足时预支并在锁外等待，
+    多个线程排队时按到达顺序依次放行。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """预支令牌，返回调用方需要等待的秒数（不阻塞，供 asyncio 使用）"""
+        if self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= tokens
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """获取令牌，返回实际等待的秒数"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class HostRateLimiter:
+    """为每个主机维护一个令牌桶"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def acquire(self, url: str) -> float:
+        """按 URL 所属主机限速，返回等待的秒数"""
+        return self._bucket(url).acquire()
+
+    def reserve(self, url: str) -> float:
+        """按 URL 所属主机预支令牌，返回需要等待的秒数（不阻塞）"""
+        return self._bucket(url).reserve()
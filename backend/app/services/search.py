@@ -0,0 +1,508 @@
+"""全文检索服务（SQLite FTS5 + 中文二元分词）
+
+FTS5 自带的 unicode61 分词器会把连续的汉字当作一个整体，无法按词检索。
+这里在写入索引前先做二元（bigram）切分：每段连续汉字切成相邻两字的词元，
+并在末尾补一个单字词元，词元之间用 ``\\x1f`` 分隔（unicode61 视其为分隔符）。
+
+    "采购法规" -> "采购\\x1f购法\\x1f法规\\x1f规"
+
+查询时按同样规则切分关键词并作为短语匹配，语义与原来的 ``ilike('%kw%')`` 一致。
+
+索引表是无内容表（``content=''``），只保存倒排索引，不再保存一份切分后的原文；
+命中片段由当前页法规解压后的正文在 Python 中截取（:func:`make_snippet`）。
+无内容表删除或更新一行时必须提供原先写入的内容，因此更新法规前先调用
+:func:`prepare_reindex` 按库中原有内容删除旧索引。
+
+PostgreSQL 上使用原生的 tsvector：同样的二元词元连同位置和权重（标题 A、正文 B、附件 C）
+直接拼成 tsvector 字面量写入 ``laws_search`` 表（GIN 索引），不依赖数据库的中文分词；
+查询为相邻词元的短语（``<->``），按 ts_rank_cd 排序。标题另建 pg_trgm 索引供 LIKE 兜底使用。
+"""
+import html
+import logging
+import re
+
+from sqlalchemy import cast, column, func, literal, literal_column, table, text
+from sqlalchemy.dialects.postgresql import TSQUERY
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "laws_fts"
+PG_SEARCH_TABLE = "laws_search"
+
+# 检索后端
+FTS5 = "fts5"
+TSVECTOR = "tsvector"
+
+# tsvector 位置上限（更大的位置会被截为该值，超出部分只保证单个词元的匹配）
+TSVECTOR_MAX_POSITION = 16383
+# 每个词元最多记录的位置数（PostgreSQL 的限制）
+TSVECTOR_MAX_POSITIONS_PER_LEXEME = 256
+
+# 词元分隔符（unicode61 分词器将其视为分隔字符，不会进入索引）
+_SEP = "\x1f"
+
+# BM25 列权重：标题 > 正文 > 附件
+BM25_WEIGHTS = (10.0, 2.0, 1.0)
+
+_CJK_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+_TAG_RE = re.compile(r"<[^>]+>")
+_SCRIPT_RE = re.compile(r"<(script|style)[^>]*>.*?</\1>", re.S | re.I)
+_SPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"[^\W_]+")
+
+_TSVECTOR_WEIGHTS = ("A", "B", "C")
+
+fts_table = table(
+    FTS_TABLE, column("rowid"), column("title"), column("content"), column("file_content")
+)
+pg_search_table = table(PG_SEARCH_TABLE, column("law_id"), column("document"))
+
+_fts_available: dict[int, bool] = {}
+
+
+def html_to_text(value: str | None) -> str:
+    """去除 HTML 标签，得到纯文本"""
+    if not value:
+        return ""
+    value = _SCRIPT_RE.sub(" ", value)
+    value = _TAG_RE.sub(" ", value)
+    return _SPACE_RE.sub(" ", html.unescape(value)).strip()
+
+
+def segment(value: str | None) -> str:
+    """将文本切分为索引用的二元分词形式"""
+    if not value:
+        return ""
+
+    parts = []
+    pos = 0
+    for match in _CJK_RE.finditer(value):
+        parts.append(value[pos:match.start()])
+        run = match.group()
+        tokens = [run[i:i + 2] for i in range(len(run) - 1)] + [run[-1]]
+        parts.append(_SEP + _SEP.join(tokens) + _SEP)
+        pos = match.end()
+    parts.append(value[pos:])
+    return "".join(parts)
+
+
+def _segment_term(term: str) -> str:
+    """切分单个查询词
+
+    与 :func:`segment` 的区别：位于词尾的汉字段不补单字词元，
+    因为文档中该段汉字可能继续延伸（"采购" 需要能匹配 "采购法"）。
+    """
+    parts = []
+    pos = 0
+    matches = list(_CJK_RE.finditer(term))
+    for index, match in enumerate(matches):
+        parts.append(term[pos:match.start()])
+        run = match.group()
+        tokens = [run[i:i + 2] for i in range(len(run) - 1)]
+        at_end = index == len(matches) - 1 and not term[match.end():].strip()
+        if len(run) == 1 or not at_end:
+            tokens.append(run[-1])
+        parts.append(_SEP + _SEP.join(tokens) + _SEP)
+        pos = match.end()
+    parts.append(term[pos:])
+    return "".join(parts)
+
+
+def build_match_query(keyword: str) -> str | None:
+    """将用户输入的关键词转换为 FTS5 MATCH 表达式
+
+    空白分隔的多个词按 AND 组合，每个词作为带前缀匹配的短语。
+    """
+    phrases = []
+    for term in keyword.split():
+        segmented = _segment_term(term)
+        if not re.search(r"\w", segmented):
+            continue
+        phrases.append('"' + segmented.replace('"', '""') + '" *')
+    return " AND ".join(phrases) if phrases else None
+
+
+def desegment(value: str | None) -> str:
+    """将二元分词形式还原为原文（用于 FTS5 snippet() 的输出）"""
+    if not value:
+        return ""
+
+    out = []
+    for piece in value.split(_SEP):
+        if piece and len(piece) <= 2 and _CJK_RE.fullmatch(piece):
+            out.append(piece[0])
+        else:
+            out.append(piece)
+    return "".join(out)
+
+
+def _tokens(value: str | None, prefix_tail: bool = False) -> list[str]:
+    """按索引规则切分出的词元列表（非汉字部分按单词切分并转小写）
+
+    prefix_tail 为 True 时按查询词处理：位于词尾的汉字段不补单字词元（同 :func:`_segment_term`）。
+    """
+    if not value:
+        return []
+
+    tokens = []
+    pos = 0
+    matches = list(_CJK_RE.finditer(value))
+    for index, match in enumerate(matches):
+        tokens += [word.lower() for word in _WORD_RE.findall(value[pos:match.start()])]
+        run = match.group()
+        tokens += [run[i:i + 2] for i in range(len(run) - 1)]
+        at_end = index == len(matches) - 1 and not _WORD_RE.search(value[match.end():])
+        if not prefix_tail or len(run) == 1 or not at_end:
+            tokens.append(run[-1])
+        pos = match.end()
+    tokens += [word.lower() for word in _WORD_RE.findall(value[pos:])]
+    return tokens
+
+
+def _quote_lexeme(lexeme: str) -> str:
+    return "'" + lexeme.replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def tsvector_document(title: str | None, content: str | None, file_content: str | None) -> str:
+    """生成 tsvector 字面量（content 为纯文本）
+
+    各列之间空出一个位置，避免短语跨列匹配。
+    """
+    positions: dict[str, list[str]] = {}
+    position = 0
+    for weight, value in zip(_TSVECTOR_WEIGHTS, (title, content, file_content), strict=True):
+        for token in _tokens(value):
+            position = min(position + 1, TSVECTOR_MAX_POSITION)
+            entries = positions.setdefault(token, [])
+            if len(entries) < TSVECTOR_MAX_POSITIONS_PER_LEXEME:
+                entries.append(f"{position}{weight}")
+        position = min(position + 1, TSVECTOR_MAX_POSITION)
+    return " ".join(
+        f"{_quote_lexeme(lexeme)}:{','.join(entries)}" for lexeme, entries in positions.items()
+    )
+
+
+def build_tsquery(keyword: str) -> str | None:
+    """将用户输入的关键词转换为 tsquery 字面量（语义同 :func:`build_match_query`）"""
+    phrases = []
+    for term in keyword.split():
+        tokens = [_quote_lexeme(token) for token in _tokens(term, prefix_tail=True)]
+        if not tokens:
+            continue
+        tokens[-1] += ":*"
+        phrases.append("(" + " <-> ".join(tokens) + ")")
+    return " & ".join(phrases) if phrases else None
+
+
+def highlight(value: str, keyword: str) -> str:
+    """HTML 转义文本，并用 <mark> 标出关键词"""
+    terms = sorted({t for t in keyword.split() if t}, key=len, reverse=True)
+    if not terms:
+        return html.escape(value)
+
+    pattern = re.compile("|".join(re.escape(t) for t in terms), re.I)
+    out = []
+    pos = 0
+    for match in pattern.finditer(value):
+        out.append(html.escape(value[pos:match.start()]))
+        out.append(f"<mark>{html.escape(match.group())}</mark>")
+        pos = match.end()
+    out.append(html.escape(value[pos:]))
+    return "".join(out)
+
+
+def is_fts_available(engine: Engine) -> bool:
+    """当前数据库是否支持 FTS5 全文索引"""
+    key = id(engine)
+    if key not in _fts_available:
+        available = False
+        if engine.dialect.name == "sqlite":
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text(
+                        "CREATE VIRTUAL TABLE IF NOT EXISTS temp._fts5_probe USING fts5(x)"
+                    ))
+                    conn.execute(text("DROP TABLE temp._fts5_probe"))
+                available = True
+            except Exception as e:
+                logger.warning(f"SQLite 不支持 FTS5，搜索将退化为 LIKE 查询: {e}")
+        _fts_available[key] = available
+    return _fts_available[key]
+
+
+def search_backend(engine: Engine) -> str | None:
+    """当前数据库可用的全文检索后端：fts5 / tsvector，都不支持时为 None（退化为 LIKE）"""
+    if engine.dialect.name == "postgresql":
+        return TSVECTOR
+    return FTS5 if is_fts_available(engine) else None
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """创建全文索引表，若索引为空而法规表有数据则重建"""
+    backend = search_backend(engine)
+    if backend is None:
+        return
+
+    with engine.begin() as conn:
+        if backend == TSVECTOR:
+            index_table = PG_SEARCH_TABLE
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {PG_SEARCH_TABLE} ("
+                "law_id INTEGER PRIMARY KEY REFERENCES laws(id) ON DELETE CASCADE, "
+                "document tsvector NOT NULL)"
+            ))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS idx_{PG_SEARCH_TABLE}_document "
+                f"ON {PG_SEARCH_TABLE} USING GIN (document)"
+            ))
+        else:
+            index_table = FTS_TABLE
+            sql = conn.execute(
+                text("SELECT sql FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE}
+            ).scalar()
+            if sql and "content=''" not in sql:
+                # 旧版索引表保存了一份切分后的原文，改为无内容表后重建
+                logger.info("全文索引改为无内容表，删除旧索引表后重建")
+                conn.execute(text(f"DROP TABLE {FTS_TABLE}"))
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                "USING fts5(title, content, file_content, content='', "
+                "tokenize='unicode61 remove_diacritics 2')"
+            ))
+        indexed = conn.execute(text(f"SELECT count(*) FROM {index_table}")).scalar()
+        total = conn.execute(text("SELECT count(*) FROM laws")).scalar()
+
+    if backend == TSVECTOR:
+        ensure_trigram_index(engine)
+
+    if total and not indexed:
+        logger.info(f"全文索引为空，开始重建（{total} 条法规）")
+        with Session(engine) as db:
+            rebuild_search_index(db)
+            db.commit()
+
+
+def ensure_trigram_index(engine: Engine) -> None:
+    """PostgreSQL：为标题建立 pg_trgm 索引，加速 LIKE 兜底查询（扩展不可用时跳过）"""
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_law_title_trgm "
+                "ON laws USING GIN (title gin_trgm_ops)"
+            ))
+    except Exception as e:
+        logger.warning(f"无法创建 pg_trgm 索引，标题模糊查询将不走索引: {e}")
+
+
+def index_law(db: Session, law) -> None:
+    """写入或刷新单条法规的全文索引（不提交事务）"""
+    index_rows(db, [{
+        "id": law.id,
+        "title": law.title,
+        "content": law.content,
+        "file_content": law.file_content,
+    }])
+
+
+def _fts_row(row: dict) -> dict:
+    return {
+        "id": row["id"],
+        "title": segment(row.get("title")),
+        "content": segment(html_to_text(row.get("content"))),
+        "file_content": segment(row.get("file_content")),
+    }
+
+
+def stored_documents(db: Session, law_ids) -> dict[int, dict]:
+    """读取已入库法规的标题、正文（HTML）和附件全文，返回 {id: 记录}"""
+    from app.models.law import Law, LawBody, decode_body
+
+    documents = {}
+    law_ids = list(law_ids)
+    for start in range(0, len(law_ids), 500):
+        rows = (
+            db.query(Law.id, Law.title, LawBody.content, LawBody.file_content)
+            .outerjoin(LawBody, LawBody.law_id == Law.id)
+            .filter(Law.id.in_(law_ids[start:start + 500]))
+        )
+        for law_id, title, content, file_content in rows:
+            documents[law_id] = {
+                "id": law_id,
+                "title": title,
+                "content": decode_body(db, content),
+                "file_content": decode_body(db, file_content),
+            }
+    return documents
+
+
+def prepare_reindex(db: Session, law_ids) -> dict[int, dict]:
+    """更新已有法规之前调用：删除其 FTS5 索引，返回库中原有内容 {id: 记录}
+
+    无内容表只能按原先写入的内容删除索引，须在新内容写入之前读取；
+    返回的原有内容也用于补全只更新了部分字段的记录。不支持全文索引时返回空字典。
+    """
+    backend = search_backend(db.get_bind())
+    if backend is None or not law_ids:
+        return {}
+
+    documents = stored_documents(db, law_ids)
+    if backend == FTS5 and documents:
+        ids = ",".join(map(str, documents))
+        indexed = {
+            row[0]
+            for row in db.execute(text(f"SELECT rowid FROM {FTS_TABLE} WHERE rowid IN ({ids})"))
+        }
+        rows = [_fts_row(doc) for law_id, doc in documents.items() if law_id in indexed]
+        if rows:
+            db.execute(
+                text(
+                    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, content, file_content) "
+                    "VALUES ('delete', :id, :title, :content, :file_content)"
+                ),
+                rows,
+            )
+    return documents
+
+
+def index_rows(db: Session, rows: list[dict]) -> None:
+    """批量写入全文索引（不提交事务）
+
+    rows 中每项需包含 id、title、content（HTML）、file_content。
+    已在索引中的法规须先经 :func:`prepare_reindex` 删除旧索引。
+    """
+    if not rows:
+        return
+    backend = search_backend(db.get_bind())
+    if backend == TSVECTOR:
+        _index_rows_tsvector(db, rows)
+        return
+    if backend is None:
+        return
+
+    db.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, content, file_content) "
+            "VALUES (:id, :title, :content, :file_content)"
+        ),
+        [_fts_row(r) for r in rows],
+    )
+
+
+def _index_rows_tsvector(db: Session, rows: list[dict]) -> None:
+    db.execute(
+        text(
+            f"INSERT INTO {PG_SEARCH_TABLE} (law_id, document) "
+            "VALUES (:id, CAST(:document AS tsvector)) "
+            "ON CONFLICT (law_id) DO UPDATE SET document = EXCLUDED.document"
+        ),
+        [
+            {
+                "id": r["id"],
+                "document": tsvector_document(
+                    r.get("title"), html_to_text(r.get("content")), r.get("file_content")
+                ),
+            }
+            for r in rows
+        ],
+    )
+
+
+def rebuild_search_index(db: Session) -> int:
+    """重建全部法规的全文索引（不提交事务）"""
+    from app.models.law import Law
+
+    backend = search_backend(db.get_bind())
+    if backend is None:
+        return 0
+
+    if backend == TSVECTOR:
+        db.execute(text(f"DELETE FROM {PG_SEARCH_TABLE}"))
+    else:
+        db.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('delete-all')"))
+    law_ids = [row[0] for row in db.query(Law.id).order_by(Law.id)]
+    count = 0
+    for start in range(0, len(law_ids), 200):
+        batch = law_ids[start:start + 200]
+        for law in db.query(Law).options(selectinload(Law.body)).filter(Law.id.in_(batch)):
+            index_law(db, law)
+            count += 1
+        db.expunge_all()
+    logger.info(f"全文索引重建完成，共 {count} 条")
+    return count
+
+
+def bm25_score():
+    """BM25 相关度（越小越相关）"""
+    return func.bm25(literal_column(FTS_TABLE), *BM25_WEIGHTS)
+
+
+def match_clause(match_query: str):
+    """FTS5 MATCH 条件"""
+    return literal_column(FTS_TABLE).op("MATCH")(match_query)
+
+
+def make_snippet(keyword: str, *texts: str | None, size: int = 64) -> str:
+    """从纯文本中截取关键词首次出现处附近的片段（按 texts 的顺序取第一个命中的文本）
+
+    结果为纯文本，需经 highlight 转义并标出关键词；都未命中时返回空字符串。
+    """
+    terms = [term.lower() for term in keyword.split()]
+    for value in texts:
+        if not value:
+            continue
+        lowered = value.lower()
+        positions = [pos for pos in (lowered.find(term) for term in terms) if pos >= 0]
+        if not positions:
+            continue
+        start = max(min(positions) - size // 4, 0)
+        end = min(start + size, len(value))
+        return ("…" if start else "") + value[start:end] + ("…" if end < len(value) else "")
+    return ""
+
+
+def has_terms(keyword: str) -> bool:
+    """关键词能否切出词元（纯标点、空白等切不出词元的关键词不会命中任何法规）"""
+    return bool(_tokens(keyword))
+
+
+def build_query(backend: str, keyword: str) -> str | None:
+    """按检索后端转换关键词（MATCH 表达式或 tsquery 字面量）"""
+    return build_tsquery(keyword) if backend == TSVECTOR else build_match_query(keyword)
+
+
+def index_source(backend: str):
+    """(索引表, 对应法规 id 的列)"""
+    if backend == TSVECTOR:
+        return pg_search_table, pg_search_table.c.law_id
+    return fts_table, fts_table.c.rowid
+
+
+def search_filter(backend: str, query: str):
+    """全文匹配条件"""
+    if backend == TSVECTOR:
+        return pg_search_table.c.document.op("@@")(cast(literal(query), TSQUERY))
+    return match_clause(query)
+
+
+def post_filter_column(backend: str, column):
+    """全文匹配之后再筛选的列（如分类）
+
+    SQLite 估算不出 MATCH 的选择性，带分类条件时会先按分类索引扫描，
+    再对每一行单独执行一次 MATCH，常见关键词下慢两个数量级。
+    FTS5 上给列加一元加号，使该条件不走索引，查询改为先全文匹配再按主键回表。
+    """
+    if backend == FTS5:
+        return UnaryExpression(column, operator=operators.custom_op("+"), type_=column.type)
+    return column
+
+
+def rank_order(backend: str, query: str):
+    """按相关度排序的表达式（越相关越靠前）"""
+    if backend == TSVECTOR:
+        return func.ts_rank_cd(pg_search_table.c.document, cast(literal(query), TSQUERY)).desc()
+    return bm25_score()
@@ -0,0 +1,133 @@
+"""附件解析文本缓存
+
+以 (文件 SHA-256, 解析器版本) 为键保存解析出的文本（zlib 压缩），
+相同内容的文件无论来自哪个链接、哪个压缩包，都只解析一次。
+解析逻辑变化时递增 attachment_parser.PARSER_VERSION，旧条目自然失效并逐步被淘汰。
+
+缓存是独立的 SQLite 文件而不是业务库中的表：附件解析进程（见 attachment_parser）
+也要读写缓存，而业务库可能是 PostgreSQL 且不应被子进程直接连接。
+总大小超过上限时按最后使用时间淘汰（LRU）。解析失败的结果不缓存，以便重试。
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# 缓存未命中（与“命中但文本为空”区分）
+MISS = object()
+
+
+def file_digest(path, chunk_size: int = 1024 * 1024) -> str:
+    """计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TextCache:
+    """基于 SQLite 的文本缓存（线程、进程间共享）"""
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._ready = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._ready:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS parsed_text ("
+                    "digest TEXT NOT NULL, parser_version TEXT NOT NULL, "
+                    "body BLOB, size INTEGER NOT NULL, last_used REAL NOT NULL, "
+                    "PRIMARY KEY (digest, parser_version))"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_parsed_text_last_used "
+                    "ON parsed_text (last_used)"
+                )
+                self._ready = True
+            self._local.conn = conn
+        return conn
+
+    def get(self, digest: str, parser_version: str):
+        """读取缓存，未命中返回 MISS（命中时可能为 None，表示该文件没有可提取的文本）"""
+        if not self.enabled:
+            return MISS
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT body FROM parsed_text WHERE digest = ? AND parser_version = ?",
+                (digest, parser_version),
+            ).fetchone()
+            if row is None:
+                return MISS
+            conn.execute(
+                "UPDATE parsed_text SET last_used = ? WHERE digest = ? AND parser_version = ?",
+                (time.time(), digest, parser_version),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"读取文本缓存失败: {e}")
+            return MISS
+        return zlib.decompress(row[0]).decode("utf-8") if row[0] is not None else None
+
+    def put(self, digest: str, parser_version: str, text: str | None) -> None:
+        """写入缓存，超出总大小上限时淘汰最久未使用的条目"""
+        if not self.enabled:
+            return
+        body = zlib.compress(text.encode("utf-8")) if text is not None else None
+        size = len(body) if body else 0
+        if size > self.max_bytes:
+            return
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO parsed_text "
+                "(digest, parser_version, body, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (digest, parser_version, body, size, time.time()),
+            )
+            self._evict(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"写入文本缓存失败: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM parsed_text").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # 淘汰到上限的 90%，避免每次写入都触发淘汰
+        target = total - int(self.max_bytes * 0.9)
+        victims = []
+        freed = 0
+        for digest, parser_version, size in conn.execute(
+            "SELECT digest, parser_version, size FROM parsed_text ORDER BY last_used"
+        ):
+            victims.append((digest, parser_version))
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM parsed_text WHERE digest = ? AND parser_version = ?", victims)
+        logger.info(f"文本缓存超出上限，淘汰 {len(victims)} 条")
+
+    def stats(self) -> dict:
+        """条目数与总大小"""
+        count, total = self._conn().execute(
+            "SELECT count(*), COALESCE(SUM(size), 0) FROM parsed_text"
+        ).fetchone()
+        return {"entries": count, "bytes": total}
@@ -0,0 +1,356 @@
+"""读接口压测与延迟回归基准
+
+生成（或复用）合成语料库，按场景压测 /api/laws、/api/laws/search、
+/api/laws/timeline、/api/laws/timeline/items 和 /api/laws/{id}，
+统计每个场景的 p50/p95/p99 延迟、吞吐量和平均响应体大小。
+
+两种驱动方式：
+
+- inprocess：httpx 的 ASGITransport 直接调用应用，不经过网络，只测应用本身
+- http：在后台线程中启动 uvicorn，通过本地 TCP 连接请求
+
+用法（在 backend 目录下）::
+
+    python -m benchmarks.api_benchmark --rows 100000 --db /tmp/bench.db --save-baseline base.json
+    python -m benchmarks.api_benchmark --rows 100000 --db /tmp/bench.db --baseline base.json
+
+指定 --baseline 时与基线比较，任一场景 p95 变慢超过 --tolerance 即以退出码 1 结束。
+语料库文件可以复用：--db 指向的库中已有足够记录时不再生成。
+默认关闭读接口缓存（--cache 开启），以测量实际的查询耗时。
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+SCENARIOS = (
+    "list_first",
+    "list_category",
+    "list_offset_deep",
+    "list_cursor",
+    "search_common",
+    "search_rare",
+    "search_multi",
+    "search_category",
+    "timeline",
+    "timeline_year",
+    "timeline_items",
+    "detail",
+)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """最近秩法百分位数（sorted_values 须已排序）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(pct / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def summarize_samples(
+    latencies: list[float], sizes: list[int], errors: int, elapsed: float
+) -> dict:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "mean_ms": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+        "throughput": round(count / elapsed, 2) if elapsed else 0.0,
+        "mean_bytes": round(sum(sizes) / len(sizes)) if sizes else 0,
+    }
+
+
+class ScenarioUrls:
+    """为各场景生成请求 URL（依赖语料库的规模和内容）"""
+
+    def __init__(self, rows: int, law_ids: list[int], cursors: list[str], seed: int = 7):
+        from benchmarks.corpus import CATEGORIES, RARE_TERMS
+
+        self.rows = rows
+        self.law_ids = law_ids
+        self.cursors = cursors or [""]
+        self.categories = CATEGORIES
+        self.rare_terms = RARE_TERMS
+        self.rng = random.Random(seed)
+
+    def url(self, scenario: str) -> str:
+        rng = self.rng
+        category = rng.choice(self.categories)
+        if scenario == "list_first":
+            return "/api/laws?page_size=20"
+        if scenario == "list_category":
+            return f"/api/laws?page_size=20&category={category}"
+        if scenario == "list_offset_deep":
+            last_page = max(1, self.rows // 20)
+            return f"/api/laws?page_size=20&page={rng.randint(last_page // 2, last_page)}"
+        if scenario == "list_cursor":
+            return f"/api/laws?page_size=20&cursor={rng.choice(self.cursors)}"
+        if scenario == "search_common":
+            return "/api/laws/search?keyword=采购"
+        if scenario == "search_rare":
+            return f"/api/laws/search?keyword={rng.choice(self.rare_terms)}"
+        if scenario == "search_multi":
+            return "/api/laws/search?keyword=装备 合同"
+        if scenario == "search_category":
+            return f"/api/laws/search?keyword=质量监督&category={category}"
+        if scenario == "timeline":
+            return "/api/laws/timeline"
+        if scenario == "timeline_year":
+            return f"/api/laws/timeline?year={rng.randint(2000, 2024)}"
+        if scenario == "timeline_items":
+            month = f"{rng.randint(2000, 2024)}-{rng.randint(1, 12):02d}"
+            return f"/api/laws/timeline/items?month={month}"
+        if scenario == "detail":
+            return f"/api/laws/{rng.choice(self.law_ids)}"
+        raise ValueError(f"未知场景: {scenario}")
+
+
+async def run_scenario(
+    client, make_url: Callable[[], str], requests: int, concurrency: int
+) -> dict:
+    """以 concurrency 个并发客户端发送 requests 个请求"""
+    urls = [make_url() for _ in range(requests)]
+    latencies: list[float] = []
+    sizes: list[int] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while urls:
+            url = urls.pop()
+            started = time.perf_counter()
+            try:
+                response = await client.get(url)
+                body = response.content
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+            sizes.append(len(body))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize_samples(latencies, sizes, errors, time.perf_counter() - started)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _HttpServer:
+    """后台线程中的 uvicorn（不执行 lifespan，避免启动定时任务）"""
+
+    def __init__(self, app):
+        import uvicorn
+
+        self.port = _free_port()
+        config = uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, lifespan="off", log_level="warning"
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="api-benchmark", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.05)
+        return f"http://127.0.0.1:{self.port}"
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.should_exit = True
+        self._thread.join()
+        return False
+
+
+async def _collect_cursors(client, pages: int) -> list[str]:
+    """沿游标翻页，收集各页的游标（供 list_cursor 场景随机取用）"""
+    cursors = [""]
+    for _ in range(pages):
+        data = (await client.get(f"/api/laws?page_size=20&cursor={cursors[-1]}")).json()
+        if not data.get("next_cursor"):
+            break
+        cursors.append(data["next_cursor"])
+    return cursors
+
+
+async def _drive(app, args, scenarios: list[str], law_ids: list[int]) -> dict:
+    import httpx
+
+    async def run(client) -> dict:
+        urls = ScenarioUrls(args.rows, law_ids, await _collect_cursors(client, args.cursor_pages))
+        results = {}
+        for scenario in scenarios:
+            # 预热：建立连接、加载 SQLite 页缓存
+            await run_scenario(client, lambda s=scenario: urls.url(s), args.warmup, 1)
+            results[scenario] = await run_scenario(
+                client, lambda s=scenario: urls.url(s), args.requests, args.concurrency
+            )
+            print(_format_row(scenario, results[scenario]), flush=True)
+        return results
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    if args.transport == "http":
+        with _HttpServer(app) as base_url:
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                return await run(client)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=60
+    ) as client:
+        return await run(client)
+
+
+def _configure_environment(args, db_path: Path) -> None:
+    os.environ.update({
+        "DEBUG": "false",
+        "DATABASE_URL": args.database_url or f"sqlite:///{db_path}",
+        "CACHE_BACKEND": "memory" if args.cache else "none",
+        "DATABASE_ASYNC": "true" if args.async_db else "false",
+    })
+
+
+def run_benchmark(args) -> dict:
+    """生成语料并压测，返回结果字典"""
+    with tempfile.TemporaryDirectory(prefix="api-bench-") as tmp:
+        db_path = args.db or Path(tmp) / "laws.db"
+        _configure_environment(args, db_path)
+
+        from app.database import SessionLocal, engine, init_db
+        from app.main import app
+        from app.models.law import Law
+        from benchmarks.corpus import generate_corpus
+
+        init_db()
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            created = generate_corpus(db, args.rows, seed=args.seed, progress=_print_progress)
+            if created:
+                print(f"\n生成 {created} 条记录，耗时 {time.perf_counter() - started:.1f}s")
+            rows = db.query(Law.id).count()
+            rng = random.Random(args.seed)
+            law_ids = [row[0] for row in db.query(Law.id).order_by(Law.id).limit(args.rows)]
+            law_ids = rng.sample(law_ids, min(len(law_ids), 5000))
+
+        scenarios = args.scenarios or list(SCENARIOS)
+        print(_format_header())
+        try:
+            results = asyncio.run(_drive(app, args, scenarios, law_ids))
+        finally:
+            engine.dispose()
+
+    return {
+        "config": {
+            "rows": rows,
+            "transport": args.transport,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "cache": args.cache,
+            "async_db": args.async_db,
+            "database": engine.dialect.name,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """与基线比较，返回 p95 变慢超过 tolerance（比例）的场景说明"""
+    regressions = []
+    for scenario, current in result["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(scenario)
+        if not base or not base["p95_ms"]:
+            continue
+        ratio = current["p95_ms"] / base["p95_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{scenario}: p95 {base['p95_ms']:.2f}ms -> {current['p95_ms']:.2f}ms"
+                f" (+{(ratio - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def _print_progress(done: int, total: int) -> None:
+    print(f"\r生成语料 {done}/{total}", end="", flush=True)
+
+
+def _format_header() -> str:
+    return (
+        f"{'场景':<18}{'请求':>7}{'错误':>6}{'p50(ms)':>10}"
+        f"{'p95(ms)':>10}{'p99(ms)':>10}{'req/s':>9}{'字节':>9}"
+    )
+
+
+def _format_row(scenario: str, data: dict) -> str:
+    return (
+        f"{scenario:<20}{data['requests']:>7}{data['errors']:>6}{data['p50_ms']:>10.2f}"
+        f"{data['p95_ms']:>10.2f}{data['p99_ms']:>10.2f}{data['throughput']:>9.1f}{data['mean_bytes']:>9}"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="读接口压测与延迟回归基准")
+    parser.add_argument("--rows", type=int, default=10000, help="语料库记录数")
+    parser.add_argument("--db", type=Path, help="语料库 SQLite 文件（可复用），默认使用临时文件")
+    parser.add_argument("--database-url",
+                        help="改用其他数据库（如 PostgreSQL 配置档），优先于 --db")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--transport", choices=("inprocess", "http"), default="inprocess")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发客户端数")
+    parser.add_argument("--requests", type=int, default=200, help="每个场景的请求数")
+    parser.add_argument("--warmup", type=int, default=10, help="每个场景的预热请求数")
+    parser.add_argument("--cursor-pages", type=int, default=50,
+                        help="list_cursor 场景预先收集的游标页数")
+    parser.add_argument("--scenario", dest="scenarios", action="append", choices=SCENARIOS,
+                        help="只运行指定场景（可多次指定）")
+    parser.add_argument("--cache", action="store_true", help="开启读接口缓存")
+    parser.add_argument("--async-db", action="store_true",
+                        help="读接口使用异步会话（database_async）")
+    parser.add_argument("--json", type=Path, help="把结果写入 JSON 文件")
+    parser.add_argument("--save-baseline", type=Path, help="把结果保存为基线")
+    parser.add_argument("--baseline", type=Path, help="与基线比较")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的 p95 变慢比例")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    result = run_benchmark(args)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline["config"]["rows"] != result["config"]["rows"]:
+            base_rows, rows = baseline["config"]["rows"], result["config"]["rows"]
+            print(f"注意：基线语料 {base_rows} 条，本次 {rows} 条")
+
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print("\n相对基线变慢：")
+            print("\n".join(f"  {line}" for line in regressions))
+            return 1
+        print("\n与基线相比没有明显变慢")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
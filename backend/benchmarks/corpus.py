@@ -0,0 +1,99 @@
+"""合成法规语料
+
+按固定随机种子生成法规记录：正文为带 weain 页面结构的 HTML（约 3~15 KB），
+约三成记录带附件文本（约 7~50 KB），标题、分类、发布日期分布接近真实数据。
+写入走 bulk_upsert_laws，摘要和全文索引与爬虫入库时一致。
+"""
+import hashlib
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+# 标题和正文用的词汇（按大致词频排列，越靠前出现越多）
+VOCABULARY = (
+    "采购", "管理", "规定", "装备", "合同", "单位", "实施", "办法", "军队", "审查",
+    "价格", "质量", "监督", "供应商", "招标", "评审", "验收", "服务", "工程", "物资",
+    "保障", "维修", "信息", "公开", "预算", "审计", "竞争", "谈判", "登记", "资格",
+    "标准", "技术", "试验", "鉴定", "交付", "履约", "结算", "备案", "目录", "项目",
+)
+TITLE_PATTERNS = (
+    "关于{a}{b}{c}的通知",
+    "{a}{b}{c}暂行办法",
+    "{a}{b}{c}实施细则",
+    "{a}{b}若干规定（第{n}号）",
+    "{a}{b}{c}管理规定",
+)
+CATEGORIES = ("国家颁布法规", "军队颁布法规", "联合颁布法规", "其他法规")
+
+# 只出现在少数记录中的词，用于测“稀有词”搜索
+RARE_TERMS = ("航材周转", "靶场试验", "保密资质")
+
+START_DATE = date(2000, 1, 1)
+DATE_SPAN_DAYS = 365 * 25
+
+
+def _words(rng: random.Random, count: int) -> str:
+    # 前面的词出现得更多，近似真实文本的词频分布
+    return "".join(VOCABULARY[int(len(VOCABULARY) * rng.random() ** 2)] for _ in range(count))
+
+
+def _paragraphs(rng: random.Random, count: int) -> list[str]:
+    return [f"第{i}条 {_words(rng, rng.randint(20, 60))}。" for i in range(1, count + 1)]
+
+
+def make_law(number: int, rng: random.Random) -> dict:
+    """生成第 number 条法规记录"""
+    a, b, c = (_words(rng, 1) for _ in range(3))
+    title = rng.choice(TITLE_PATTERNS).format(a=a, b=b, c=c, n=number)
+    paragraphs = _paragraphs(rng, rng.randint(8, 40))
+    if number % 997 == 0:
+        paragraphs.append(f"涉及{RARE_TERMS[number % len(RARE_TERMS)]}的事项另行规定。")
+    content = (
+        '<div class="txt" id="content">\n'
+        + "\n".join(f'<p style="text-indent:2em;line-height:2">{p}</p>' for p in paragraphs)
+        + "\n</div>"
+    )
+
+    file_url = file_content = file_path = None
+    if rng.random() < 0.3:
+        file_url = f"https://www.weain.mil.cn/files/{number}.pdf"
+        file_path = f"/data/attachments/objects/{number:064x}.pdf"
+        file_content = "\n".join(_paragraphs(rng, rng.randint(20, 150)))
+
+    publish_date: date | None = None
+    if rng.random() < 0.95:
+        publish_date = START_DATE + timedelta(days=rng.randrange(DATE_SPAN_DAYS))
+
+    return {
+        "title": title,
+        "category": CATEGORIES[int(len(CATEGORIES) * rng.random() ** 1.5)],
+        "publish_date": publish_date,
+        "content": content,
+        "source_url": f"https://www.weain.mil.cn/detail/{number}.html",
+        "file_url": file_url,
+        "file_path": file_path,
+        "file_content": file_content,
+        "attachment_status": "ok" if file_url else None,
+        "hash": hashlib.sha256(f"{number}:{title}".encode()).hexdigest(),
+    }
+
+
+def generate_corpus(
+    db: Session, rows: int, seed: int = 42, batch_size: int = 1000, progress=None
+) -> int:
+    """向数据库追加合成法规，直到总数达到 rows，返回新增条数"""
+    from app.models.law import Law, bulk_upsert_laws
+
+    existing = db.query(func.count(Law.id)).scalar() or 0
+    created = 0
+    for start in range(existing, rows, batch_size):
+        end = min(start + batch_size, rows)
+        rng = random.Random(seed * 1_000_003 + start)
+        batch = [make_law(number, rng) for number in range(start + 1, end + 1)]
+        created += bulk_upsert_laws(db, batch)[0]
+        db.expunge_all()
+        if progress:
+            progress(end, rows)
+    return created
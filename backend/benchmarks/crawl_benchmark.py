@@ -0,0 +1,253 @@
+"""爬虫吞吐量基准测试
+
+启动本地夹具服务器，把爬虫指向它，在临时目录中（独立的 SQLite 数据库、
+附件存储和文本缓存）执行 crawl_category 或 crawl_all，输出：
+
+- 每秒页数（列表 + 详情）、每秒写入条数、每秒下载字节数
+- 各阶段耗时：列表请求、详情页（请求 + 提取）、提取、附件下载、附件解析、写库
+- 峰值 RSS（爬虫进程，以及已退出的解析子进程中的最大值）
+
+用法（在 backend 目录下）::
+
+    python -m benchmarks.crawl_benchmark --pages 10 --latency 0.05
+    python -m benchmarks.crawl_benchmark --all --backend async --json result.json
+
+注意：async 后端的详情请求和附件下载在事件循环中完成，不经过
+_crawl_detail_page / _fetch_attachment，这两个阶段的统计为空。
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlparse
+
+from benchmarks.fixture_server import FixtureServer
+
+STAGES = ("list", "detail", "extract", "download", "parse", "write")
+
+
+class StageTimer:
+    """按阶段累计调用次数和耗时（线程安全）"""
+
+    def __init__(self):
+        self.calls = dict.fromkeys(STAGES, 0)
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def time(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.calls[stage] += 1
+                self.seconds[stage] += elapsed
+
+    def to_dict(self) -> dict:
+        return {
+            stage: {
+                "calls": self.calls[stage],
+                "seconds": round(self.seconds[stage], 4),
+                "mean_ms": (
+                    round(self.seconds[stage] / self.calls[stage] * 1000, 3)
+                    if self.calls[stage] else None
+                ),
+            }
+            for stage in STAGES
+        }
+
+
+def _instrumented_crawler(timer: StageTimer):
+    """给各阶段加上计时的 CrawlerService 子类（须在设置好环境变量后调用）"""
+    from app.services.crawler import CrawlerService
+
+    class BenchmarkCrawler(CrawlerService):
+        def _fetch_list_via_api(self, lmid, page=1):
+            with timer.time("list"):
+                return super()._fetch_list_via_api(lmid, page)
+
+        def _crawl_detail_page(self, url, category, download_attachments=True):
+            with timer.time("detail"):
+                return super()._crawl_detail_page(url, category, download_attachments)
+
+        def _parse_detail_page(self, html, url, category):
+            with timer.time("extract"):
+                return super()._parse_detail_page(html, url, category)
+
+        def _fetch_attachment(self, url):
+            with timer.time("download"):
+                return super()._fetch_attachment(url)
+
+        def _parse_file_content(self, file_path, digest=None):
+            with timer.time("parse"):
+                return super()._parse_file_content(file_path, digest)
+
+        def _save_laws(self, records):
+            with timer.time("write"):
+                return super()._save_laws(records)
+
+    return BenchmarkCrawler
+
+
+def _peak_rss_mb() -> dict:
+    # Linux 下 ru_maxrss 单位为 KB
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def _configure_environment(args, server: FixtureServer, workdir: Path) -> None:
+    """通过环境变量配置应用（解析子进程以 spawn 方式启动，同样读取这些变量）"""
+    env = {
+        "DEBUG": "false",
+        "DATABASE_URL": f"sqlite:///{workdir / 'laws.db'}",
+        "ATTACHMENT_DIR": str(workdir / "attachments"),
+        "PARSE_CACHE_PATH": str(workdir / "parse_cache.db"),
+        "CRAWLER_BASE_URL": server.base_url,
+        "CRAWLER_API_URL": server.api_url,
+        "CRAWLER_PAGE_SIZE": str(args.page_size),
+        "CRAWLER_RATE_LIMIT": str(args.rate_limit),
+        "CRAWLER_HTTP_BACKEND": args.backend,
+        "CRAWLER_MAX_RETRIES": "1",
+        "CACHE_BACKEND": "none",
+    }
+    if args.detail_workers:
+        env["CRAWLER_DETAIL_WORKERS"] = str(args.detail_workers)
+    if args.attachment_workers:
+        env["CRAWLER_ATTACHMENT_WORKERS"] = str(args.attachment_workers)
+    if args.parse_workers is not None:
+        env["CRAWLER_PARSE_WORKERS"] = str(args.parse_workers)
+    os.environ.update(env)
+
+
+def run_benchmark(args) -> dict:
+    """执行一次基准测试，返回结果字典"""
+    server = FixtureServer(
+        pages=args.pages,
+        page_size=args.page_size,
+        latency=args.latency,
+        jitter=args.jitter,
+        attachment_ratio=args.attachment_ratio,
+        fixtures_dir=args.fixtures,
+    )
+    with server, tempfile.TemporaryDirectory(prefix="crawl-bench-") as tmp:
+        _configure_environment(args, server, Path(tmp))
+
+        from app.config import settings
+        from app.database import SessionLocal, engine, init_db
+        from app.services.attachment_parser import attachment_parser
+        from app.services.extractor import profile_for, register_profile
+
+        if args.profile == "weain":
+            # 让本地服务器的主机名也走 weain 站点配置的快速路径
+            host = urlparse(server.base_url).hostname
+            register_profile(profile_for("https://www.weain.mil.cn"), host)
+
+        init_db()
+        timer = StageTimer()
+        crawler_cls = _instrumented_crawler(timer)
+        db = SessionLocal()
+        try:
+            crawler = crawler_cls(db)
+            started = time.perf_counter()
+            if args.all:
+                count = crawler.crawl_all()
+            else:
+                count = crawler.crawl_category(args.category)
+            elapsed = time.perf_counter() - started
+            stats = crawler.stats.to_dict()
+        finally:
+            db.close()
+            attachment_parser.shutdown()
+            engine.dispose()
+
+    pages = server.requests["list"] + server.requests["detail"]
+    return {
+        "config": {
+            "mode": "all" if args.all else args.category,
+            "backend": args.backend,
+            "pages": args.pages,
+            "page_size": args.page_size,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "attachment_ratio": args.attachment_ratio,
+            "profile": args.profile,
+            "detail_workers": settings.crawler_detail_workers,
+            "attachment_workers": settings.crawler_attachment_workers,
+            "parse_workers": settings.crawler_parse_workers,
+        },
+        "elapsed": round(elapsed, 3),
+        "items": count,
+        "requests": dict(server.requests),
+        "bytes": server.bytes_sent,
+        "pages_per_s": round(pages / elapsed, 2) if elapsed else None,
+        "items_per_s": round(count / elapsed, 2) if elapsed else None,
+        "bytes_per_s": round(server.bytes_sent / elapsed, 1) if elapsed else None,
+        "stages": timer.to_dict(),
+        "peak_rss_mb": _peak_rss_mb(),
+        "crawl_stats": stats,
+    }
+
+
+def format_report(result: dict) -> str:
+    lines = [
+        f"耗时 {result['elapsed']:.3f}s，写入 {result['items']} 条",
+        f"请求: {result['requests']}",
+        f"吞吐: {result['pages_per_s']} 页/s, {result['items_per_s']} 条/s, "
+        f"{result['bytes_per_s'] / 1024:.1f} KB/s" if result["elapsed"] else "吞吐: -",
+        "",
+        f"{'阶段':<10}{'次数':>8}{'总耗时(s)':>12}{'平均(ms)':>12}",
+    ]
+    for stage, data in result["stages"].items():
+        mean = f"{data['mean_ms']:.3f}" if data["mean_ms"] is not None else "-"
+        lines.append(f"{stage:<12}{data['calls']:>8}{data['seconds']:>14.4f}{mean:>12}")
+    rss = result["peak_rss_mb"]
+    lines += ["", f"峰值 RSS: 爬虫进程 {rss['self']} MB，解析子进程 {rss['children']} MB"]
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="爬虫吞吐量基准测试")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--category", default="国家颁布法规", help="爬取的分类（crawl_category）")
+    target.add_argument("--all", action="store_true", help="爬取全部分类（crawl_all）")
+    parser.add_argument("--pages", type=int, default=5, help="每个分类的列表页数")
+    parser.add_argument("--page-size", type=int, default=20, help="每页条数")
+    parser.add_argument("--latency", type=float, default=0.02, help="每个响应的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="额外随机延迟上限（秒）")
+    parser.add_argument("--attachment-ratio", type=float, default=0.3, help="带附件的条目比例")
+    parser.add_argument("--fixtures", type=Path, help="录制的夹具目录（结构同 URL 路径）")
+    parser.add_argument("--backend", choices=("threads", "async"), default="threads")
+    parser.add_argument("--profile", choices=("weain", "generic"), default="weain",
+                        help="详情页按 weain 站点配置还是通用规则提取")
+    parser.add_argument(
+        "--rate-limit", type=float, default=0, help="每主机每秒请求数，0 表示不限速"
+    )
+
+    parser.add_argument("--detail-workers", type=int)
+    parser.add_argument("--attachment-workers", type=int)
+    parser.add_argument("--parse-workers", type=int)
+    parser.add_argument("--json", type=Path, help="把结果写入 JSON 文件，便于比较不同版本")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    result = run_benchmark(args)
+    print(format_report(result))
+    if args.json:
+        args.json.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""爬虫基准测试用的本地 HTTP 夹具服务器
+
+模拟 weain 网站的三类接口：
+
+- ``/api/regulations/search?lmid=&currentPage=``：列表 JSON
+- ``/detail/<lmid>/<n>.html``：详情页 HTML（weain 页面结构）
+- ``/files/<n>.<ext>``：PDF / DOCX / ZIP 附件（每条内容不同，避免被内容寻址存储去重）
+
+指定 fixtures 目录时优先回放录制的文件，目录结构与 URL 路径一致，
+列表 JSON 存放为 ``api/<lmid>/<page>.json``；找不到的文件仍使用生成的内容。
+
+所有响应都会先等待 latency（加上 0~jitter 的随机抖动）秒，用来模拟网络延迟。
+附件响应带 ETag，支持 If-None-Match 条件请求。
+"""
+import hashlib
+import io
+import json
+import random
+import re
+import threading
+import time
+import zipfile
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+API_PATH = "/api/regulations/search"
+
+_DETAIL_RE = re.compile(r"^/detail/(\w+)/(\d+)\.html$")
+_FILE_RE = re.compile(r"^/files/(\d+)\.(pdf|docx|zip)$")
+
+ATTACHMENT_TYPES = ("pdf", "docx", "zip")
+
+CONTENT_TYPES = {
+    "json": "application/json; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "zip": "application/zip",
+}
+
+
+def _pdf_bytes(lines: list[str]) -> bytes:
+    """生成单页 PDF（Helvetica，仅 ASCII 文本）"""
+    text = " ".join(f"({line}) Tj 0 -14 Td" for line in lines)
+    stream = f"BT /F1 10 Tf 40 760 Td {text} ET".encode("ascii")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    trailer = b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+    out.write(trailer % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def _docx_bytes(paragraphs: list[str]) -> bytes:
+    from docx import Document
+
+    document = Document()
+    for text in paragraphs:
+        document.add_paragraph(text)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+@lru_cache(maxsize=256)
+def attachment_bytes(number: int, kind: str) -> bytes:
+    """第 number 条法规的附件内容"""
+    lines = [
+        f"Attachment {number} article {i}: procurement rules and standards." for i in range(40)
+    ]
+    if kind == "pdf":
+        return _pdf_bytes(lines)
+    if kind == "docx":
+        return _docx_bytes([f"附件 {number} 第{i}条 采购管理规定。" for i in range(40)])
+
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(f"{number}-说明.txt", "\n".join(lines))
+        archive.writestr(f"{number}-正文.docx", _docx_bytes(lines))
+    return out.getvalue()
+
+
+def detail_html(lmid: str, number: int, attachment: str | None) -> str:
+    """weain 结构的详情页"""
+    paragraphs = "\n".join(
+        f"<p>第{i}条 为规范第{number}号法规所涉采购活动，依据有关规定制定本条款。</p>"
+        for i in range(1, 31)
+    )
+    name = f"{number}.{attachment}"
+    enclosure = (
+        f'<div id="enclosureName"><a href="/files/{name}">附件{name}</a></div>'
+        if attachment else ""
+    )
+
+    publish_date = f"2024-{number % 12 + 1:02d}-{number % 28 + 1:02d}"
+    return f"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>采购管理规定（第{number}号） - 全军武器装备采购信息网</title>
+<script>var pageConfig = {{"lmid": "{lmid}", "id": {number}}};</script>
+<style>.txt p {{ line-height: 2; }}</style></head>
+<body>
+<div class="header"><nav><a href="/">首页</a><a href="/fgzc">法规政策</a></nav></div>
+<div class="main">
+  <div id="nonSecretTitle">采购管理规定（第{number}号）</div>
+  <div class="info">发布时间：{publish_date} 来源：采购管理部门</div>
+  <div class="txt" id="content">
+{paragraphs}
+    <script>trackView({number});</script>
+  </div>
+  {enclosure}
+</div>
+<div class="footer">版权所有</div>
+</body>
+</html>"""
+
+
+class FixtureServer:
+    """在后台线程中运行的夹具服务器"""
+
+    def __init__(
+        self,
+        pages: int = 5,
+        page_size: int = 20,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        attachment_ratio: float = 0.3,
+        fixtures_dir: Path | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.pages = pages
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.attachment_ratio = attachment_ratio
+        self.fixtures_dir = Path(fixtures_dir) if fixtures_dir else None
+
+        self.requests: dict[str, int] = {"list": 0, "detail": 0, "attachment": 0, "not_modified": 0}
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(_Handler):
+            fixture = server
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fixture-server", daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        return self.base_url + API_PATH
+
+    def start(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def record(self, kind: str, size: int) -> None:
+        with self._lock:
+            self.requests[kind] += 1
+            self.bytes_sent += size
+
+    def delay(self) -> None:
+        wait = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if wait > 0:
+            time.sleep(wait)
+
+    def attachment_kind(self, number: int) -> str | None:
+        """第 number 条是否带附件及附件类型（按编号确定，多次运行结果一致）"""
+        if random.Random(number).random() >= self.attachment_ratio:
+            return None
+        return ATTACHMENT_TYPES[number % len(ATTACHMENT_TYPES)]
+
+    def recorded(self, path: str) -> bytes | None:
+        """录制的夹具文件（不存在时返回 None）"""
+        if self.fixtures_dir is None:
+            return None
+        file = (self.fixtures_dir / path.lstrip("/")).resolve()
+        if self.fixtures_dir.resolve() not in file.parents or not file.is_file():
+            return None
+        return file.read_bytes()
+
+    def list_page(self, lmid: str, page: int) -> bytes:
+        recorded = self.recorded(f"api/{lmid}/{page}.json")
+        if recorded is not None:
+            return recorded
+
+        start = (page - 1) * self.page_size
+        count = max(0, min(self.page_size, self.pages * self.page_size - start))
+        items = [
+            {
+                "BT": f"采购管理规定（第{number}号）",
+                "pcUrl": f"/detail/{lmid}/{number}.html",
+                "FBSJ": f"2024-{number % 12 + 1:02d}-{number % 28 + 1:02d}",
+            }
+            for number in range(start + 1, start + count + 1)
+        ]
+        data = {"list": {"totalNum": self.pages * self.page_size, "contentList": items}}
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    fixture: FixtureServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.fixture.delay()
+
+        if url.path == API_PATH:
+            query = parse_qs(url.query)
+            lmid = query.get("lmid", [""])[0]
+            page = int(query.get("currentPage", ["1"])[0])
+            return self._send("list", self.fixture.list_page(lmid, page), "json")
+
+        match = _DETAIL_RE.match(url.path)
+        if match:
+            lmid, number = match.group(1), int(match.group(2))
+            body = self.fixture.recorded(url.path)
+            if body is None:
+                kind = self.fixture.attachment_kind(number)
+                body = detail_html(lmid, number, kind).encode("utf-8")
+
+            return self._send("detail", body, "html")
+
+        match = _FILE_RE.match(url.path)
+        if match:
+            number, kind = int(match.group(1)), match.group(2)
+            body = self.fixture.recorded(url.path)
+            if body is None:
+                body = attachment_bytes(number, kind)
+            return self._send("attachment", body, kind, etag=True)
+
+        self.send_error(404)
+
+    def _send(self, kind: str, body: bytes, content_type: str, etag: bool = False) -> None:
+        tag = f'"{hashlib.sha256(body).hexdigest()[:32]}"' if etag else None
+        if tag and self.headers.get("If-None-Match") == tag:
+            self.send_response(304)
+            self.send_header("ETag", tag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            self.fixture.record("not_modified", 0)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES[content_type])
+        self.send_header("Content-Length", str(len(body)))
+        if tag:
+            self.send_header("ETag", tag)
+        self.end_headers()
+        self.wfile.write(body)
+        self.fixture.record(kind, len(body))
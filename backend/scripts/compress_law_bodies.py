@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""迁移并压缩法规正文，输出空间节省情况
+
+    python scripts/compress_law_bodies.py                      # 迁移旧数据并统计
+    python scripts/compress_law_bodies.py --train-dictionary --vacuum
+
+步骤：
+1. 把旧版 laws 表中内联的 content / file_content 压缩后移到 law_bodies，删除旧列
+   （应用启动时只迁移数据、清空旧列，不可逆的删除旧列只在这里执行；--keep-columns 保留旧列）
+2. --train-dictionary：用最近的正文训练 zstd 字典，并用新字典重新压缩全部正文
+3. --recompress：用当前编码方式重新压缩全部正文（如安装 zstandard 之后）
+4. --vacuum：整理数据库文件，归还删除旧列和重新压缩后空出的空间
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+
+from app.database import Base, SessionLocal, engine, init_db
+from app.models import BodyDictionary, LawBody  # noqa: F401
+from app.services.body_codec import body_codec
+from app.services.body_store import (
+    body_size_report,
+    migrate_law_bodies,
+    recompress_law_bodies,
+    table_sizes,
+    train_body_dictionary,
+)
+
+
+def file_size(db) -> int | None:
+    """SQLite 数据库文件大小（含空闲页）"""
+    if engine.dialect.name != "sqlite":
+        return None
+    page_size = db.execute(text("PRAGMA page_size")).scalar()
+    return page_size * db.execute(text("PRAGMA page_count")).scalar()
+
+
+def _mb(value) -> str:
+    return f"{value / 1024 / 1024:.1f} MB" if value is not None else "-"
+
+
+def _progress(label):
+    def report(done):
+        print(f"\r{label}: {done} 条", end="", flush=True)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="迁移并压缩法规正文")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--train-dictionary", action="store_true", help="训练 zstd 字典并重新压缩")
+    parser.add_argument("--samples", type=int, default=2000, help="字典训练样本数")
+    parser.add_argument("--dictionary-size", type=int, default=64 * 1024, help="字典大小（字节）")
+    parser.add_argument("--recompress", action="store_true", help="用当前编码方式重新压缩全部正文")
+    parser.add_argument("--keep-columns", action="store_true",
+                        help="迁移后保留 laws 表中已清空的旧列")
+    parser.add_argument("--vacuum", action="store_true", help="整理数据库文件，归还空闲空间")
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        before, before_file = table_sizes(db), file_size(db)
+
+    # init_db 也会迁移旧数据（但不删除旧列），这里先单独迁移以便显示进度
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        migrated = migrate_law_bodies(
+            db, args.batch_size, drop_columns=not args.keep_columns, progress=_progress("迁移")
+        )
+    if migrated:
+        print()
+    init_db()
+
+    with SessionLocal() as db:
+        if args.train_dictionary:
+            if body_codec.method != "zstd":
+                print("训练字典需要 zstd 压缩"
+                      "（安装 zstandard 并设置 BODY_COMPRESSION=auto 或 zstd）")
+                return 1
+            dict_id = train_body_dictionary(db, args.samples, args.dictionary_size)
+            print(f"已训练字典 {dict_id}")
+        if args.train_dictionary or args.recompress:
+            recompress_law_bodies(db, args.batch_size, progress=_progress("重新压缩"))
+            print()
+        report = body_size_report(db)
+
+    if args.vacuum:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM FULL" if engine.dialect.name == "postgresql" else "VACUUM"))
+
+    with SessionLocal() as db:
+        after, after_file = table_sizes(db), file_size(db)
+
+    print(f"迁移旧数据 {migrated} 条，编码方式 {body_codec.method}，"
+          f"字典 {report['dictionaries']} 个")
+    print(f"正文 {report['rows']} 条：原始 {_mb(report['raw_bytes'])}，"
+          f"压缩后 {_mb(report['stored_bytes'])}，"
+          f"压缩比 {report['ratio'] or '-'}，节省 {_mb(report['saved_bytes'])}")
+
+    print(f"编码格式: {report['formats']}")
+    # 全文索引（laws_fts / laws_search）往往比压缩后的正文还大，一并列出
+    for table in after:
+        print(f"{table} 表: {_mb(before.get(table, 0))} -> {_mb(after[table])}")
+    if after:
+        print(f"以上合计: {_mb(sum(before.values()))} -> {_mb(sum(after.values()))}")
+    if before_file is not None:
+        print(f"数据库文件大小: {_mb(before_file)} -> {_mb(after_file)}"
+              + ("" if args.vacuum else "（加 --vacuum 归还空闲空间）"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""读接口基准测试工具测试"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.api_benchmark import ScenarioUrls, compare, percentile, summarize_samples
+from benchmarks.corpus import generate_corpus
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize_and_compare():
+    summary = summarize_samples([0.01, 0.02, 0.03, 0.04], [100, 300], errors=1, elapsed=2.0)
+    assert summary["p50_ms"] == 20.0
+    assert summary["throughput"] == 2.0
+    assert summary["mean_bytes"] == 200
+
+    baseline = {"scenarios": {"search_common": {"p95_ms": 10.0}, "detail": {"p95_ms": 5.0}}}
+    result = {"scenarios": {
+        "search_common": {"p95_ms": 13.0}, "detail": {"p95_ms": 5.5}, "new": {"p95_ms": 1},
+    }}
+
+    regressions = compare(result, baseline, tolerance=0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("search_common")
+
+
+def test_scenario_urls():
+    urls = ScenarioUrls(rows=1000, law_ids=[7], cursors=["abc"])
+    assert urls.url("detail") == "/api/laws/7"
+    assert urls.url("list_cursor").endswith("cursor=abc")
+    page = int(urls.url("list_offset_deep").rsplit("=", 1)[1])
+    assert 25 <= page <= 50
+
+
+def test_generate_corpus_is_resumable(db):
+    from app.models.law import Law
+
+    assert generate_corpus(db, 30, batch_size=20) == 30
+    assert generate_corpus(db, 45, batch_size=20) == 15
+    assert db.query(Law).count() == 45
+    law = db.query(Law).filter(Law.id == 1).one()
+    assert law.summary
+    assert law.content.startswith('<div class="txt" id="content">')
+
+
+def test_api_benchmark_smoke(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    command = [
+        sys.executable, "-m", "benchmarks.api_benchmark",
+        "--rows", "60", "--db", str(tmp_path / "bench.db"),
+        "--requests", "5", "--warmup", "1", "--concurrency", "2",
+        "--scenario", "list_cursor", "--scenario", "search_common", "--scenario", "detail",
+    ]
+    subprocess.run(command + ["--save-baseline", str(baseline)], cwd=BACKEND_DIR, check=True,
+                   capture_output=True, timeout=120)
+    result = json.loads(baseline.read_text(encoding="utf-8"))
+
+    assert result["config"]["rows"] == 60
+    assert set(result["scenarios"]) == {"list_cursor", "search_common", "detail"}
+    assert all(s["errors"] == 0 and s["requests"] == 5 for s in result["scenarios"].values())
+
+    # 基线极快时以 0 容差比较必然报告变慢，用来验证比较路径和退出码
+    for scenario in result["scenarios"].values():
+        scenario["p95_ms"] = 1e-6
+    baseline.write_text(json.dumps(result), encoding="utf-8")
+    compared = subprocess.run(command + ["--baseline", str(baseline), "--tolerance", "0"],
+                              cwd=BACKEND_DIR, capture_output=True, timeout=120)
+    assert compared.returncode == 1
@@ -0,0 +1,77 @@
+"""压缩包流式解析测试"""
+import io
+import zipfile
+
+import py7zr
+
+from app.config import settings
+from app.services.archive_reader import ArchiveBudget, iter_members
+from app.services.attachment_parser import parse_archive, parse_file
+
+
+def _zip(files: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+class TestArchiveReader:
+    """成员读取测试"""
+
+    def test_only_wanted_members_are_read(self):
+        data = _zip({"a.txt": b"aaa", "image.png": b"x" * 1000, "dir/b.txt": b"bbb"})
+        budget = ArchiveBudget(max_bytes=100, max_members=10)
+
+        members = [
+            (m.name, m.file.read() if m.file else None)
+            for m in iter_members("x.zip", io.BytesIO(data), budget, lambda n: n.endswith(".txt"))
+        ]
+
+        assert members == [("a.txt", b"aaa"), ("image.png", None), ("dir/b.txt", b"bbb")]
+        assert budget.remaining_bytes == 94
+
+    def test_gbk_member_names(self):
+        # zipfile 写入非 ASCII 文件名时总会用 UTF-8，这里直接替换字节模拟 GBK 编码的压缩包
+        data = _zip({"XXXX.txt": "正文".encode()}).replace(b"XXXX.txt", "附件.txt".encode("gbk"))
+
+        text = parse_archive(io.BytesIO(data), "x.zip")
+        assert text == "=== 附件.txt ===\n正文"
+
+    def test_7z(self, tmp_path):
+        path = tmp_path / "bundle.7z"
+        with py7zr.SevenZipFile(path, "w") as szf:
+            szf.writestr("第一条".encode(), "a.txt")
+            szf.writestr(b"\x89PNG", "b.png")
+
+        assert parse_file(str(path)) == "=== a.txt ===\n第一条"
+
+
+class TestArchiveLimits:
+    """压缩炸弹防护"""
+
+    def test_total_size_cap_keeps_parsed_part(self, monkeypatch):
+        monkeypatch.setattr(settings, "crawler_archive_max_bytes", 1000)
+        data = _zip({"a.txt": b"small", "bomb.txt": b"0" * 100_000, "c.txt": b"never"})
+
+        # 压缩后很小，解压到额度时中止
+        assert len(data) < 1000
+        assert parse_archive(io.BytesIO(data), "x.zip") == "=== a.txt ===\nsmall"
+
+    def test_nesting_depth(self, monkeypatch):
+        monkeypatch.setattr(settings, "crawler_archive_max_depth", 1)
+        inner = _zip({"deep.txt": b"deep"})
+        middle = _zip({"inner.zip": inner, "mid.txt": b"mid"})
+        outer = _zip({"middle.zip": middle})
+
+        text = parse_archive(io.BytesIO(outer), "outer.zip")
+        assert "mid" in text
+        assert "deep" not in text
+
+    def test_member_count_cap(self, monkeypatch):
+        monkeypatch.setattr(settings, "crawler_archive_max_members", 3)
+        data = _zip({f"{i}.txt": str(i).encode() for i in range(10)})
+
+        text = parse_archive(io.BytesIO(data), "x.zip")
+        assert text.count("===") == 6  # 只解析了前 3 个成员
@@ -0,0 +1,139 @@
+"""异步抓取后端测试"""
+import asyncio
+from datetime import date
+from pathlib import Path
+
+import httpx
+
+from app.config import settings
+from app.models import Attachment, Law
+from app.services import async_pipeline
+from app.services.async_fetcher import AsyncFetcher
+from app.services.rate_limiter import HostRateLimiter
+
+
+def _fetcher(handler, **kwargs):
+    return AsyncFetcher(
+        {}, HostRateLimiter(rate=0, burst=1), http2=False,
+        transport=httpx.MockTransport(handler), **kwargs,
+    )
+
+
+class TestAsyncFetcher:
+    """AsyncFetcher 测试"""
+
+    def test_retry_then_success(self, monkeypatch):
+        """失败后退避重试"""
+        monkeypatch.setattr(settings, "crawler_request_delay", 0.001)
+        calls = []
+
+        def handler(request):
+            calls.append(request.url)
+            return httpx.Response(503 if len(calls) < 2 else 200, text="ok")
+
+        async def run():
+            fetcher = _fetcher(handler)
+            try:
+                return await fetcher.get("https://a.example.com/x")
+            finally:
+                await fetcher.aclose()
+
+        response = asyncio.run(run())
+        assert response.text == "ok"
+        assert len(calls) == 2
+
+    def test_per_host_concurrency(self):
+        """同一主机的并发请求数不超过上限"""
+        active = {"now": 0, "max": 0}
+
+        async def handler(request):
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+            return httpx.Response(200)
+
+        async def run():
+            fetcher = _fetcher(handler, max_per_host=2)
+            try:
+                await asyncio.gather(*(fetcher.get(f"https://a.example.com/{i}") for i in range(6)))
+            finally:
+                await fetcher.aclose()
+
+        asyncio.run(run())
+        assert active["max"] == 2
+
+    def test_stream_releases_slot_on_cancel(self):
+        """流式请求在发送阶段被取消或抛出其他异常时释放主机连接槽"""
+        async def handler(request):
+            if request.url.path == "/slow":
+                await asyncio.sleep(10)
+            raise RuntimeError("boom")
+
+        async def fetch(fetcher, url):
+            async with fetcher.stream(url):
+                pass
+
+        async def run():
+            fetcher = _fetcher(handler, max_per_host=1)
+            try:
+                task = asyncio.create_task(fetch(fetcher, "https://a.example.com/slow"))
+                await asyncio.sleep(0.01)
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                await asyncio.gather(
+                    asyncio.wait_for(fetch(fetcher, "https://a.example.com/boom"), 1),
+                    return_exceptions=True,
+                )
+                return fetcher._slot("https://a.example.com/").locked()
+            finally:
+                await fetcher.aclose()
+
+        assert asyncio.run(run()) is False
+
+
+def test_async_pipeline(db, tmp_path, monkeypatch):
+    """详情页与附件通过异步后端抓取，解析沿用爬虫方法"""
+    from app.services.attachment_parser import attachment_parser
+    from app.services.crawler import CrawlerService
+
+    monkeypatch.setattr(settings, "attachment_dir", tmp_path)
+    monkeypatch.setattr(attachment_parser, "workers", 0)
+
+    class FakeCrawler(CrawlerService):
+        def _parse_detail_page(self, html, url, category):
+            return {
+                "title": html,
+                "category": category,
+                "publish_date": None,
+                "source_url": url,
+                "file_url": f"{url}.txt" if html == "with-file" else None,
+                "hash": url,
+            }
+
+    def handler(request):
+        path = request.url.path
+        if path.endswith(".txt"):
+            return httpx.Response(200, content="附件内容".encode(), headers={"ETag": '"v1"'})
+        return httpx.Response(200, text=path.rsplit("/", 1)[-1])
+
+    monkeypatch.setattr(
+        async_pipeline, "AsyncFetcher",
+        lambda headers, limiter: AsyncFetcher(
+            headers, limiter, http2=False, transport=httpx.MockTransport(handler)
+        ),
+    )
+
+    crawler = FakeCrawler(db)
+    with async_pipeline.AsyncCrawlPipeline(crawler, "法律") as pipeline:
+        pipeline.submit({"pcUrl": "/law/plain", "FBSJ": "2024-01-02"})
+        pipeline.submit({"pcUrl": "/law/with-file"})
+        pipeline.submit({"BT": "无链接"})
+
+    assert pipeline.count == 2
+    laws = {law.title: law for law in db.query(Law)}
+    assert laws["plain"].publish_date == date(2024, 1, 2)
+    assert laws["with-file"].file_content == "附件内容"
+    assert laws["with-file"].attachment_status == "ok"
+    assert Path(laws["with-file"].file_path).exists()
+    assert db.query(Attachment).one().etag == '"v1"'
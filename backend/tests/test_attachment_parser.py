@@ -0,0 +1,93 @@
+"""附件解析进程池测试"""
+import os
+import time
+
+import pytest
+
+from app.services.attachment_parser import AttachmentParseError, AttachmentParser
+
+
+def _make_pdf(texts: list[str]) -> bytes:
+    """生成每页一行文字的最小 PDF"""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(len(texts))), len(texts)
+        ),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(texts):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    trailer = f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    out += trailer.encode()
+    return out
+
+
+@pytest.fixture
+def parser():
+    parser = AttachmentParser(workers=2, timeout=1, memory_mb=0, pdf_pages_per_task=2)
+    yield parser
+    parser.shutdown()
+
+
+class TestAttachmentParser:
+    """进程池解析测试"""
+
+    def test_pdf_pages_in_parallel(self, parser, tmp_path):
+        """多页 PDF 按页段拆分解析，结果按页序拼接"""
+        path = tmp_path / "law.pdf"
+        pages = ["page one", "page two", "page three", "page four", "page five"]
+        path.write_bytes(_make_pdf(pages))
+
+        assert parser.parse(path) == "page one\npage two\npage three\npage four\npage five"
+
+    def test_timeout(self, parser):
+        """超时的解析被中断"""
+        start = time.monotonic()
+        with pytest.raises(AttachmentParseError):
+            parser._result(*parser._submit(time.sleep, 10))
+        assert time.monotonic() - start < 5
+
+    def test_queued_task_timeout(self):
+        """排队的任务在工作进程内超时：报解析失败，不终止进程池"""
+        parser = AttachmentParser(workers=1, timeout=1, memory_mb=0)
+        try:
+            tasks = [parser._submit(time.sleep, 10) for _ in range(3)]
+            executor, future = tasks[-1]
+            start = time.monotonic()
+            with pytest.raises(AttachmentParseError, match="解析超时"):
+                parser._result(executor, future)
+            assert time.monotonic() - start < 15
+            assert parser._executor is executor
+        finally:
+            parser.shutdown()
+
+    def test_killed_worker_does_not_break_parser(self, parser, tmp_path):
+        """工作进程异常退出后进程池自动重建"""
+        with pytest.raises(AttachmentParseError):
+            parser._result(*parser._submit(os._exit, 1))
+
+        path = tmp_path / "a.txt"
+        path.write_text("附件内容", encoding="utf-8")
+        assert parser.parse(path) == "附件内容"
+
+    def test_invalid_file(self, parser, tmp_path):
+        path = tmp_path / "broken.docx"
+        path.write_bytes(b"not a docx")
+
+        with pytest.raises(AttachmentParseError):
+            parser.parse(path)
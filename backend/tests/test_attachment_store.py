@@ -0,0 +1,215 @@
+"""附件内容寻址存储与条件请求测试"""
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from app.config import settings
+from app.models import Attachment, Law
+from app.services.attachment_store import AttachmentRejectedError, AttachmentStore
+from app.services.filetype import sniff_suffix
+
+
+class FakeResponse:
+    """模拟 requests 的流式响应"""
+
+    def __init__(self, status_code=200, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class TestAttachmentStore:
+    """存储测试"""
+
+    def test_same_content_stored_once(self, tmp_path):
+        store = AttachmentStore(tmp_path)
+
+        with store.writer(".PDF") as first:
+            first.write(b"hello ")
+            first.write(b"world")
+        with store.writer(".pdf") as second:
+            second.write(b"hello world")
+
+        digest = hashlib.sha256(b"hello world").hexdigest()
+        assert first.digest == second.digest == digest
+        assert first.path == second.path == store.path_for(digest, ".pdf")
+        assert (first.existed, second.existed) == (False, True)
+        assert list(store.tmp_dir.iterdir()) == []
+
+    def test_failed_write_is_discarded(self, tmp_path):
+        store = AttachmentStore(tmp_path)
+
+        with pytest.raises(RuntimeError):
+            with store.writer(".pdf") as obj:
+                obj.write(b"partial")
+                raise RuntimeError("连接中断")
+
+        assert list(store.tmp_dir.iterdir()) == []
+        assert not any(store.objects_dir.rglob("*.pdf"))
+
+
+    def test_suffix_from_magic_bytes(self, tmp_path):
+        store = AttachmentStore(tmp_path)
+
+        with store.writer(".do") as obj:
+            obj.write(b"%PDF-1.4\n")
+            obj.write(b"0" * 4096)
+
+        assert obj.path.suffix == ".pdf"
+
+    def test_html_error_page_rejected(self, tmp_path):
+        store = AttachmentStore(tmp_path)
+
+        with pytest.raises(AttachmentRejectedError):
+            with store.writer(".pdf") as obj:
+                obj.write(b"<!DOCTYPE html><html>404</html>")
+
+        assert not any(store.objects_dir.rglob("*.*"))
+
+    def test_size_limit(self, tmp_path):
+        store = AttachmentStore(tmp_path)
+
+        with pytest.raises(AttachmentRejectedError):
+            with store.writer(".txt", max_bytes=10) as obj:
+                obj.write(b"12345")
+                obj.write(b"678901")
+
+        assert list(store.tmp_dir.iterdir()) == []
+
+
+def test_sniff_suffix():
+    assert sniff_suffix(b"PK\x03\x04....word/document.xml", ".do") == ".docx"
+    assert sniff_suffix(b"PK\x03\x04....", "") == ".zip"
+    assert sniff_suffix(b"PK\x03\x04....", ".xlsx") == ".xlsx"
+    assert sniff_suffix(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "") == ".doc"
+    assert sniff_suffix(b"Rar!\x1a\x07\x00", ".zip") == ".rar"
+    assert sniff_suffix(b"plain text", ".txt") == ".txt"
+
+
+@pytest.fixture
+def crawler(db, tmp_path, monkeypatch):
+    from app.services.attachment_parser import attachment_parser
+    from app.services.crawler import CrawlerService
+
+    monkeypatch.setattr(settings, "attachment_dir", tmp_path)
+    monkeypatch.setattr(attachment_parser, "workers", 0)
+    crawler = CrawlerService(db)
+    crawler.requests = []
+    crawler.parsed = []
+    crawler.responses = []
+
+    def request(url, **kwargs):
+        crawler.requests.append(kwargs.get("headers") or {})
+        return crawler.responses.pop(0)
+
+    parse = crawler._parse_file_content
+
+    def parse_file(path, digest=None):
+        crawler.parsed.append(path)
+        return parse(path, digest)
+
+    crawler._request_with_retry = request
+    crawler._parse_file_content = parse_file
+    return crawler
+
+
+def _law(url, n):
+    return {
+        "title": f"法规{n}",
+        "category": "国家颁布法规",
+        "source_url": f"https://example.com/law/{n}",
+        "file_url": url,
+        "hash": str(n),
+    }
+
+
+class TestConditionalFetch:
+    """重新爬取时的条件请求"""
+
+    URL = "https://example.com/files/a.txt"
+
+    def test_not_modified_skips_download_and_parse(self, crawler, db):
+        crawler.responses = [FakeResponse(200, "附件正文".encode(), {"ETag": '"v1"'})]
+        law_data = _law(self.URL, 1)
+        crawler._attach(law_data)
+        crawler._save_laws([law_data])
+        assert crawler.requests[-1] == {}
+
+        crawler.responses = [FakeResponse(304)]
+        law_data = _law(self.URL, 1)
+        crawler._attach(law_data)
+        crawler._save_laws([law_data])
+
+        assert crawler.requests[-1] == {"If-None-Match": '"v1"'}
+        assert len(crawler.parsed) == 1
+        law = db.query(Law).one()
+        assert law.file_content == "附件正文"
+        assert law.attachment_status == "ok"
+
+    def test_same_digest_from_other_url_reuses_text(self, crawler, db):
+        crawler.responses = [
+            FakeResponse(200, b"same bytes", {"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+            FakeResponse(200, b"same bytes"),
+        ]
+        first, second = _law(self.URL, 1), _law("https://example.com/files/b.txt", 2)
+        crawler._attach(first)
+        crawler._attach(second)
+        crawler._save_laws([first, second])
+
+        assert len(crawler.parsed) == 1
+        assert {law.file_content for law in db.query(Law)} == {"same bytes"}
+        manifest = {a.file_url: a for a in db.query(Attachment)}
+        assert manifest[self.URL].digest == manifest["https://example.com/files/b.txt"].digest
+        assert manifest[self.URL].last_modified == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+    def test_declared_size_over_limit(self, crawler, monkeypatch):
+        monkeypatch.setattr(settings, "crawler_max_attachment_bytes", 100)
+        crawler.responses = [FakeResponse(200, b"x" * 50, {"Content-Length": "1000"})]
+
+        law_data = _law(self.URL, 1)
+        crawler._attach(law_data)
+        assert law_data["attachment_status"] == "failed"
+        assert crawler.parsed == []
+
+    def test_missing_local_file_disables_conditional_get(self, crawler):
+        crawler.responses = [FakeResponse(200, b"v1", {"ETag": '"v1"'})]
+        law_data = _law(self.URL, 1)
+        crawler._attach(law_data)
+        crawler._save_laws([law_data])
+
+        Path(law_data["file_path"]).unlink()
+        assert crawler._conditional_headers(self.URL) == {}
+
+
+def test_streamed_request_does_not_read_body(db, monkeypatch):
+    """流式请求不做编码探测（apparent_encoding 会在大小检查前读完响应体）"""
+    from app.services.crawler import CrawlerService
+
+    class StreamedResponse(FakeResponse):
+        encoding = "ISO-8859-1"
+
+        def raise_for_status(self):
+            pass
+
+        @property
+        def apparent_encoding(self):
+            raise AssertionError("读取了流式响应体")
+
+    crawler = CrawlerService(db)
+    response = StreamedResponse(200, b"text", {"Content-Type": "text/plain"})
+    monkeypatch.setattr(crawler.session, "get", lambda url, **kwargs: response)
+
+    url = "https://example.com/a.txt"
+    assert crawler._request_with_retry(url, kind="attachment", stream=True) is response
+    assert response.encoding == "ISO-8859-1"
@@ -0,0 +1,84 @@
+"""基准测试夹具服务器测试"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import requests
+
+from benchmarks.fixture_server import API_PATH, FixtureServer, attachment_bytes
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def test_list_pages_and_details(tmp_path):
+    with FixtureServer(pages=2, page_size=3, attachment_ratio=1.0) as server:
+        first = requests.get(server.api_url, params={"lmid": "1", "currentPage": 1}).json()["list"]
+        last = requests.get(server.api_url, params={"lmid": "1", "currentPage": 3}).json()["list"]
+        detail = requests.get(server.base_url + first["contentList"][0]["pcUrl"])
+
+    assert first["totalNum"] == 6
+    urls = [item["pcUrl"] for item in first["contentList"]]
+    assert urls == [f"/detail/1/{n}.html" for n in (1, 2, 3)]
+    assert last["contentList"] == []
+    assert 'id="nonSecretTitle"' in detail.text
+    assert 'id="enclosureName"' in detail.text
+    assert server.requests["list"] == 2
+    assert server.requests["detail"] == 1
+    assert server.bytes_sent > len(detail.content)
+
+
+def test_attachment_etag_and_recorded_fixtures(tmp_path):
+    recorded = tmp_path / "api" / "7"
+    recorded.mkdir(parents=True)
+    (recorded / "1.json").write_text('{"list": {"totalNum": 1, "contentList": []}}')
+
+    with FixtureServer(fixtures_dir=tmp_path) as server:
+        response = requests.get(server.base_url + "/files/3.pdf")
+        cached = requests.get(
+            server.base_url + "/files/3.pdf", headers={"If-None-Match": response.headers["ETag"]}
+        )
+        replayed = requests.get(
+            server.base_url + API_PATH, params={"lmid": "7", "currentPage": 1}
+        ).json()
+
+        escaped = requests.get(server.base_url + "/detail/../../etc/1.html")
+
+    assert response.content == attachment_bytes(3, "pdf")
+    assert response.content.startswith(b"%PDF-")
+    assert cached.status_code == 304
+    assert server.requests["not_modified"] == 1
+    assert replayed["list"]["totalNum"] == 1
+    assert escaped.status_code == 404
+
+
+def test_generated_attachments_are_distinct_and_parseable(tmp_path):
+    from app.services.attachment_parser import parse_file
+
+    for kind in ("pdf", "docx", "zip"):
+        path = tmp_path / f"sample.{kind}"
+        path.write_bytes(attachment_bytes(5, kind))
+        assert "5" in parse_file(path)
+        assert attachment_bytes(5, kind) != attachment_bytes(6, kind)
+
+
+def test_crawl_benchmark_smoke(tmp_path):
+    output = tmp_path / "result.json"
+    subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.crawl_benchmark",
+            "--pages", "1", "--page-size", "4", "--latency", "0",
+            "--parse-workers", "0", "--json", str(output),
+        ],
+        cwd=BACKEND_DIR,
+        check=True,
+        capture_output=True,
+        timeout=120,
+    )
+    result = json.loads(output.read_text(encoding="utf-8"))
+
+    assert result["items"] == 4
+    assert result["requests"]["detail"] == 4
+    assert result["stages"]["extract"]["calls"] == 4
+    assert result["crawl_stats"]["profile_misses"] == 0
+    assert result["peak_rss_mb"]["self"] > 0
@@ -0,0 +1,172 @@
+"""后台爬取任务测试"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.job import CrawlJob
+from app.models.state import JobLock, acquire_lock, refresh_lock, release_lock
+from app.services import jobs
+
+
+class TestJobLock:
+    """租约锁测试"""
+
+    def test_exclusive_until_released(self, db):
+        assert acquire_lock(db, "crawl", "a", ttl=60) is True
+        assert acquire_lock(db, "crawl", "b", ttl=60) is False
+        assert refresh_lock(db, "crawl", "b", ttl=60) is False
+
+        release_lock(db, "crawl", "a")
+        assert acquire_lock(db, "crawl", "b", ttl=60) is True
+
+    def test_expired_lock_can_be_taken_over(self, db):
+        assert acquire_lock(db, "crawl", "a", ttl=60) is True
+        db.get(JobLock, "crawl").expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+
+        assert acquire_lock(db, "crawl", "b", ttl=60) is True
+        assert refresh_lock(db, "crawl", "a", ttl=60) is False
+
+
+class FakeCrawler:
+    """模拟爬虫：按页回调进度"""
+
+    def __init__(self, db, progress=None, stop=None):
+        from app.services.crawl_pipeline import CrawlStats
+
+        self.db = db
+        self.progress = progress
+        self.stats = CrawlStats()
+        self.failed_categories = []
+
+    def crawl_category(self, category_name, incremental=False):
+        if category_name == "坏分类":
+            raise RuntimeError("boom")
+        self.stats.pages_total = 2
+        for _ in range(2):
+            self.stats.pages_done += 1
+            self.stats.items_new += 3
+            self.progress(self.stats)
+        return 6
+
+
+@pytest.fixture
+def job_env(db_engine, monkeypatch):
+    """任务使用内存数据库，后台线程改为同步执行"""
+    import app.services.crawler as crawler_module
+
+    monkeypatch.setattr(jobs, "SessionLocal", sessionmaker(bind=db_engine))
+    monkeypatch.setattr(crawler_module, "CrawlerService", FakeCrawler)
+
+    class SyncExecutor:
+        def submit(self, fn, *args):
+            fn(*args)
+
+    monkeypatch.setattr(jobs, "_executor", SyncExecutor())
+
+
+class TestCrawlJobs:
+    """任务提交与进度查询"""
+
+    def test_start_and_query_progress(self, api_client, job_env, db):
+        response = api_client.post("/api/crawl/start", params={"category": "国家颁布法规"})
+        assert response.status_code == 200
+        task_id = response.json()["task_id"]
+
+        status = api_client.get(f"/api/crawl/status/{task_id}").json()
+        assert status["status"] == "success"
+        assert status["pages_done"] == 2
+        assert status["items_new"] == 6
+        assert status["finished_at"] is not None
+
+        # 任务结束后释放锁
+        assert db.query(JobLock).count() == 0
+        assert api_client.get("/api/crawl/status").json()["is_running"] is False
+
+    def test_rejects_concurrent_job(self, api_client, db):
+        acquire_lock(db, jobs.CRAWL_LOCK, "other-process", ttl=60)
+
+        response = api_client.post("/api/crawl/start")
+        assert response.status_code == 400
+
+    def test_failed_job(self, db, job_env, monkeypatch):
+        from app.config import settings
+
+        monkeypatch.setitem(settings.categories, "坏分类", "bad")
+        job = jobs.create_crawl_job(db, "坏分类", incremental=False)
+        jobs.run_crawl_job(job.id, "坏分类", False)
+
+        db.expire_all()
+        job = db.get(CrawlJob, job.id)
+        assert job.status == "failed"
+        assert "boom" in job.error_message
+
+    def test_full_run_with_failed_categories(self, db_engine, db, monkeypatch):
+        """有分类失败时全量任务不记为成功，下次调度仍会全量同步"""
+        from app.scheduler.tasks import needs_full_resync
+        from app.services.crawler import CrawlerService
+
+        monkeypatch.setattr(jobs, "SessionLocal", sessionmaker(bind=db_engine))
+        monkeypatch.setattr(CrawlerService, "_fetch_list_via_api", lambda self, lmid, page: None)
+        job = jobs.create_crawl_job(db, None, incremental=False)
+        jobs.run_crawl_job(job.id, None, False)
+
+        db.expire_all()
+        job = db.get(CrawlJob, job.id)
+        assert job.status == "failed"
+        assert "国家颁布法规" in job.error_message
+        assert needs_full_resync(db) is True
+
+    def test_stale_job_marked_failed(self, db):
+        stale = jobs.create_crawl_job(db, None, incremental=True)
+        db.get(JobLock, jobs.CRAWL_LOCK).expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+
+        jobs.create_crawl_job(db, None, incremental=True)
+        db.expire_all()
+        assert db.get(CrawlJob, stale.id).status == "failed"
+
+    def test_expired_lease_not_reported_running(self, api_client, db):
+        """进程退出后任务停留在 running，租约到期后状态接口不再报告运行中"""
+        job = jobs.create_crawl_job(db, None, incremental=True)
+        db.get(CrawlJob, job.id).status = "running"
+        db.commit()
+        assert api_client.get("/api/crawl/status").json()["task_id"] == job.id
+
+        db.get(JobLock, jobs.CRAWL_LOCK).expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+        assert api_client.get("/api/crawl/status").json()["is_running"] is False
+
+    def test_lost_lease_stops_crawl(self, db_engine, db, monkeypatch):
+        """锁被其他进程接管后，心跳通知爬虫在下一页前中止，任务记为失败"""
+        from app.config import settings
+        from app.services.crawler import CrawlerService
+
+        monkeypatch.setattr(jobs, "SessionLocal", sessionmaker(bind=db_engine))
+        monkeypatch.setattr(settings, "crawl_lock_ttl_seconds", 0.3)
+        pages = []
+
+        def fetch(crawler, lmid, page):
+            pages.append(page)
+            if page == 2:
+                lock = db.get(JobLock, jobs.CRAWL_LOCK)
+                lock.owner = "other-process"
+                db.commit()
+                assert crawler.stop.wait(5)
+            return {"totalNum": settings.crawler_page_size * 3, "contentList": []}
+
+        monkeypatch.setattr(CrawlerService, "_fetch_list_via_api", fetch)
+        job = jobs.create_crawl_job(db, "国家颁布法规", incremental=False)
+        jobs.run_crawl_job(job.id, "国家颁布法规", False)
+
+        assert pages == [1, 2]
+        db.expire_all()
+        job = db.get(CrawlJob, job.id)
+        assert job.status == "failed"
+        assert "爬取锁" in job.error_message
+        # 不释放其他进程持有的锁
+        assert db.get(JobLock, jobs.CRAWL_LOCK).owner == "other-process"
+
+    def test_unknown_task(self, api_client):
+        assert api_client.get("/api/crawl/status/nope").status_code == 404
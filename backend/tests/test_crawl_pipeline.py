@@ -0,0 +1,97 @@
+"""抓取流水线与限速测试"""
+import threading
+import time
+from datetime import datetime
+from unittest.mock import Mock
+
+from app.services.crawl_pipeline import CrawlPipeline
+from app.services.rate_limiter import HostRateLimiter, TokenBucket
+
+
+class TestTokenBucket:
+    """令牌桶测试"""
+
+    def test_burst_then_throttle(self):
+        """突发额度用完后按速率放行"""
+        bucket = TokenBucket(rate=20.0, capacity=2)
+
+        start = time.monotonic()
+        for _ in range(4):
+            bucket.acquire()
+        elapsed = time.monotonic() - start
+
+        # 前 2 个立即放行，后 2 个各等待约 1/20 秒
+        assert 0.08 <= elapsed < 0.5
+
+    def test_hosts_are_independent(self):
+        """不同主机互不影响"""
+        limiter = HostRateLimiter(rate=1.0, burst=1)
+
+        assert limiter.acquire("https://a.example.com/x") == 0
+        assert limiter.acquire("https://b.example.com/y") == 0
+
+
+class FakeCrawler:
+    """模拟爬虫：记录各阶段调用的线程"""
+
+    def __init__(self):
+        self.db = Mock()
+        self.saved = []
+        self.save_threads = set()
+        self.lock = threading.Lock()
+
+    def _parse_date(self, value):
+        return datetime.strptime(value, "%Y-%m-%d")
+
+    def _crawl_detail_page(self, url, category, download_attachments=True):
+        assert download_attachments is False
+        if url.endswith("/broken"):
+            raise RuntimeError("boom")
+        if url.endswith("/missing"):
+            return None
+        return {
+            "title": url.rsplit("/", 1)[-1],
+            "category": category,
+            "publish_date": None,
+            "file_url": f"{url}.pdf" if url.endswith("/with-file") else None,
+            "hash": url,
+        }
+
+    def _attach(self, law_data):
+        law_data["file_path"] = f"/tmp/{law_data['title']}.pdf"
+        law_data["file_content"] = "附件内容"
+
+    def _save_laws(self, records):
+        self.save_threads.add(threading.get_ident())
+        self.saved.extend(records)
+        return len(records), 0
+
+
+class TestCrawlPipeline:
+    """流水线测试"""
+
+    def test_pipeline_writes_in_caller_thread(self):
+        """所有结果在调用方线程写入，失败条目（含详情页请求失败）不影响其他条目"""
+        crawler = FakeCrawler()
+        items = [{"pcUrl": f"/detail/{i}", "FBSJ": "2024-01-02"} for i in range(20)]
+        items += [
+            {"pcUrl": "/detail/with-file"},
+            {"pcUrl": "/detail/broken"},
+            {"pcUrl": "/detail/missing"},
+            {"pcUrl": ""},
+        ]
+
+        pipeline = CrawlPipeline(crawler, "国家颁布法规", detail_workers=3, attachment_workers=2)
+        with pipeline:
+            for item in items:
+                pipeline.submit(item)
+
+        assert pipeline.count == 21
+        assert pipeline.failed == 2
+        assert crawler.save_threads == {threading.get_ident()}
+        assert pipeline.stats.items_new == 21
+        assert pipeline.stats.items_failed == 2
+
+        by_title = {law["title"]: law for law in crawler.saved}
+        assert by_title["with-file"]["file_content"] == "附件内容"
+        assert by_title["0"]["publish_date"] == datetime(2024, 1, 2)
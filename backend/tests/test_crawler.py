@@ -63,11 +63,7 @@ class TestCrawlerService:
 
     def test_extract_title(self):
         """测试标题提取"""
-        from app.services.crawler import CrawlerService
-        from bs4 import BeautifulSoup
-
-        db = Mock()
-        crawler = CrawlerService(db)
+        from app.services.extractor import extract_detail
 
         html = """
         <html>
@@ -77,8 +73,7 @@ class TestCrawlerService:
             </body>
         </html>
         """
-        soup = BeautifulSoup(html, "lxml")
-        title = crawler._extract_title(soup)
+        title = extract_detail(html, "https://example.com/detail/1.html").title
 
         assert title == "法规真实标题"
 
@@ -0,0 +1,83 @@
+"""数据库配置档测试"""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import (
+    async_database_url,
+    create_async_db_engine,
+    create_db_engine,
+    database_profile,
+    run_read,
+)
+
+
+def test_sqlite_profile_pragmas(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'laws.db'}", echo=False)
+    try:
+        with engine.connect() as conn:
+            def pragma(name):
+                return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+            assert pragma("journal_mode") == "wal"
+            assert pragma("synchronous") == 1  # NORMAL
+            assert pragma("busy_timeout") == settings.sqlite_busy_timeout_ms
+            assert pragma("cache_size") == -settings.sqlite_cache_size_mb * 1024
+            assert pragma("mmap_size") == settings.sqlite_mmap_size_mb * 1024 * 1024
+    finally:
+        engine.dispose()
+
+
+def test_profile_must_match_url(monkeypatch):
+    assert database_profile("sqlite:///x.db") == "sqlite"
+    assert database_profile("postgresql+psycopg2://u@localhost/laws") == "postgresql"
+
+    monkeypatch.setattr(settings, "database_profile", "postgresql")
+    with pytest.raises(ValueError):
+        database_profile("sqlite:///x.db")
+
+    monkeypatch.setattr(settings, "database_profile", "mysql")
+    with pytest.raises(ValueError):
+        database_profile("mysql://u@localhost/laws")
+
+
+def test_postgresql_profile_pool():
+    pytest.importorskip("psycopg2")
+    engine = create_db_engine("postgresql+psycopg2://u:p@localhost/laws", echo=False)
+    try:
+        assert engine.pool.size() == settings.db_pool_size
+        assert engine.pool._max_overflow == settings.db_max_overflow
+        assert engine.pool._pre_ping
+    finally:
+        engine.dispose()
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:////data/laws.db") == "sqlite+aiosqlite:////data/laws.db"
+    assert async_database_url("postgresql+psycopg2://u:p@localhost/laws") == "postgresql+asyncpg://u:p@localhost/laws"
+
+
+def test_run_read_sync_session(db):
+    # 未开启异步会话时，查询在线程池中执行
+    result = run_read(db, lambda session: session.execute(text("SELECT 1")).scalar())
+    assert asyncio.run(result) == 1
+
+
+def test_run_read_async_session(tmp_path):
+    pytest.importorskip("greenlet")
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async def run():
+        engine = create_async_db_engine(f"sqlite:///{tmp_path / 'laws.db'}", echo=False)
+        try:
+            async with async_sessionmaker(engine)() as session:
+                return await run_read(
+                    session, lambda sync: sync.execute(text("PRAGMA journal_mode")).scalar()
+                )
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(run()) == "wal"
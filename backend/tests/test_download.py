@@ -0,0 +1,104 @@
+"""附件下载测试"""
+import hashlib
+
+import pytest
+
+from app.config import settings
+from app.models.law import create_law
+
+BODY = b"%PDF-1.4\n" + bytes(range(256)) * 40
+
+
+@pytest.fixture
+def law_id(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "attachment_dir", tmp_path)
+    digest = hashlib.sha256(BODY).hexdigest()
+    path = tmp_path / "objects" / digest[:2] / digest[2:4] / f"{digest}.pdf"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(BODY)
+    law = create_law(db, {
+        "title": "附件法规",
+        "category": "国家颁布法规",
+        "source_url": "https://example.com/law/1",
+        "file_url": "https://example.com/files/采购办法.pdf",
+        "file_path": str(path),
+    })
+    return law.id
+
+
+class TestDownload:
+    """下载接口测试"""
+
+    def test_full_download(self, api_client, law_id):
+        response = api_client.get(f"/api/laws/{law_id}/download")
+
+        assert response.status_code == 200
+        assert response.content == BODY
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["etag"] == f'"{hashlib.sha256(BODY).hexdigest()}"'
+        assert response.headers["content-disposition"].startswith("attachment; filename*=utf-8''")
+        assert "%E9%87%87%E8%B4%AD" in response.headers["content-disposition"]
+
+    def test_range(self, api_client, law_id):
+        response = api_client.get(
+            f"/api/laws/{law_id}/download", headers={"Range": "bytes=100-199"}
+        )
+
+        assert response.status_code == 206
+        assert response.content == BODY[100:200]
+        assert response.headers["content-range"] == f"bytes 100-199/{len(BODY)}"
+
+    def test_conditional(self, api_client, law_id):
+        first = api_client.get(f"/api/laws/{law_id}/download")
+
+        by_etag = api_client.get(
+            f"/api/laws/{law_id}/download", headers={"If-None-Match": first.headers["etag"]}
+        )
+        by_date = api_client.get(
+            f"/api/laws/{law_id}/download",
+            headers={"If-Modified-Since": first.headers["last-modified"]},
+        )
+        assert by_etag.status_code == 304
+        assert by_date.status_code == 304
+
+        # If-Range 不匹配时返回完整文件
+        stale = api_client.get(
+            f"/api/laws/{law_id}/download", headers={"Range": "bytes=0-9", "If-Range": '"stale"'}
+        )
+        assert stale.status_code == 200
+
+    def test_inline(self, api_client, law_id):
+        response = api_client.get(f"/api/laws/{law_id}/download", params={"inline": True})
+        assert response.headers["content-disposition"].startswith("inline;")
+        assert response.headers["x-content-type-options"] == "nosniff"
+
+    def test_inline_html_forced_to_attachment(self, api_client, db, tmp_path, monkeypatch):
+        """旧目录中的 HTML 等文件不允许 inline，避免在 API 同源下被渲染"""
+        monkeypatch.setattr(settings, "attachment_dir", tmp_path)
+        path = tmp_path / "2020" / "page.html"
+        path.parent.mkdir()
+        path.write_bytes(b"<script>alert(1)</script>")
+        law = create_law(db, {
+            "title": "旧附件",
+            "category": "国家颁布法规",
+            "source_url": "https://example.com/law/2",
+            "file_path": str(path),
+        })
+
+        response = api_client.get(f"/api/laws/{law.id}/download", params={"inline": True})
+        assert response.status_code == 200
+        assert response.headers["content-disposition"].startswith("attachment;")
+        assert response.headers["x-content-type-options"] == "nosniff"
+
+    def test_accel_redirect(self, api_client, law_id, monkeypatch):
+        monkeypatch.setattr(settings, "download_accel_redirect_prefix", "/protected/")
+        response = api_client.get(f"/api/laws/{law_id}/download")
+
+        digest = hashlib.sha256(BODY).hexdigest()
+        assert response.status_code == 200
+        assert response.content == b""
+        expected = f"/protected/objects/{digest[:2]}/{digest[2:4]}/{digest}.pdf"
+        assert response.headers["x-accel-redirect"] == expected
+
+        assert response.headers["content-type"] == "application/pdf"
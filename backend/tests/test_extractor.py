@@ -0,0 +1,176 @@
+"""详情页提取测试"""
+import pytest
+
+from app.services.crawl_pipeline import CrawlStats
+from app.services.extractor import (
+    Selector,
+    extract_detail,
+    find_publish_date,
+    parse_html,
+    profile_for,
+)
+
+WEAIN_URL = "https://www.weain.mil.cn/detail/1.html"
+
+WEAIN_PAGE = """
+<html>
+<head><title>关于政府采购的管理办法 - 网站名</title></head>
+<body>
+  <div class="header"><h1>网站名称</h1></div>
+  <div id="nonSecretTitle">关于政府采购的管理办法</div>
+  <div class="info">发布时间：2024-03-05 来源：财政部 更新于 2024-04-01</div>
+  <div class="txt" id="content">
+    <p>第一条 为了规范政府采购行为。</p>
+    <script>var x = 1;</script>
+    <nav>导航</nav>尾部文字
+  </div>
+  <div id="enclosureName"><a href="/files/a.doc">附件</a></div>
+  <a href="/files/other.pdf">其他附件</a>
+</body>
+</html>
+"""
+
+
+def test_extract_weain_page():
+    page = extract_detail(WEAIN_PAGE, WEAIN_URL)
+
+    assert page.profile == "weain"
+    assert page.selectors == {
+        "title": "#nonSecretTitle",
+        "content": "div.txt#content",
+        "attachment": "#enclosureName a",
+    }
+    assert page.title == "关于政府采购的管理办法"
+    assert page.publish_date == "2024-03-05"
+    assert page.file_url == "https://www.weain.mil.cn/files/a.doc"
+    assert page.content.startswith('<div class="txt" id="content">')
+    assert "第一条" in page.content
+    assert "尾部文字" in page.content
+    assert "<script" not in page.content
+    assert "导航" not in page.content
+
+
+def test_profile_lookup_by_host():
+    assert profile_for("https://WEAIN.mil.cn/a").name == "weain"
+    assert profile_for("https://example.com/a") is None
+    assert profile_for("not a url") is None
+
+
+def test_weain_selectors_are_not_used_for_other_hosts():
+    page = extract_detail(WEAIN_PAGE, "https://example.com/detail/1.html")
+
+    assert page.profile == "generic"
+    assert page.title == "关于政府采购的管理办法"  # 来自 <title>，"网站名称" 过短被跳过
+    assert page.selectors["title"] == "title"
+    assert page.selectors["content"] == "#content"
+    assert page.file_url == "https://example.com/files/a.doc"
+
+
+def test_profile_miss_falls_back_to_generic(caplog):
+    redesigned = WEAIN_PAGE.replace("nonSecretTitle", "pageTitle")
+    page = extract_detail(redesigned, WEAIN_URL)
+
+    assert page.profile == "generic"
+    assert page.title == "关于政府采购的管理办法"
+    assert "站点配置 weain 未命中" in caplog.text
+
+
+def test_profile_attachment_falls_back_to_generic_links():
+    html = WEAIN_PAGE.replace('id="enclosureName"', 'id="files"')
+    page = extract_detail(html, WEAIN_URL)
+
+    assert page.profile == "weain"
+    assert page.selectors["attachment"] == "a[href]"
+    assert page.file_url == "https://www.weain.mil.cn/files/a.doc"
+
+
+def test_record_extraction_counts_profile_misses():
+    stats = CrawlStats()
+    stats.record_extraction(extract_detail(WEAIN_PAGE, WEAIN_URL), "weain")
+    page = WEAIN_PAGE.replace("nonSecretTitle", "x")
+    stats.record_extraction(extract_detail(page, WEAIN_URL), "weain")
+
+    assert stats.profile_misses == 1
+    assert stats.extraction["weain/title"] == {"#nonSecretTitle": 1}
+    assert stats.extraction["generic/title"] == {"title": 1}
+    assert stats.extraction["generic/attachment"] == {"a[href]": 1}
+
+
+def test_selector_priority_follows_list_not_document_order():
+    html = """
+    <html><body>
+      <h2>这是一个二级标题文字</h2>
+      <h1>这是一级标题文字</h1>
+      <div class="content">普通正文</div>
+      <article>文章正文</article>
+    </body></html>
+    """
+    page = extract_detail(html, "https://example.com/")
+
+    assert page.title == "这是一级标题文字"
+    assert "普通正文" in page.content
+
+
+def test_short_title_falls_back_to_next_selector():
+    html = "<html><head><title>法规标题足够长 | 站点</title></head><body><h1>短</h1></body></html>"
+    assert extract_detail(html, "https://example.com/").title == "法规标题足够长"
+
+
+def test_paragraph_fallback_and_generic_attachment():
+    paragraph = "<p>" + "条款内容" * 30 + "</p>"
+    html = f"<html><body>{paragraph}<p> </p><a href='x.PDF?id=1'>下载</a></body></html>"
+    page = extract_detail(html, "https://example.com/dir/page.html")
+
+    assert page.content == paragraph
+    assert page.file_url == "https://example.com/dir/x.PDF?id=1"
+    assert page.publish_date is None
+
+
+def test_publish_date_prefers_labelled_date():
+    assert find_publish_date("更新 2023年1月2日 发布日期：2024年3月5日") == "2024年3月5日"
+    assert find_publish_date("印发于 2023/1/2") == "2023/1/2"
+
+
+def test_generic_publish_date_in_document_order():
+    """元素尾部文本按文档顺序参与日期匹配（与 BeautifulSoup 的 get_text 一致）"""
+    html = (
+        "<html><body><h1>某某管理规定全文</h1>"
+        "<div><span>成文日期：</span>2023-05-01 <span>发布日期：</span>2024-01-01</div>"
+        "</body></html>"
+    )
+    assert extract_detail(html, "https://example.com/").publish_date == "2024-01-01"
+
+
+@pytest.mark.parametrize("html", ["", "   "])
+def test_empty_document(html):
+    page = extract_detail(html, "https://example.com/")
+    assert page.title is None
+    assert page.content is None
+
+
+def test_xml_declaration_is_accepted():
+    html = (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        "<html><body><h1>带声明的页面标题</h1></body></html>"
+    )
+    assert parse_html(html) is not None
+    assert extract_detail(html, "https://example.com/").title == "带声明的页面标题"
+
+
+def test_selector_descendant_and_compound():
+    root = parse_html(
+        '<html><body><div class="txt a" id="content"><a href="#">x</a></div></body></html>'
+    )
+
+    div = root.find(".//div")
+    link = root.find(".//a")
+
+    assert Selector("div.txt#content").matches(div)
+    assert not Selector("div.other").matches(div)
+    assert Selector("#content a").matches(link)
+    assert not Selector("#enclosureName a").matches(link)
+    assert Selector("#content a").first(root) is link
+    assert Selector("div.txt").first(root) is div
+    assert Selector("div.other").first(root) is None
+    with pytest.raises(ValueError):
+        Selector("div > a")
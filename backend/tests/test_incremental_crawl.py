@@ -0,0 +1,130 @@
+"""增量爬取测试"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.config import settings
+from app.models.law import CrawlLog, create_crawl_log, create_law
+
+
+def _make_crawler(db, pages):
+    """构造一个列表数据来自 pages 的爬虫，返回 (crawler, 详情页请求记录)"""
+    from app.services.crawler import CrawlerService
+
+    crawler = CrawlerService(db)
+    fetched = []
+
+    def fetch_list(lmid, page=1):
+        return {
+            "totalNum": sum(len(p) for p in pages),
+            "contentList": [{"pcUrl": url, "BT": url} for url in pages[page - 1]],
+        }
+
+    def crawl_detail(url, category, download_attachments=True):
+        fetched.append(url)
+        return {
+            "title": f"法规标题{url}",
+            "category": category,
+            "publish_date": None,
+            "content": None,
+            "source_url": url,
+            "file_url": None,
+            "file_path": None,
+            "file_content": None,
+            "hash": url,
+        }
+
+    crawler._fetch_list_via_api = fetch_list
+    crawler._crawl_detail_page = crawl_detail
+    return crawler, fetched
+
+
+class TestIncrementalCrawl:
+    """增量爬取测试"""
+
+    def test_stops_after_consecutive_known(self, db, monkeypatch):
+        """连续遇到已知条目后停止翻页"""
+        monkeypatch.setattr(settings, "crawler_page_size", 3)
+        monkeypatch.setattr(settings, "crawler_incremental_stop_after", 3)
+        base = settings.crawler_base_url
+        for i in range(1, 7):
+            create_law(db, {
+                "title": f"已有法规{i}",
+                "category": "国家颁布法规",
+                "source_url": f"{base}/d/{i}",
+            })
+
+        pages = [["/d/new1", "/d/1", "/d/2"], ["/d/3", "/d/4", "/d/5"], ["/d/6", "/d/7", "/d/8"]]
+        crawler, fetched = _make_crawler(db, pages)
+
+        count = crawler.crawl_category("国家颁布法规", incremental=True)
+
+        assert count == 1
+        assert fetched == [f"{base}/d/new1"]
+        log = db.query(CrawlLog).order_by(CrawlLog.id.desc()).first()
+        assert log.mode == "incremental"
+
+    def test_full_mode_fetches_everything(self, db, monkeypatch):
+        """全量模式不跳过已知条目"""
+        monkeypatch.setattr(settings, "crawler_page_size", 2)
+        create_law(db, {
+            "title": "已有法规",
+            "category": "国家颁布法规",
+            "source_url": f"{settings.crawler_base_url}/d/1",
+        })
+        crawler, fetched = _make_crawler(db, [["/d/1", "/d/2"], ["/d/3"]])
+
+        assert crawler.crawl_category("国家颁布法规") == 3
+        assert len(fetched) == 3
+
+    def test_failed_attachment_is_retried(self, db):
+        """附件处理失败的条目不计入已知 URL"""
+        from app.models.law import get_known_source_urls
+        from app.services.crawler import CrawlerService
+
+        crawler = CrawlerService(db)
+
+        def fail(url):
+            raise RuntimeError("下载超时")
+
+        crawler._fetch_attachment = fail
+        law_data = {"title": "附件失败", "file_url": "https://example.com/a.pdf"}
+        crawler._attach(law_data)
+        assert law_data["attachment_status"] == "failed"
+
+        create_law(db, {**law_data, "category": "国家颁布法规", "source_url": "https://example.com/1"})
+        create_law(db, {"title": "正常", "category": "国家颁布法规", "source_url": "https://example.com/2"})
+
+        assert get_known_source_urls(db, "国家颁布法规") == {"https://example.com/2"}
+
+    def test_needs_full_resync(self, db, monkeypatch):
+        """超过间隔天数后需要全量同步"""
+        from app.scheduler.tasks import needs_full_resync
+
+        monkeypatch.setattr(settings, "crawler_full_resync_days", 7)
+        assert needs_full_resync(db) is True
+
+        log = create_crawl_log(
+            db, {"category": "全部", "status": "success", "mode": "full", "count": 1}
+        )
+
+        assert needs_full_resync(db) is False
+
+        log.created_at = datetime.utcnow() - timedelta(days=8)
+        db.commit()
+        assert needs_full_resync(db) is True
+
+
+def test_add_missing_columns():
+    """旧库自动补齐新增列"""
+    from app.database import add_missing_columns
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE crawl_logs (id INTEGER PRIMARY KEY, category VARCHAR(50), "
+            "status VARCHAR(20), count INTEGER, error_message TEXT, created_at DATETIME)"
+        ))
+
+    assert "crawl_logs.mode" in add_missing_columns(engine)
+    assert "mode" in {c["name"] for c in inspect(engine).get_columns("crawl_logs")}
@@ -0,0 +1,183 @@
+"""法规正文压缩存储测试"""
+from datetime import date
+
+import pytest
+from sqlalchemy import inspect, text
+
+from app.models.law import Law, LawBody, bulk_upsert_laws, create_law
+from app.services.body_codec import ZLIB, BodyCodec, body_codec
+from app.services.body_store import (
+    body_size_report,
+    legacy_body_columns,
+    migrate_law_bodies,
+    recompress_law_bodies,
+    train_body_dictionary,
+)
+
+PARAGRAPH = "<p>第一条 为规范装备采购工作，制定本办法。</p>"
+HTML = '<div class="txt" id="content">' + PARAGRAPH * 50 + "</div>"
+
+
+def _record(n, **overrides):
+    record = {
+        "title": f"法规标题{n}",
+        "category": "国家颁布法规",
+        "content": HTML,
+        "file_content": f"附件全文{n}",
+        "source_url": f"https://example.com/{n}",
+        "hash": f"hash-{n}",
+    }
+    record.update(overrides)
+    return record
+
+
+def test_codec_roundtrip():
+    codec = BodyCodec("zlib", 6)
+    encoded = codec.encode(HTML)
+    assert encoded.startswith(ZLIB) and len(encoded) < len(HTML.encode("utf-8"))
+    assert codec.decode(encoded) == HTML
+    assert codec.encode(None) is None and codec.decode(None) is None
+
+
+def test_bodies_stored_compressed(db, api_client):
+    """正文压缩后存放在 law_bodies，主表不再有正文列"""
+    law = create_law(db, _record(1))
+
+    columns = {column["name"] for column in inspect(db.get_bind()).get_columns("laws")}
+    assert not columns & {"content", "file_content"}
+
+    body = db.get(LawBody, law.id)
+    assert body.content_size == len(HTML.encode("utf-8"))
+    assert len(body.content) < body.content_size
+    assert body_codec.decode(body.content) == HTML
+
+    detail = api_client.get(f"/api/laws/{law.id}").json()
+    assert detail["content"] == HTML and detail["file_content"] == "附件全文1"
+
+
+def test_bulk_upsert_keeps_missing_fields(db):
+    """批量更新只覆盖记录中出现的正文字段"""
+    bulk_upsert_laws(db, [_record(1)])
+    update = _record(1, content="<p>新正文</p>")
+    del update["file_content"]
+    bulk_upsert_laws(db, [update])
+
+    db.expire_all()
+    law = db.query(Law).one()
+    assert law.content == "<p>新正文</p>"
+    assert law.file_content == "附件全文1"
+
+
+def test_migrate_legacy_columns(db):
+    """旧版内联在 laws 表中的正文迁移到 law_bodies 并删除旧列"""
+    db.execute(text("ALTER TABLE laws ADD COLUMN content TEXT"))
+    db.execute(text("ALTER TABLE laws ADD COLUMN file_content TEXT"))
+    for n in range(1, 4):
+        db.execute(
+            text(
+                "INSERT INTO laws (title, category, source_url, content, file_content) "
+                "VALUES (:title, '国家颁布法规', :url, :content, :file_content)"
+            ),
+            {"title": f"旧法规{n}", "url": f"https://example.com/{n}", "content": HTML,
+             "file_content": None if n == 3 else f"附件{n}"},
+        )
+    db.commit()
+
+    # 默认（应用启动时）只迁移数据，不删除旧列
+    assert migrate_law_bodies(db, batch_size=2) == 3
+    assert legacy_body_columns(db.get_bind()) == ["content", "file_content"]
+    assert migrate_law_bodies(db, drop_columns=True) == 0
+    assert legacy_body_columns(db.get_bind()) == []
+
+    laws = {law.title: law for law in db.query(Law)}
+    assert laws["旧法规2"].content == HTML and laws["旧法规2"].file_content == "附件2"
+    assert laws["旧法规3"].file_content is None
+
+    report = body_size_report(db)
+    assert report["rows"] == 3
+    assert report["raw_bytes"] == 3 * len(HTML.encode("utf-8")) + 2 * len("附件1".encode())
+    assert report["stored_bytes"] < report["raw_bytes"]
+    assert sum(report["formats"].values()) == 5
+    if db.get_bind().dialect.name == "postgresql" or report["tables"]:
+        assert set(report["tables"]) >= {"laws", "law_bodies"} and len(report["tables"]) == 3
+
+
+def test_like_search_matches_bodies(db, api_client, monkeypatch):
+    """不支持全文索引时，LIKE 兜底搜索仍匹配压缩存储的正文和附件全文"""
+    monkeypatch.setattr("app.api.laws.search_backend", lambda bind: None)
+    monkeypatch.setattr("app.api.laws.LIKE_SCAN_BATCH", 2)
+    for n in range(1, 6):
+        create_law(db, _record(n, file_content=f"附件外协条款{n}" if n % 2 else None,
+                               publish_date=date(2024, 1, n)))
+
+    def search(**params):
+        return api_client.get("/api/laws/search", params=params).json()
+
+    assert search(keyword="装备采购")["total"] == 5
+    data = search(keyword="外协")
+    assert data["total"] == 3
+    assert [item["title"] for item in data["items"]] == ["法规标题5", "法规标题3", "法规标题1"]
+
+    first = search(keyword="外协", cursor="", page_size=2)
+    second = search(keyword="外协", cursor=first["next_cursor"], page_size=2, with_total=True)
+    titles = [item["title"] for item in first["items"] + second["items"]]
+    assert titles == ["法规标题5", "法规标题3", "法规标题1"]
+    assert second["next_cursor"] is None and second["total"] == 3
+
+
+def test_like_search_scan_is_capped(db, api_client, monkeypatch):
+    """LIKE 兜底搜索每次请求最多解压 search_like_max_scan 条，游标从扫描停止处继续"""
+    from app.config import settings
+
+    monkeypatch.setattr("app.api.laws.search_backend", lambda bind: None)
+    monkeypatch.setattr("app.api.laws.LIKE_SCAN_BATCH", 2)
+    monkeypatch.setattr(settings, "search_like_max_scan", 3)
+    for n in range(1, 6):
+        create_law(db, _record(n, file_content="附件外协条款" if n == 1 else None,
+                               publish_date=date(2024, 1, n)))
+
+    def search(**params):
+        return api_client.get("/api/laws/search", params=params).json()
+
+    first = search(keyword="外协", cursor="", page_size=2)
+    assert first["items"] == [] and first["next_cursor"]
+    second = search(keyword="外协", cursor=first["next_cursor"], page_size=2)
+    assert [item["title"] for item in second["items"]] == ["法规标题1"]
+    assert second["next_cursor"] is None
+    # 页码分页只统计最近的 3 条
+    assert search(keyword="外协")["total"] == 0
+
+
+def test_search_without_terms_skips_scan(db, api_client, monkeypatch):
+    """切不出词元的关键词（纯标点）直接返回空结果，不扫描法规"""
+    monkeypatch.setattr("app.api.laws.search_backend", lambda bind: None)
+    monkeypatch.setattr("app.api.laws._scan_like_matches", pytest.fail)
+    create_law(db, _record(1, title="《装备采购条例》"))
+
+    data = api_client.get("/api/laws/search", params={"keyword": "《 -"}).json()
+    assert data["total"] == 0 and data["items"] == []
+    data = api_client.get("/api/laws/search", params={"keyword": "》", "cursor": ""}).json()
+    assert data["items"] == [] and data["next_cursor"] is None
+
+
+def test_dictionary_training_and_recompress(db, monkeypatch):
+    pytest.importorskip("zstandard")
+    codec = BodyCodec("zstd", 9)
+    monkeypatch.setattr("app.models.law.body_codec", codec)
+    monkeypatch.setattr("app.services.body_store.body_codec", codec)
+
+    bulk_upsert_laws(db, [
+        _record(n, content=HTML.replace("第一条", f"第{n}条")) for n in range(1, 300)
+    ])
+    dict_id = train_body_dictionary(db, samples=300, size=4096)
+    assert codec.active_dictionary == dict_id
+
+    assert recompress_law_bodies(db, batch_size=100) == 299
+    assert body_size_report(db)["formats"] == {"zstd+dict": 598}
+
+    # 新进程中首次读到字典数据时从数据库加载字典
+    codec.clear_dictionaries()
+    db.expire_all()
+    law = db.query(Law).filter(Law.title == "法规标题7").one()
+    assert law.content == HTML.replace("第一条", "第7条")
+
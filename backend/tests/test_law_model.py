@@ -0,0 +1,74 @@
+"""法规数据访问测试"""
+from app.models.law import Law, bulk_upsert_laws, create_law
+
+
+def _record(n, **overrides):
+    record = {
+        "title": f"法规标题{n}",
+        "category": "国家颁布法规",
+        "publish_date": None,
+        "content": f"<p>正文{n}</p>",
+        "source_url": f"https://example.com/{n}",
+        "file_url": None,
+        "file_path": None,
+        "file_content": None,
+        "hash": f"hash-{n}",
+    }
+    record.update(overrides)
+    return record
+
+
+class TestBulkUpsert:
+    """批量写入测试"""
+
+    def test_insert_and_update(self, db, api_client):
+        """按 hash 或 source_url 匹配已有记录"""
+        by_hash = create_law(db, _record(1))
+        by_url = create_law(db, _record(2))
+
+        created, updated = bulk_upsert_laws(db, [
+            _record(1, title="按哈希更新的标题"),
+            _record(2, hash="hash-2-new", title="按链接更新的标题"),
+            _record(3),
+            _record(3, title="同批重复以最后一条为准"),
+        ])
+
+        assert (created, updated) == (1, 2)
+        db.expire_all()
+        assert db.query(Law).count() == 3
+        assert db.get(Law, by_hash.id).title == "按哈希更新的标题"
+        assert db.get(Law, by_url.id).hash == "hash-2-new"
+        assert db.query(Law).filter(Law.hash == "hash-3").one().title == "同批重复以最后一条为准"
+
+        # 全文索引同步
+        data = api_client.get("/api/laws/search", params={"keyword": "更新的标题"}).json()
+        assert data["total"] == 2
+
+    def test_empty_batch(self, db):
+        """空批次不写入"""
+        assert bulk_upsert_laws(db, []) == (0, 0)
+
+
+class TestListProjection:
+    """列表接口精简字段测试"""
+
+    def test_list_omits_bodies(self, db, api_client):
+        """列表只返回摘要，详情返回全文"""
+        law = create_law(db, _record(1, content="<p>" + "很长的正文" * 100 + "</p>",
+                                     file_content="附件全文", file_url="https://example.com/a.pdf"))
+
+        item = api_client.get("/api/laws").json()["items"][0]
+        assert "content" not in item and "file_content" not in item
+        assert item["has_attachment"] is True
+        assert item["summary"].startswith("很长的正文") and item["summary"].endswith("…")
+
+        detail = api_client.get(f"/api/laws/{law.id}").json()
+        assert detail["file_content"] == "附件全文"
+
+    def test_bodies_are_deferred(self, db):
+        """查询列表时不加载正文列"""
+        create_law(db, _record(1))
+        db.expunge_all()
+
+        law = db.query(Law).first()
+        assert "body" not in law.__dict__
@@ -0,0 +1,69 @@
+"""Prometheus 指标测试"""
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from prometheus_client import REGISTRY
+
+from app.config import settings
+from app.services import crawler as crawler_module
+from app.services.crawler import CrawlerService
+from app.services.rate_limiter import HostRateLimiter
+from benchmarks.fixture_server import FixtureServer
+
+CATEGORY = "国家颁布法规"
+
+
+def _value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_route_and_db_metrics(api_client):
+    """按路由模板统计请求数，数据库语句耗时按类型统计"""
+    route = "/api/laws/{law_id}"
+    before = _value("http_requests_total", method="GET", route=route, status="404")
+    queries = _value("db_query_duration_seconds_count", operation="select")
+
+    assert api_client.get("/api/laws/12345").status_code == 404
+
+    assert _value("http_requests_total", method="GET", route=route, status="404") == before + 1
+    assert _value("http_request_duration_seconds_count", method="GET", route=route) >= 1
+    assert _value("db_query_duration_seconds_count", operation="select") > queries
+
+    body = api_client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/api/laws/{law_id}",status="404"}' in body
+
+
+def test_crawler_metrics(db, monkeypatch, tmp_path):
+    """爬虫请求、重试、字节数、阶段耗时和条目数"""
+    monkeypatch.setattr(crawler_module, "rate_limiter", HostRateLimiter(0, 1))
+    monkeypatch.setattr(settings, "crawler_max_retries", 2)
+    monkeypatch.setattr(settings, "crawler_request_delay", 0)
+    monkeypatch.setattr(settings, "attachment_dir", tmp_path)
+
+    names = {
+        "missing": ("crawler_http_requests_total", {"kind": "detail", "status": "404"}),
+        "retries": ("crawler_http_retries_total", {"kind": "detail"}),
+        "lists": ("crawler_http_requests_total", {"kind": "list", "status": "200"}),
+        "bytes": ("crawler_downloaded_bytes_total", {"kind": "detail"}),
+        "new": ("crawler_items_total", {"category": CATEGORY, "result": "new"}),
+        "extract": ("crawler_stage_duration_seconds_count", {"stage": "extract"}),
+        "write": ("crawler_stage_duration_seconds_count", {"stage": "write"}),
+    }
+    before = {key: _value(name, **labels) for key, (name, labels) in names.items()}
+
+    with FixtureServer(pages=1, page_size=3, attachment_ratio=0) as server:
+        monkeypatch.setattr(settings, "crawler_base_url", server.base_url)
+        monkeypatch.setattr(settings, "crawler_api_url", server.api_url)
+        crawler = CrawlerService(db)
+        assert crawler._request_with_retry(server.base_url + "/missing", kind="detail") is None
+        assert crawler.crawl_category(CATEGORY) == 3
+
+    delta = {key: _value(name, **labels) - before[key] for key, (name, labels) in names.items()}
+    assert delta["missing"] == 2
+    assert delta["retries"] == 1
+    assert delta["lists"] >= 1
+    assert delta["bytes"] > 0
+    assert delta["new"] == 3
+    assert delta["extract"] == 3
+    assert delta["write"] >= 1
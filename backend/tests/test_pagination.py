@@ -0,0 +1,89 @@
+"""游标分页测试"""
+from datetime import date
+
+import pytest
+
+from app.api.pagination import decode_cursor, encode_cursor
+from app.models.law import Law, create_law
+
+
+@pytest.fixture
+def laws(db):
+    """10 条法规，其中 3 条没有发布日期，部分日期相同"""
+    dates = [
+        date(2024, 1, 1), date(2024, 1, 1), date(2023, 5, 1), None, date(2022, 3, 1),
+        None, date(2024, 6, 1), date(2024, 1, 1), None, date(2021, 1, 1),
+    ]
+    for i, publish_date in enumerate(dates):
+        create_law(db, {
+            "title": f"采购法规{i}",
+            "category": "国家颁布法规",
+            "publish_date": publish_date,
+            "source_url": f"https://example.com/{i}",
+        })
+    return db.query(Law).all()
+
+
+def _walk(client, path, params):
+    """沿 next_cursor 翻完所有页，返回依次得到的 id"""
+    ids, cursor, pages = [], "", 0
+    while cursor is not None:
+        data = client.get(path, params={**params, "cursor": cursor, "page_size": 3}).json()
+        ids += [item["id"] for item in data["items"]]
+        cursor = data["next_cursor"]
+        pages += 1
+        assert pages < 10
+    return ids
+
+
+def _expected(laws, descending=True):
+    dated = sorted(
+        (law for law in laws if law.publish_date),
+        key=lambda law: (law.publish_date, law.id),
+        reverse=descending,
+    )
+    undated = sorted(
+        (law for law in laws if not law.publish_date), key=lambda law: law.id, reverse=descending
+    )
+    return [law.id for law in dated + undated]
+
+
+class TestCursorPagination:
+    """游标分页测试"""
+
+    def test_cursor_roundtrip(self):
+        """游标编码可还原"""
+        cursor = encode_cursor(date(2024, 1, 2), 7, True)
+        assert decode_cursor(cursor) == (date(2024, 1, 2), 7, True)
+        assert decode_cursor(encode_cursor(None, 3, False)) == (None, 3, False)
+
+    def test_walk_all_pages(self, laws, api_client):
+        """降序、升序翻页覆盖所有记录且不重复"""
+        assert _walk(api_client, "/api/laws", {}) == _expected(laws)
+        assert _walk(api_client, "/api/laws", {"sort": "publish_date"}) == _expected(laws, False)
+
+    def test_search_walk_all_pages(self, laws, api_client):
+        """搜索接口的游标分页"""
+        assert _walk(api_client, "/api/laws/search", {"keyword": "采购"}) == _expected(laws)
+
+    def test_total_only_when_requested(self, laws, api_client):
+        """游标分页默认不计算总数"""
+        data = api_client.get("/api/laws", params={"cursor": ""}).json()
+        assert data["total"] is None
+        data = api_client.get("/api/laws", params={"cursor": "", "with_total": True}).json()
+        assert data["total"] == 10
+
+    def test_page_mode_unchanged(self, laws, api_client):
+        """页码分页保持原有响应"""
+        data = api_client.get("/api/laws", params={"page": 2, "page_size": 4}).json()
+        assert (data["total"], data["page"], data["total_pages"]) == (10, 2, 3)
+        assert data["next_cursor"] is None
+
+    def test_invalid_cursor(self, laws, api_client):
+        """无效游标或不支持的排序返回 400"""
+        assert api_client.get("/api/laws", params={"cursor": "bad"}).status_code == 400
+        response = api_client.get("/api/laws", params={"cursor": "", "sort": "title"})
+        assert response.status_code == 400
+
+        cursor = encode_cursor(date(2024, 1, 1), 1, False)
+        assert api_client.get("/api/laws", params={"cursor": cursor}).status_code == 400
@@ -0,0 +1,83 @@
+"""慢查询日志、Server-Timing 与按需采样分析测试"""
+import asyncio
+import logging
+import pstats
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.api.profiling import ProfilingMiddleware
+from app.config import settings
+from app.database import run_read
+from app.models.law import Law, create_law
+from app.services import profiling
+
+
+def test_slow_query_logged_with_plan(db, monkeypatch, caplog):
+    """超过阈值的查询连同执行计划写入日志"""
+    profiling.install_query_hooks()
+    monkeypatch.setattr(settings, "slow_query_ms", 1e-6)
+    create_law(db, {"title": "法规", "category": "国家颁布法规", "source_url": "https://example.com/1"})
+
+    with caplog.at_level(logging.WARNING, logger=profiling.__name__):
+        assert db.query(Law).filter(Law.category == "国家颁布法规").count() == 1
+
+    messages = [record.getMessage() for record in caplog.records if "慢查询" in record.getMessage()]
+    assert messages
+    if db.get_bind().dialect.name == "sqlite":
+        assert any("执行计划" in message and "laws" in message for message in messages)
+
+
+def test_slow_query_disabled(db, monkeypatch, caplog):
+    profiling.install_query_hooks()
+    monkeypatch.setattr(settings, "slow_query_ms", 0)
+    with caplog.at_level(logging.WARNING, logger=profiling.__name__):
+        db.query(Law).count()
+    assert not [record for record in caplog.records if "慢查询" in record.getMessage()]
+
+
+def test_server_timing_header(api_client, monkeypatch):
+    profiling.install_query_hooks()
+    monkeypatch.setattr(settings, "server_timing", True)
+    client = TestClient(ProfilingMiddleware(api_client.app))
+
+    header = client.get("/api/laws").headers["server-timing"]
+    names = [part.split(";")[0].strip() for part in header.split(",")]
+    assert names == ["db", "serialize", "total"]
+    assert "queries" in header
+
+
+def test_profile_requires_token(api_client, monkeypatch, tmp_path):
+    """只有带正确令牌的请求才会被采样并保存结果"""
+    monkeypatch.setattr(settings, "profiler_token", "secret")
+    monkeypatch.setattr(settings, "profile_dir", tmp_path)
+    client = TestClient(ProfilingMiddleware(api_client.app))
+
+    response = client.get("/api/laws", headers={"X-Profile-Token": "wrong"})
+    assert response.status_code == 200 and "x-profile-file" not in response.headers
+    assert "server-timing" not in response.headers
+
+    response = client.get("/api/laws", headers={"X-Profile-Token": "secret"})
+    assert response.status_code == 200
+    path = tmp_path / response.headers["x-profile-file"]
+    assert path.stat().st_size > 0
+    assert not profiling.profiling_active()
+    # 查询在线程池中执行，工作线程上的采样结果并入了请求的结果
+    if path.suffix == ".prof":
+        names = {func[2] for func in pstats.Stats(str(path)).stats}
+        assert "cached_response" in names
+    else:
+        assert "cached_response" in path.read_text(encoding="utf-8")
+
+
+def test_profiled_read_stays_in_threadpool(db, tmp_path):
+    """被采样的请求的查询仍在线程池中执行，不阻塞事件循环"""
+    async def run():
+        profiler = profiling.RequestProfiler("GET", "/api/laws", tmp_path)
+        assert profiler.start()
+        try:
+            return await run_read(db, lambda session: threading.current_thread().name)
+        finally:
+            profiler.stop()
+
+    assert asyncio.run(run()) != threading.main_thread().name
@@ -0,0 +1,149 @@
+"""响应缓存与 ETag 测试"""
+import asyncio
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.api.caching import make_cache_key
+from app.models.law import create_law
+from app.services import cache as cache_module
+
+
+def _add(db, n):
+    return create_law(db, {
+        "title": f"缓存法规{n}",
+        "category": "国家颁布法规",
+        "source_url": f"https://example.com/{n}",
+    })
+
+
+class TestResponseCache:
+    """响应缓存测试"""
+
+    def test_cache_key_normalized(self):
+        """参数顺序和空值不影响缓存键"""
+        assert make_cache_key("laws", {"a": 1, "b": None, "c": "x"}) == make_cache_key(
+            "laws", {"c": "x", "a": 1}
+        )
+
+    def test_etag_revalidation(self, db, api_client):
+        """数据未变化时返回 304，写入后 ETag 变化"""
+        law = _add(db, 1)
+
+        first = api_client.get("/api/laws")
+        etag = first.headers["etag"]
+        assert first.status_code == 200
+
+        again = api_client.get("/api/laws", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+
+        _add(db, 2)
+        changed = api_client.get("/api/laws", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert changed.json()["total"] == 2
+
+        detail = api_client.get(f"/api/laws/{law.id}")
+        assert detail.json()["title"] == "缓存法规1"
+
+    def test_served_from_cache(self, db, api_client, monkeypatch):
+        """命中缓存时不再执行查询"""
+        _add(db, 1)
+        assert api_client.get("/api/laws", params={"page_size": 5}).status_code == 200
+
+        import app.api.laws as laws_api
+
+        def fail(*args, **kwargs):
+            raise AssertionError("不应重新查询")
+
+        monkeypatch.setattr(laws_api, "_list_laws", fail)
+        data = api_client.get("/api/laws", params={"page_size": 5}).json()
+        assert data["items"][0]["title"] == "缓存法规1"
+
+    def test_data_version_upsert(self, db):
+        """版本表为空时插入首行，之后原地递增"""
+        from app.models.state import bump_data_version, get_data_version
+
+        assert get_data_version(db) == 0
+        bump_data_version(db)
+        bump_data_version(db)
+        db.commit()
+        assert get_data_version(db) == 2
+
+    def test_errors_not_cached(self, api_client):
+        """404 不写入缓存"""
+        assert api_client.get("/api/laws/999").status_code == 404
+        assert len(cache_module.cache) == 0
+
+    def test_cache_disabled(self, db, api_client, monkeypatch):
+        """cache_backend=none 时仍返回 ETag"""
+        monkeypatch.setattr(cache_module, "cache", None)
+        _add(db, 1)
+        response = api_client.get("/api/laws")
+        assert response.status_code == 200
+        assert "etag" in response.headers
+
+
+def test_async_session_cache_io_off_event_loop(tmp_path, monkeypatch):
+    """AsyncSession 时缓存读写和序列化不在事件循环线程上执行"""
+    pytest.importorskip("greenlet")
+    pytest.importorskip("aiosqlite")
+    from fastapi.testclient import TestClient
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    import app.models  # noqa: F401
+    from app.database import Base, create_async_db_engine, create_db_engine, get_db
+    from app.main import app
+    from app.services.search import ensure_search_index
+
+    url = f"sqlite:///{tmp_path / 'laws.db'}"
+    engine = create_db_engine(url, echo=False)
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    with sessionmaker(bind=engine)() as db:
+        law_id = _add(db, 1).id
+    engine.dispose()
+
+    calls = []
+
+    class OffLoopCache(cache_module.TTLCache):
+        def _check(self):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                calls.append(True)
+            else:
+                raise AssertionError("缓存读写在事件循环线程上执行")
+
+        def get(self, key, default=None):
+            self._check()
+            return super().get(key, default)
+
+        def set(self, key, value):
+            self._check()
+            super().set(key, value)
+
+    monkeypatch.setattr(cache_module, "cache", OffLoopCache(maxsize=10, ttl=60))
+    async_engine = create_async_db_engine(url, echo=False, poolclass=NullPool)
+    factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_db():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        first = client.get(f"/api/laws/{law_id}")
+        assert first.json()["title"] == "缓存法规1"
+        assert client.get(f"/api/laws/{law_id}").content == first.content
+        assert client.get(
+            f"/api/laws/{law_id}", headers={"If-None-Match": first.headers["etag"]}
+        ).status_code == 304
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        asyncio.run(async_engine.dispose())
+
+    assert len(calls) == 3
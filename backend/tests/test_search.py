@@ -0,0 +1,171 @@
+"""全文检索测试"""
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.models.law import bulk_upsert_laws, create_law, update_law
+from app.services.search import (
+    TSVECTOR,
+    TSVECTOR_MAX_POSITION,
+    build_match_query,
+    build_tsquery,
+    desegment,
+    ensure_search_index,
+    highlight,
+    make_snippet,
+    rank_order,
+    search_filter,
+    segment,
+    tsvector_document,
+)
+
+
+class TestSegment:
+    """中文二元分词测试"""
+
+    def test_segment_roundtrip(self):
+        """切分后可还原为原文"""
+        text = "关于GJB 5000A的采购法规，第3条。"
+        assert desegment(segment(text)) == text
+
+    def test_build_match_query(self):
+        """关键词转换为短语查询"""
+        assert build_match_query("采购") == '"\x1f采购\x1f" *'
+        assert build_match_query("法") == '"\x1f法\x1f" *'
+        assert build_match_query("采购 法规") is not None
+        assert build_match_query("，。") is None
+
+    def test_build_tsquery(self):
+        """tsquery 与 MATCH 表达式语义一致：相邻词元短语，末尾词元前缀匹配"""
+        assert build_tsquery("采购") == "('采购':*)"
+        assert build_tsquery("采购法") == "('采购' <-> '购法':*)"
+        assert build_tsquery("GJB 采购") == "('gjb':*) & ('采购':*)"
+        assert build_tsquery("第3条") == "('第' <-> '3' <-> '条':*)"
+        assert build_tsquery("，。") is None
+
+    def test_tsvector_document(self):
+        """词元带位置和列权重，列之间留空位"""
+        document = tsvector_document("采购法", "采购", None)
+        assert document == "'采购':1A,5B '购法':2A '法':3A '购':6B"
+
+    def test_tsvector_positions_are_capped(self):
+        document = tsvector_document(None, None, "字" * (TSVECTOR_MAX_POSITION + 10))
+        assert f":{TSVECTOR_MAX_POSITION + 1}" not in document
+        assert len(document.split(",")) <= 256 + 1
+
+    def test_tsvector_sql(self):
+        """PostgreSQL 查询条件与排序"""
+        dialect = postgresql.dialect()
+        where = str(search_filter(TSVECTOR, "('采购':*)").compile(dialect=dialect))
+        order = str(rank_order(TSVECTOR, "('采购':*)").compile(dialect=dialect))
+        assert "laws_search.document @@ CAST(" in where and "AS TSQUERY)" in where
+        assert order.startswith("ts_rank_cd(laws_search.document, CAST(") and order.endswith("DESC")
+
+    def test_make_snippet(self):
+        """取第一个命中的文本，在关键词附近截取"""
+        body = "甲" * 100 + "装备采购" + "乙" * 100
+        snippet = make_snippet("采购", None, body, "采购标题", size=20)
+        assert snippet == "…" + "甲" * 3 + "装备采购" + "乙" * 13 + "…"
+        assert make_snippet("采购", "正文", "采购标题") == "采购标题"
+        assert make_snippet("不存在", "正文") == ""
+
+    def test_highlight_escapes_html(self):
+        """高亮前转义 HTML"""
+        assert highlight("<b>采购</b>", "采购") == "&lt;b&gt;<mark>采购</mark>&lt;/b&gt;"
+
+
+class TestSearchAPI:
+    """搜索接口测试"""
+
+    def _add(self, db, title, content=None, file_content=None, category="国家颁布法规"):
+        return create_law(db, {
+            "title": title,
+            "category": category,
+            "content": content,
+            "file_content": file_content,
+            "source_url": f"https://example.com/{title}",
+        })
+
+    def test_search_substring_semantics(self, db, api_client):
+        """与 LIKE 一致的子串匹配"""
+        self._add(db, "军队物资采购管理规定", content="<p>第一条 为规范采购工作</p>")
+        self._add(db, "国防科研试制费管理办法", file_content="附件：科研采购外协")
+        self._add(db, "无关法规标题")
+
+        for keyword, expected in [("采购", 2), ("购管", 1), ("外协", 1), ("法", 2), ("不存在", 0)]:
+            data = api_client.get("/api/laws/search", params={"keyword": keyword}).json()
+            assert data["total"] == expected, keyword
+
+    def test_search_ranks_title_first(self, db, api_client):
+        """标题命中排在正文命中之前，并返回高亮摘要"""
+        self._add(db, "某项通知文件", content="<p>本通知涉及装备采购事项</p>")
+        self._add(db, "装备采购条例", content="<p>正文</p>")
+
+        data = api_client.get("/api/laws/search", params={"keyword": "装备采购"}).json()
+        assert [item["title"] for item in data["items"]] == ["装备采购条例", "某项通知文件"]
+        assert "<mark>装备采购</mark>" in data["items"][1]["snippet"]
+
+    def test_search_index_follows_update(self, db, api_client):
+        """更新法规后索引同步"""
+        law = self._add(db, "旧的法规标题")
+        update_law(db, law, {"title": "新的条例标题"})
+
+        assert api_client.get("/api/laws/search", params={"keyword": "旧的"}).json()["total"] == 0
+        assert api_client.get("/api/laws/search", params={"keyword": "条例"}).json()["total"] == 1
+
+    def test_search_category_filter(self, db, api_client):
+        """分类筛选"""
+        self._add(db, "采购法规甲", category="国家颁布法规")
+        self._add(db, "采购法规乙", category="军队颁布法规")
+
+        data = api_client.get(
+            "/api/laws/search", params={"keyword": "采购", "category": "军队颁布法规"}
+        ).json()
+        assert data["total"] == 1
+        assert data["items"][0]["title"] == "采购法规乙"
+
+    def test_search_snippet_from_body(self, db, api_client):
+        """命中片段取自解压后的正文"""
+        self._add(db, "某项规定", content="<p>" + "前文" * 50 + "装备采购事项" + "</p>")
+
+        item = api_client.get("/api/laws/search", params={"keyword": "采购"}).json()["items"][0]
+        assert item["snippet"].startswith("…") and "装备<mark>采购</mark>事项" in item["snippet"]
+
+    def test_bulk_update_reindexes(self, db, api_client):
+        """批量更新时删除旧索引；未出现在记录中的字段按原有内容索引"""
+        record = {
+            "title": "旧标题规定",
+            "category": "国家颁布法规",
+            "content": "<p>旧正文内容</p>",
+            "file_content": "附件外协条款",
+            "source_url": "https://example.com/bulk",
+            "hash": "h1",
+        }
+        bulk_upsert_laws(db, [record])
+        bulk_upsert_laws(db, [{**{k: v for k, v in record.items() if k != "file_content"},
+                               "title": "新标题规定", "content": "<p>新正文内容</p>"}])
+
+        def total(keyword):
+            return api_client.get("/api/laws/search", params={"keyword": keyword}).json()["total"]
+
+        keywords = ("旧标题", "旧正文", "新标题", "新正文", "外协")
+        assert [total(keyword) for keyword in keywords] == [0, 0, 1, 1, 1]
+
+    def test_legacy_index_rebuilt_contentless(self, db, db_engine, api_client):
+        """旧版保存原文的索引表改为无内容表并重建"""
+        if db_engine.dialect.name != "sqlite":
+            return
+        self._add(db, "装备采购条例")
+        with db_engine.begin() as conn:
+            conn.execute(text("DROP TABLE laws_fts"))
+            conn.execute(
+                text("CREATE VIRTUAL TABLE laws_fts USING fts5(title, content, file_content)")
+            )
+
+        ensure_search_index(db_engine)
+        with db_engine.connect() as conn:
+            sql = conn.execute(
+                text("SELECT sql FROM sqlite_master WHERE name = 'laws_fts'")
+            ).scalar()
+
+        assert "content=''" in sql
+        assert api_client.get("/api/laws/search", params={"keyword": "采购"}).json()["total"] == 1
@@ -0,0 +1,83 @@
+"""附件文本缓存测试"""
+import zipfile
+
+from app.services import attachment_parser
+from app.services.attachment_parser import AttachmentParser
+from app.services.text_cache import MISS, TextCache, file_digest
+
+
+class TestTextCache:
+    """缓存读写与淘汰"""
+
+    def test_get_put(self, tmp_path):
+        cache = TextCache(tmp_path / "cache.db", max_bytes=1024 * 1024)
+
+        assert cache.get("d1", "1") is MISS
+        cache.put("d1", "1", "附件正文")
+        cache.put("d2", "1", None)
+
+        assert cache.get("d1", "1") == "附件正文"
+        assert cache.get("d2", "1") is None
+        # 解析器版本不同视为未命中
+        assert cache.get("d1", "2") is MISS
+
+    def test_lru_eviction(self, tmp_path):
+        cache = TextCache(tmp_path / "cache.db", max_bytes=300)
+        texts = {f"d{i}": "".join(chr(0x4e00 + i * 50 + j) for j in range(40)) for i in range(4)}
+
+        cache.put("d0", "1", texts["d0"])
+        cache.put("d1", "1", texts["d1"])
+        cache.get("d0", "1")  # d0 最近使用过，d1 先被淘汰
+        cache.put("d2", "1", texts["d2"])
+        cache.put("d3", "1", texts["d3"])
+
+        assert cache.stats()["bytes"] <= 300
+        assert cache.get("d1", "1") is MISS
+        assert cache.get("d3", "1") == texts["d3"]
+
+    def test_disabled(self, tmp_path):
+        cache = TextCache(tmp_path / "cache.db", max_bytes=0)
+        cache.put("d1", "1", "x")
+        assert cache.get("d1", "1") is MISS
+
+
+class TestCachedParsing:
+    """解析命中缓存时跳过解析"""
+
+    def test_same_bytes_parsed_once(self, tmp_path, monkeypatch):
+        calls = []
+        parse_file = attachment_parser.parse_file
+
+        def counting_parse(path):
+            calls.append(path)
+            return parse_file(path)
+
+        monkeypatch.setattr(attachment_parser, "parse_file", counting_parse)
+
+        a = tmp_path / "a.txt"
+        b = tmp_path / "b.txt"
+        a.write_text("相同内容", encoding="utf-8")
+        b.write_text("相同内容", encoding="utf-8")
+        archive = tmp_path / "bundle.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.write(a, "inner.txt")
+
+        parser = AttachmentParser(workers=0)
+        assert parser.parse(a) == "相同内容"
+        assert parser.parse(b, file_digest(b)) == "相同内容"
+        assert "相同内容" in parser.parse(archive)
+
+        # a 解析一次；b 和压缩包内的同内容文件命中缓存；压缩包本身解析一次
+        assert [p.rsplit("/", 1)[-1] for p in calls] == ["a.txt", "bundle.zip"]
+
+    def test_parser_version_invalidates(self, tmp_path, monkeypatch):
+        path = tmp_path / "a.txt"
+        path.write_text("v1", encoding="utf-8")
+        parser = AttachmentParser(workers=0)
+        parser.parse(path)
+
+        next_version = attachment_parser.PARSER_VERSION + "-next"
+        monkeypatch.setattr(attachment_parser, "PARSER_VERSION", next_version)
+
+        monkeypatch.setattr(attachment_parser, "parse_file", lambda p: "v2")
+        assert parser.parse(path) == "v2"
@@ -0,0 +1,68 @@
+"""时间线接口测试"""
+from datetime import date
+
+from app.models.law import create_law
+from app.services.cache import cache
+
+
+def _add(db, n, publish_date, category="国家颁布法规"):
+    return create_law(db, {
+        "title": f"时间线法规{n}",
+        "category": category,
+        "publish_date": publish_date,
+        "source_url": f"https://example.com/{n}",
+    })
+
+
+class TestTimeline:
+    """时间线测试"""
+
+    def test_counts(self, db, api_client):
+        """按年、按月统计数量"""
+        _add(db, 1, date(2024, 3, 1))
+        _add(db, 2, date(2024, 3, 31))
+        _add(db, 3, date(2024, 12, 5), category="军队颁布法规")
+        _add(db, 4, date(2023, 1, 9))
+        _add(db, 5, None)
+
+        data = api_client.get("/api/laws/timeline").json()
+        assert data["years"] == [{"key": "2024", "count": 3}, {"key": "2023", "count": 1}]
+        assert data["months"] == [
+            {"key": "2024-12", "count": 1},
+            {"key": "2024-03", "count": 2},
+            {"key": "2023-01", "count": 1},
+        ]
+        assert data["total"] == 4
+
+        data = api_client.get("/api/laws/timeline", params={"year": 2023}).json()
+        assert [m["key"] for m in data["months"]] == ["2023-01"]
+        assert len(data["years"]) == 2
+
+        data = api_client.get("/api/laws/timeline", params={"category": "军队颁布法规"}).json()
+        assert data["total"] == 1
+
+    def test_bucket_items(self, db, api_client):
+        """按月分页获取条目"""
+        for n in range(5):
+            _add(db, n, date(2024, 12, n + 1))
+        _add(db, 9, date(2025, 1, 1))
+
+        data = api_client.get(
+            "/api/laws/timeline/items", params={"month": "2024-12", "page_size": 2}
+        ).json()
+        assert data["total"] == 5
+        assert data["total_pages"] == 3
+        assert [item["title"] for item in data["items"]] == ["时间线法规4", "时间线法规3"]
+
+        response = api_client.get("/api/laws/timeline/items", params={"month": "2024-13"})
+        assert response.status_code == 422
+
+
+    def test_cache_invalidated_on_write(self, db, api_client):
+        """写入数据后缓存失效"""
+        _add(db, 1, date(2024, 3, 1))
+        assert api_client.get("/api/laws/timeline").json()["total"] == 1
+        assert len(cache) == 1
+
+        _add(db, 2, date(2024, 4, 1))
+        assert api_client.get("/api/laws/timeline").json()["total"] == 2
@@ -20,11 +20,16 @@ export const searchLaws = (keyword, params = {}) => {
   return api.get('/laws/search', { params: { keyword, ...params } }).then(res => res.data)
 }
 
-// 获取时间线
+// 获取时间线（按年、按月统计）
 export const getTimeline = (params = {}) => {
   return api.get('/laws/timeline', { params }).then(res => res.data)
 }
 
+// 获取时间线某个月份的法规
+export const getTimelineItems = (month, params = {}) => {
+  return api.get('/laws/timeline/items', { params: { month, ...params } }).then(res => res.data)
+}
+
 // 获取分类列表
 export const getCategories = () => {
   return api.get('/categories').then(res => res.data)
@@ -35,7 +40,12 @@ export const getCrawlStatus = () => {
   return api.get('/crawl/status').then(res => res.data)
 }
 
-// 触发爬取
+// 获取爬取任务进度
+export const getCrawlJob = (taskId) => {
+  return api.get(`/crawl/status/${taskId}`).then(res => res.data)
+}
+
+// 触发爬取（后台执行，返回 task_id）
 export const startCrawl = (category = null) => {
   const params = category ? { category } : {}
   return api.post('/crawl/start', null, { params }).then(res => res.data)